@@ -0,0 +1,70 @@
+"""
+在单个进程内驱动 EmbeddingBatcher + HashingEmbeddingModel, 测量动态批处理下 batch 大小与延迟的取舍
+
+    python benchmark/benchmark_embedding.py --num-requests 2000 --concurrency 64 --max-batch-size 64 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.core.scheduler import EmbeddingBatcher  # noqa: E402
+from xinference_demo.model.embedding.core import (  # noqa: E402
+    create_embedding_model_instance,
+)
+
+TEXT = "Requests are batched together so one process can serve many users. "
+
+
+async def run(args):
+    model = create_embedding_model_instance("tiny-embedding-bench", "tiny-embedding")
+    model.load()
+    batcher = EmbeddingBatcher(
+        model, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    )
+    batcher.start()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one_request(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await batcher.encode([f"{i} " + TEXT * args.text_repeat] * args.inputs)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(args.num_requests)))
+    elapsed = time.perf_counter() - start
+    stats = batcher.get_stats()
+    await batcher.stop()
+
+    print(f"requests:        {args.num_requests}")
+    print(f"concurrency:     {args.concurrency}")
+    print(f"max batch size:  {args.max_batch_size}")
+    print(f"max wait:        {args.max_wait_ms:g} ms")
+    print(f"elapsed:         {elapsed:.3f} s")
+    print(f"throughput:      {stats['num_texts'] / elapsed:.1f} inputs/s")
+    print(f"mean batch size: {stats['num_texts'] / max(stats['num_batches'], 1):.1f}")
+    values = np.asarray(latencies) * 1000
+    print(
+        f"{'latency:':<16} mean {values.mean():.2f} ms, "
+        f"p50 {np.percentile(values, 50):.2f} ms, "
+        f"p99 {np.percentile(values, 99):.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--inputs", type=int, default=1, help="inputs per request")
+    parser.add_argument("--text-repeat", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,134 @@
+"""
+对比全量心跳 (Dict[str, ResourceStatus]) 与增量心跳的消息大小和 Supervisor 端的处理时间
+
+模拟若干 Worker 的负载随机游走, 其中只有少部分 Worker 的负载在变化; 全量心跳每 5 秒发送一次,
+增量心跳按 HeartbeatEncoder 给出的自适应间隔发送, 两种模式在 Supervisor 端得到的状态需在阈值内一致
+
+    python benchmark/benchmark_heartbeat.py --num-workers 500 --duration 600 --busy-ratio 0.1
+"""
+import argparse
+import heapq
+import os
+import pickle
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.core.heartbeat import (  # noqa: E402
+    MEMORY_THRESHOLD,
+    USAGE_THRESHOLD,
+    HeartbeatDecoder,
+    HeartbeatEncoder,
+)
+from xinference_demo.core.resource import ResourceStatus  # noqa: E402
+
+FULL_INTERVAL = 5.0
+MEMORY_TOTAL = 256 * 2**30
+
+
+class SimulatedNode:
+    def __init__(self, rng: random.Random, busy: bool):
+        self.rng = rng
+        self.busy = busy
+        self.usage = rng.random() * 0.2
+        self.memory_available = MEMORY_TOTAL * (0.5 + rng.random() * 0.4)
+        self.model_count = rng.randrange(4)
+
+    def status(self, now: float):
+        if self.busy:
+            self.usage = min(1.0, max(0.0, self.usage + self.rng.gauss(0, 0.1)))
+            self.memory_available += self.rng.gauss(0, MEMORY_TOTAL * 0.02)
+            if self.rng.random() < 0.05:
+                self.model_count += self.rng.choice((-1, 1)) if self.model_count else 1
+        else:
+            # 空闲节点只有很小的噪声
+            self.usage = min(1.0, max(0.0, self.usage + self.rng.gauss(0, 0.002)))
+            self.memory_available += self.rng.gauss(0, MEMORY_TOTAL * 0.0005)
+        return {
+            "cpu": ResourceStatus(
+                available=self.usage,
+                total=64,
+                memory_available=self.memory_available,
+                memory_total=MEMORY_TOTAL,
+            )
+        }
+
+
+def make_nodes(args):
+    rng = random.Random(0)
+    return [
+        SimulatedNode(random.Random(i), rng.random() < args.busy_ratio)
+        for i in range(args.num_workers)
+    ]
+
+
+def run_full(args):
+    nodes = make_nodes(args)
+    nbytes = messages = 0
+    ingest = 0.0
+    received = {}
+    t = 0.0
+    while t < args.duration:
+        for i, node in enumerate(nodes):
+            payload = pickle.dumps((node.status(t), node.model_count))
+            nbytes += len(payload)
+            messages += 1
+            start = time.perf_counter()
+            received[i] = pickle.loads(payload)
+            ingest += time.perf_counter() - start
+        t += FULL_INTERVAL
+    return nbytes, messages, ingest, received, nodes
+
+
+def run_delta(args):
+    nodes = make_nodes(args)
+    encoders = [HeartbeatEncoder() for _ in nodes]
+    decoders = [HeartbeatDecoder() for _ in nodes]
+    nbytes = messages = 0
+    ingest = 0.0
+    # (下一次心跳时间, Worker 序号)
+    schedule = [(0.0, i) for i in range(len(nodes))]
+    while schedule[0][0] < args.duration:
+        t, i = heapq.heappop(schedule)
+        node = nodes[i]
+        message = encoders[i].encode(node.status(t), node.model_count)
+        payload = pickle.dumps(message)
+        nbytes += len(payload)
+        messages += 1
+        start = time.perf_counter()
+        decoders[i].apply(pickle.loads(payload))
+        ingest += time.perf_counter() - start
+        heapq.heappush(schedule, (t + message[1], i))
+    return nbytes, messages, ingest, decoders, nodes
+
+
+def main(args):
+    full_bytes, full_messages, full_ingest, _, _ = run_full(args)
+    delta_bytes, delta_messages, delta_ingest, decoders, nodes = run_delta(args)
+    for decoder, node in zip(decoders, nodes):
+        cpu = decoder.status["cpu"]
+        assert abs(cpu.available - node.usage) < USAGE_THRESHOLD
+        assert abs(cpu.memory_available - node.memory_available) < (
+            MEMORY_TOTAL * MEMORY_THRESHOLD
+        )
+        assert decoder.model_count == node.model_count
+    for name, nbytes, messages, ingest in (
+        ("full", full_bytes, full_messages, full_ingest),
+        ("delta", delta_bytes, delta_messages, delta_ingest),
+    ):
+        print(
+            f"{name:<6} {messages:8d} messages, {nbytes / 2**20:8.2f} MiB, "
+            f"{nbytes / messages:6.1f} B/message, "
+            f"{nbytes / args.duration / 1024:8.1f} KiB/s, "
+            f"ingest {ingest * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-workers", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=600, help="seconds")
+    parser.add_argument("--busy-ratio", type=float, default=0.1)
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""
+测量模型从启动请求到生成第一个 token 的耗时, 对比冷启动与使用预热子进程的启动
+
+每轮在 Worker 上启动一个模型并生成 1 个 token, 然后终止模型; 预热模式下每轮开始前等待空闲子进程补充完成
+
+    python benchmark/benchmark_launch.py --repeat 5 --model-name tiny-chat
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import xoscar as xo  # noqa: E402
+from xoscar.utils import get_next_port  # noqa: E402
+
+from xinference_demo.core.supervisor import SupervisorActor  # noqa: E402
+from xinference_demo.core.worker import WorkerActor  # noqa: E402
+from xinference_demo.deploy.utils import create_worker_actor_pool  # noqa: E402
+
+
+async def wait_idle_sub_pools(worker_ref, count: int):
+    while await worker_ref.get_idle_sub_pool_count() < count:
+        await asyncio.sleep(0.05)
+
+
+async def measure(args, prewarm_sub_pools: int):
+    address = f"127.0.0.1:{get_next_port()}"
+    pool = await create_worker_actor_pool(address)
+    try:
+        await xo.create_actor(SupervisorActor, address=address, uid=SupervisorActor.uid())
+        worker_ref = await xo.create_actor(
+            WorkerActor,
+            address=address,
+            uid=WorkerActor.uid(),
+            supervisor_address=address,
+            main_pool=pool,
+            cuda_devices=[],
+            prewarm_sub_pools=prewarm_sub_pools,
+        )
+        results = []
+        for i in range(args.repeat):
+            await wait_idle_sub_pools(worker_ref, prewarm_sub_pools)
+            model_uid = f"bench-{i}"
+            start = time.perf_counter()
+            await worker_ref.launch_builtin_model(
+                model_uid=model_uid, model_name=args.model_name
+            )
+            launched = time.perf_counter()
+            model_ref = await worker_ref.get_model(model_uid)
+            await model_ref.generate("Hello", {"max_tokens": 1})
+            first_token = time.perf_counter()
+            await worker_ref.terminate_model(model_uid)
+            results.append((launched - start, first_token - start))
+        return results
+    finally:
+        await pool.stop()
+
+
+async def run(args):
+    for name, prewarm_sub_pools in (("cold", 0), ("warm", args.prewarm_sub_pools)):
+        results = await measure(args, prewarm_sub_pools)
+        launch_ms = [r[0] * 1000 for r in results]
+        first_token_ms = [r[1] * 1000 for r in results]
+        print(
+            f"{name:<5} launch {statistics.median(launch_ms):8.1f} ms, "
+            f"first token {statistics.median(first_token_ms):8.1f} ms "
+            f"(median of {args.repeat}, min {min(first_token_ms):.1f} ms, "
+            f"max {max(first_token_ms):.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model-name", type=str, default="tiny-chat")
+    parser.add_argument("--prewarm-sub-pools", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""
+对比开启与关闭前缀 K/V 缓存时, 共享长系统提示词的请求的首 token 延迟
+
+每个请求的 prompt 为同一个系统提示词 + 若干 few-shot 示例之一 + 随机的用户输入, 两种模式的贪心输出必须一致
+
+    python benchmark/benchmark_prefix_cache.py --num-requests 256 --system-tokens 4096 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.core.scheduler import (  # noqa: E402
+    ContinuousBatchingScheduler,
+    InferenceRequest,
+)
+from xinference_demo.model.llm import BUILTIN_LLM_FAMILIES  # noqa: E402
+from xinference_demo.model.llm.tiny import TinyLM  # noqa: E402
+
+
+def make_prompts(args):
+    rng = random.Random(0)
+    system = [rng.randrange(256) for _ in range(args.system_tokens)]
+    shots = [
+        [rng.randrange(256) for _ in range(args.shot_tokens)]
+        for _ in range(args.num_shots)
+    ]
+    return [
+        system
+        + rng.choice(shots)
+        + [rng.randrange(256) for _ in range(rng.randrange(8, 64))]
+        for _ in range(args.num_requests)
+    ]
+
+
+async def run(model, prompts, args, prefix_cache_bytes: int):
+    scheduler = ContinuousBatchingScheduler(
+        model, prefix_cache_bytes=prefix_cache_bytes, seed=0
+    )
+    scheduler.start()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    ttfts = []
+
+    async def one(prompt):
+        async with semaphore:
+            req = InferenceRequest(prompt, args.max_tokens)
+            scheduler.add_request(req)
+            await req.future
+            ttfts.append(req.first_token_time - req.arrival_time)
+            return req.output_tokens
+
+    start = time.perf_counter()
+    outputs = await asyncio.gather(*[one(prompt) for prompt in prompts])
+    elapsed = time.perf_counter() - start
+    stats = scheduler.get_stats()
+    await scheduler.stop()
+    return outputs, elapsed, ttfts, stats
+
+
+async def main(args):
+    model = TinyLM("benchmark", BUILTIN_LLM_FAMILIES["tiny-chat"])
+    model.load()
+    prompts = make_prompts(args)
+    baseline = None
+    for name, cache_bytes in (
+        ("no cache", 0),
+        ("prefix", int(args.prefix_cache_size * 2**20)),
+    ):
+        outputs, elapsed, ttfts, stats = await run(model, prompts, args, cache_bytes)
+        if baseline is None:
+            baseline = outputs
+        assert outputs == baseline, f"{name} generates different tokens"
+        ttfts.sort()
+        print(
+            f"{name:<9} {elapsed:7.3f} s, "
+            f"TTFT mean {statistics.mean(ttfts) * 1000:7.2f} ms, "
+            f"p99 {ttfts[int(len(ttfts) * 0.99) - 1] * 1000:7.2f} ms"
+        )
+        if "prefix_cache_queries" in stats:
+            print(
+                f"prefix cache hits {stats['prefix_cache_hits']}/{stats['prefix_cache_queries']}, "
+                f"prefill tokens saved {stats['prefix_cache_hit_tokens']}"
+                f"/{stats['prefix_cache_query_tokens']}, "
+                f"{stats['prefix_cache_bytes'] / 2**20:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--system-tokens", type=int, default=4096)
+    parser.add_argument("--num-shots", type=int, default=4)
+    parser.add_argument("--shot-tokens", type=int, default=512)
+    parser.add_argument("--max-tokens", type=int, default=16)
+    parser.add_argument("--prefix-cache-size", type=float, default=64, help="MiB")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+对比多轮长对话中逐轮渲染提示词的耗时:
+    concat   每轮按模板逐条拼接完整历史 (原 ChatModelMixin.get_prompt 的实现)
+    compiled 编译后的渲染器, 不复用前缀
+    prefix   编译后的渲染器, 复用同一对话上一轮已渲染的前缀
+
+    python benchmark/benchmark_prompt.py --conversations 8 --turns 200 --message-chars 400
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.model.llm import BUILTIN_LLM_PROMPT_STYLE  # noqa: E402
+from xinference_demo.model.llm.prompt import (  # noqa: E402
+    PromptRenderer,
+    compile_prompt_style,
+)
+
+
+def concat_prompt(prompt, chat_history, prompt_style):
+    roles = {"user": prompt_style.roles[0], "assistant": prompt_style.roles[1]}
+    chat_history = list(chat_history)
+    chat_history.append({"role": prompt_style.roles[0], "content": prompt})
+    chat_history.append({"role": prompt_style.roles[1], "content": ""})
+    ret = prompt_style.system_prompt + prompt_style.intra_message_sep
+    for message in chat_history:
+        role = roles.get(message["role"], message["role"])
+        content = message["content"]
+        if content:
+            ret += role + ": " + content + prompt_style.intra_message_sep
+        else:
+            ret += role + ":"
+    return ret
+
+
+def make_conversations(args):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + "     "
+    return [
+        [
+            "".join(rng.choices(alphabet, k=args.message_chars))
+            for _ in range(2 * args.turns)
+        ]
+        for _ in range(args.conversations)
+    ]
+
+
+def build_turns(conversations):
+    '''
+    各对话交替进行, 每轮的历史为前几轮的 user/assistant 消息, 每轮单独构造 (与请求反序列化一致)
+    '''
+    turns = len(conversations[0]) // 2
+    return [
+        (
+            messages[2 * turn],
+            [
+                {"role": "user" if i % 2 == 0 else "assistant", "content": messages[i]}
+                for i in range(2 * turn)
+            ],
+        )
+        for turn in range(turns)
+        for messages in conversations
+    ]
+
+
+def run_turns(turns, render):
+    start = time.perf_counter()
+    results = [render(prompt, history) for prompt, history in turns]
+    return time.perf_counter() - start, results
+
+
+def main(args):
+    style = BUILTIN_LLM_PROMPT_STYLE["tiny-chat"]
+    turns = build_turns(make_conversations(args))
+    uncached = PromptRenderer(
+        style.system_prompt,
+        style.roles,
+        (style.intra_message_sep, style.intra_message_sep),
+        cache_size=0,
+    )
+    cached = compile_prompt_style(style)
+    modes = {
+        "concat": lambda prompt, history: concat_prompt(prompt, history, style),
+        "compiled": uncached.render,
+        "prefix": cached.render,
+    }
+    baseline = None
+    for name, render in modes.items():
+        elapsed, results = run_turns(turns, render)
+        if baseline is None:
+            baseline = results
+        assert results == baseline, f"{name} renders a different prompt"
+        print(
+            f"{name:<9} {elapsed * 1000:9.1f} ms for {len(results)} prompts, "
+            f"{elapsed / len(results) * 1e6:8.1f} us/prompt"
+        )
+    print(f"prefix cache hits {cached.hits}, misses {cached.misses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--message-chars", type=int, default=400)
+    main(parser.parse_args())
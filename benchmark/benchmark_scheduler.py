@@ -0,0 +1,77 @@
+"""
+在单个进程内驱动 ContinuousBatchingScheduler + TinyLM, 测量连续批处理的吞吐与延迟
+
+    python benchmark/benchmark_scheduler.py --num-requests 64 --concurrency 16 --max-batch-size 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.core.scheduler import (  # noqa: E402
+    ContinuousBatchingScheduler,
+    InferenceRequest,
+)
+from xinference_demo.model.llm.core import create_llm_model_instance  # noqa: E402
+
+PROMPT = "The supervisor keeps track of every worker and every running model. "
+
+
+async def run(args):
+    model = create_llm_model_instance("tiny-chat-bench", "tiny-chat")
+    model.load()
+    scheduler = ContinuousBatchingScheduler(
+        model, max_batch_size=args.max_batch_size, seed=0
+    )
+    scheduler.start()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    ttfts, latencies, num_tokens = [], [], []
+
+    async def one_request(i: int):
+        async with semaphore:
+            req = InferenceRequest(
+                model.tokenize(PROMPT * args.prompt_repeat),
+                max_tokens=args.max_tokens,
+                temperature=args.temperature,
+            )
+            scheduler.add_request(req)
+            await req.future
+            end = time.perf_counter()
+            ttfts.append(req.first_token_time - req.arrival_time)
+            latencies.append(end - req.arrival_time)
+            num_tokens.append(len(req.output_tokens))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(args.num_requests)))
+    elapsed = time.perf_counter() - start
+    await scheduler.stop()
+
+    print(f"requests:        {args.num_requests}")
+    print(f"concurrency:     {args.concurrency}")
+    print(f"max batch size:  {args.max_batch_size}")
+    print(f"elapsed:         {elapsed:.3f} s")
+    print(f"throughput:      {sum(num_tokens) / elapsed:.1f} tokens/s")
+    for name, values in (("ttft", ttfts), ("latency", latencies)):
+        values = np.asarray(values) * 1000
+        print(
+            f"{name + ':':<16} mean {values.mean():.1f} ms, "
+            f"p50 {np.percentile(values, 50):.1f} ms, "
+            f"p99 {np.percentile(values, 99):.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--prompt-repeat", type=int, default=4)
+    parser.add_argument("--temperature", type=float, default=1.0)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,75 @@
+"""
+测量启动入口 (mycmd.py / local) 的导入耗时与常驻内存
+
+每次在全新的解释器中导入目标模块, 记录导入耗时、进程 RSS 峰值以及是否导入了 torch
+
+    python benchmark/benchmark_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 在子进程中执行, 输出一行 JSON
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+from xinference_demo.utils import cuda_count
+cuda_start = time.perf_counter()
+count = cuda_count()
+cuda_elapsed = time.perf_counter() - cuda_start
+print(json.dumps({{
+    "import_s": elapsed,
+    "cuda_count_s": cuda_elapsed,
+    "cuda_count": count,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+}}))
+"""
+
+TARGETS = {
+    # mycmd.py 执行的导入
+    "entry": ["xinference_demo"],
+    # local 集群子进程额外导入的模块
+    "local": ["xinference_demo.deploy.local", "xinference_demo.deploy.worker"],
+    # forkserver 子进程中 ModelActor 所需的模块
+    "worker": ["xinference_demo.core.worker"],
+}
+
+
+def probe(modules):
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=modules)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(repeat: int):
+    for name, modules in TARGETS.items():
+        results = [probe(modules) for _ in range(repeat)]
+        import_ms = [r["import_s"] * 1000 for r in results]
+        rss = [r["maxrss_mb"] for r in results]
+        print(
+            f"{name:<8} import {statistics.median(import_ms):8.1f} ms (median of {repeat}), "
+            f"rss {statistics.median(rss):7.1f} MB, "
+            f"cuda_count {results[0]['cuda_count']} in "
+            f"{results[0]['cuda_count_s'] * 1000:.2f} ms, "
+            f"torch imported: {any(r['torch_imported'] for r in results)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args().repeat)
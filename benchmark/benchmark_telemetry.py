@@ -0,0 +1,75 @@
+"""
+对比每次心跳采集节点资源的开销:
+    psutil: 每次调用 psutil.cpu_percent() 与 psutil.virtual_memory(), 新建 ResourceStatus, 经 asyncio.to_thread 执行
+    sampler: 长期存在的 NodeSampler, 持有打开的 /proc 与 cgroup 文件, 原地更新结果, 直接在事件循环中执行
+    sampler+: 同上, 另外采集负载、磁盘与网络吞吐以及替身 GPU
+
+    python benchmark/benchmark_telemetry.py --repeat 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from xinference_demo.core.resource import (  # noqa: E402
+    NodeSampler,
+    ResourceStatus,
+    StubGpuProvider,
+    default_collectors,
+)
+
+
+def psutil_gather():
+    mem_info = psutil.virtual_memory()
+    return {
+        "cpu": ResourceStatus(
+            available=psutil.cpu_percent() / 100.0,
+            total=psutil.cpu_count(),
+            memory_available=mem_info.available,
+            memory_total=mem_info.total,
+        )
+    }
+
+
+async def run_psutil(repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.to_thread(psutil_gather)
+    return time.perf_counter() - start
+
+
+async def run_sampler(repeat: int, sampler: NodeSampler) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        sampler.sample()
+    return time.perf_counter() - start
+
+
+async def main(args):
+    basic = NodeSampler(default_collectors(extended=False))
+    extended = NodeSampler(
+        default_collectors(extended=True, gpu_provider=StubGpuProvider(8))
+    )
+    for name, coro in (
+        ("psutil", run_psutil(args.repeat)),
+        ("sampler", run_sampler(args.repeat, basic)),
+        ("sampler+", run_sampler(args.repeat, extended)),
+    ):
+        elapsed = await coro
+        print(f"{name:<9} {elapsed / args.repeat * 1e6:8.1f} us/sample")
+    sample = extended.sample()
+    print(f"resources: {', '.join(sample.resources)}")
+    print(f"metrics: {', '.join(sample.metrics)}")
+    basic.close()
+    extended.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
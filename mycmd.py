@@ -1,9 +1,16 @@
-from xinference_demo import local
+from xinference_demo import local, supervisor, worker
 
 import re
 import sys
 # from xinference.deploy.cmdline import local
+
+# python mycmd.py [local|supervisor|worker] [OPTIONS], 不指定子命令时启动单节点集群
+COMMANDS = {"local": local, "supervisor": supervisor, "worker": worker}
+
 if __name__ == '__main__':
     sys.argv[0] = re.sub(r'(-script\.pyw|\.exe)?$', '', sys.argv[0])
     print(f"Command line parameters are {sys.argv}")
-    sys.exit(local())
+    command = local
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = COMMANDS[sys.argv.pop(1)]
+    sys.exit(command())
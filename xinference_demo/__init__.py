@@ -1 +1 @@
-from .deploy.cmdline import local
\ No newline at end of file
+from .deploy.cmdline import local, supervisor, worker
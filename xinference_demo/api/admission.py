@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+from aioprometheus import Counter, Gauge, Histogram
+
+from ..core.metrics import remove_labels
+
+logger = getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+# 数值越小优先级越高
+PRIORITY_CLASSES: Dict[str, int] = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+# 估计服务时间的指数滑动平均系数
+_SERVICE_TIME_EMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    '''
+    请求被准入控制拒绝, 由 RESTful API 转换为 429/503 响应并附带 Retry-After
+    '''
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionMetrics:
+    '''
+    准入控制的监控指标, 注册在 aioprometheus 的默认 REGISTRY 中, 与 MetricsMiddleware 一同导出
+    '''
+
+    def __init__(self):
+        self.queue_depth = Gauge(
+            "xinference_admission_queue_depth",
+            "Number of requests waiting for admission per model.",
+        )
+        self.inflight = Gauge(
+            "xinference_admission_inflight",
+            "Number of admitted requests in flight per model.",
+        )
+        self.wait_time = Histogram(
+            "xinference_admission_wait_seconds",
+            "Time requests spent waiting for admission per model.",
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+        )
+        self.rejected = Counter(
+            "xinference_admission_rejected_total",
+            "Number of requests shed by admission control per model and reason.",
+        )
+
+    def remove(self, model_uid: str):
+        labels = {"model": model_uid}
+        for collector in (
+            self.queue_depth,
+            self.inflight,
+            self.wait_time,
+            self.rejected,
+        ):
+            remove_labels(collector, labels)
+
+
+class AdmissionTicket:
+    '''
+    已准入请求占用的并发名额, 请求结束 (包括流式响应结束) 后调用 release 归还
+    '''
+
+    __slots__ = ("_controller", "_start", "_released")
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._start = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._start)
+
+
+class AdmissionController:
+    '''
+    单个模型的准入控制:
+        并发上限内的请求直接进入模型, 超出的请求进入按 (优先级, 到达顺序) 排序的有界队列
+        队列已满时立即返回 429; 按当前排队情况预计无法在截止时间前开始时立即返回 503
+        排队超过截止时间的请求返回 503, 不再占用队列
+    '''
+
+    def __init__(
+        self,
+        model_uid: str,
+        max_concurrency: int,
+        max_queue_size: int,
+        metrics: Optional[AdmissionMetrics] = None,
+    ):
+        self._model_uid = model_uid
+        self._labels = {"model": model_uid}
+        self._max_concurrency = max_concurrency
+        self._max_queue_size = max_queue_size
+        self._metrics = metrics
+        self._inflight = 0
+        # (优先级, 序号, future), 被取消的条目惰性删除
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._queue_size = 0
+        self._seq = itertools.count()
+        self._service_time = 1.0
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def close(self):
+        '''
+        模型终止后调用, 删除该模型的监控指标; 仍未结束的请求照常归还名额, 但不再更新指标
+        '''
+        metrics, self._metrics = self._metrics, None
+        if metrics is not None:
+            metrics.remove(self._model_uid)
+
+    def _estimated_wait(self, ahead: int) -> float:
+        '''
+        按平均服务时间估计排在 ahead 个请求之后需要等待的时间
+        '''
+        return (ahead // self._max_concurrency + 1) * self._service_time
+
+    @property
+    def retry_after(self) -> int:
+        '''
+        建议客户端重试前等待的秒数
+        '''
+        return max(1, math.ceil(self._estimated_wait(self._queue_size)))
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        if self._metrics is not None:
+            self._metrics.rejected.inc({"model": self._model_uid, "reason": reason})
+        raise AdmissionRejected(status_code, detail, self.retry_after)
+
+    def _update_metrics(self):
+        if self._metrics is not None:
+            self._metrics.queue_depth.set(self._labels, self._queue_size)
+            self._metrics.inflight.set(self._labels, self._inflight)
+
+    def _observe_wait(self, wait: float):
+        if self._metrics is not None:
+            self._metrics.wait_time.observe(self._labels, wait)
+
+    async def acquire(
+        self, priority: str = PRIORITY_INTERACTIVE, timeout: Optional[float] = None
+    ) -> AdmissionTicket:
+        '''
+        申请并发名额, timeout 为请求的截止时间 (秒)
+        '''
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(
+                f"Invalid priority: {priority}, "
+                f"available priorities are {', '.join(PRIORITY_CLASSES)}"
+            )
+        if self._inflight < self._max_concurrency and self._queue_size == 0:
+            self._inflight += 1
+            self._update_metrics()
+            self._observe_wait(0.0)
+            return AdmissionTicket(self)
+
+        if self._queue_size >= self._max_queue_size:
+            self._reject(
+                429,
+                "queue_full",
+                f"Model {self._model_uid} is overloaded: "
+                f"{self._queue_size} requests are already queued",
+            )
+        if timeout is not None and self._estimated_wait(self._queue_size) > timeout:
+            self._reject(
+                503,
+                "deadline",
+                f"Model {self._model_uid} cannot start the request within its "
+                f"deadline of {timeout:g} s",
+            )
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queue, (PRIORITY_CLASSES[priority], next(self._seq), future)
+        )
+        self._queue_size += 1
+        self._update_metrics()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._cancel_waiter(future)
+            self._reject(
+                503,
+                "timeout",
+                f"Request to model {self._model_uid} waited longer than "
+                f"its deadline of {timeout:g} s",
+            )
+        except asyncio.CancelledError:
+            self._cancel_waiter(future)
+            raise
+        self._observe_wait(time.monotonic() - start)
+        return AdmissionTicket(self)
+
+    def _cancel_waiter(self, future: asyncio.Future):
+        if future.done():
+            # 名额已经分配给该请求, 但请求已放弃, 归还名额
+            if not future.cancelled():
+                self._release(None)
+            return
+        future.cancel()
+        self._queue_size -= 1
+        self._update_metrics()
+
+    def _release(self, service_time: Optional[float]):
+        if service_time is not None:
+            self._service_time += _SERVICE_TIME_EMA_ALPHA * (
+                service_time - self._service_time
+            )
+        self._inflight -= 1
+        while self._queue and self._inflight < self._max_concurrency:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._queue_size -= 1
+            self._inflight += 1
+            future.set_result(None)
+        self._update_metrics()
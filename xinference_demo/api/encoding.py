@@ -0,0 +1,153 @@
+import base64
+import gzip
+from functools import lru_cache
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.utils import json_dumps
+
+logger = getLogger(__name__)
+
+MEDIA_TYPE_JSON = "application/json"
+MEDIA_TYPE_MSGPACK = "application/msgpack"
+# 原始小端 float32 向量, 形状由 X-Embedding-Shape 响应头给出
+MEDIA_TYPE_FLOAT32 = "application/octet-stream"
+
+_MEDIA_TYPE_ALIASES = {
+    MEDIA_TYPE_JSON: MEDIA_TYPE_JSON,
+    MEDIA_TYPE_MSGPACK: MEDIA_TYPE_MSGPACK,
+    "application/x-msgpack": MEDIA_TYPE_MSGPACK,
+    MEDIA_TYPE_FLOAT32: MEDIA_TYPE_FLOAT32,
+}
+
+# 小于该大小的响应不压缩, 压缩的 CPU 开销高于节省的传输时间
+MIN_COMPRESS_SIZE = 1024
+
+
+def _parse_accept(header: Optional[str]) -> List[Tuple[str, float]]:
+    '''
+    解析 Accept / Accept-Encoding, 按 q 值从高到低返回 (值, q)
+    '''
+    if not header:
+        return []
+    items = []
+    for i, part in enumerate(header.split(",")):
+        value, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if value and q > 0:
+            items.append((value.lower(), q, i))
+    items.sort(key=lambda item: (-item[1], item[2]))
+    return [(value, q) for value, q, _ in items]
+
+
+def negotiate_media_type(accept: Optional[str], binary: bool = False) -> str:
+    '''
+    按 Accept 请求头选择响应格式, 无法匹配时使用 JSON
+    binary 为 False 时不提供原始 float32 格式 (仅 embedding 响应可用)
+    '''
+    for value, _ in _parse_accept(accept):
+        media_type = _MEDIA_TYPE_ALIASES.get(value)
+        if media_type is None:
+            continue
+        if media_type == MEDIA_TYPE_FLOAT32 and not binary:
+            continue
+        if media_type == MEDIA_TYPE_MSGPACK and not _has_module("msgpack"):
+            continue
+        return media_type
+    return MEDIA_TYPE_JSON
+
+
+def negotiate_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    '''
+    按 Accept-Encoding 请求头选择压缩方式, 支持 zstd (需安装 zstandard) 与 gzip
+    '''
+    for value, _ in _parse_accept(accept_encoding):
+        if value == "zstd" and _has_module("zstandard"):
+            return "zstd"
+        if value == "gzip":
+            return "gzip"
+    return None
+
+
+@lru_cache(maxsize=None)
+def _has_module(name: str) -> bool:
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def compress(
+    body: bytes, content_encoding: Optional[str]
+) -> Tuple[bytes, Optional[str]]:
+    '''
+    返回 (压缩后的内容, 实际使用的 Content-Encoding)
+    '''
+    if content_encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if content_encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    return gzip.compress(body, compresslevel=5), "gzip"
+
+
+def _msgpack_default(obj: Any):
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj, dtype="<f4").data
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    '''
+    JSON 经 orjson 直接序列化 NumPy 数组; msgpack 中 NumPy 数组编码为小端 float32 的 bin
+    '''
+    if media_type == MEDIA_TYPE_MSGPACK:
+        import msgpack
+
+        return msgpack.packb(content, default=_msgpack_default)
+    return json_dumps(content)
+
+
+def encode_embedding(
+    data: Dict, media_type: str, encoding_format: str = "float"
+) -> Tuple[bytes, Dict[str, str]]:
+    '''
+    编码 ModelActor 返回的 embedding 结果, 返回 (内容, 额外的响应头)
+    data 中每条 embedding 为 NumPy 数组, 各格式均不经过 Python float 列表
+    '''
+    if media_type == MEDIA_TYPE_FLOAT32:
+        items = data["data"]
+        dimensions = len(items[0]["embedding"]) if items else 0
+        matrix = np.empty((len(items), dimensions), dtype="<f4")
+        for i, item in enumerate(items):
+            matrix[i] = item["embedding"]
+        usage = data["usage"]
+        return matrix.tobytes(), {
+            "X-Embedding-Shape": f"{len(items)},{dimensions}",
+            "X-Embedding-Dtype": "float32-le",
+            "X-Usage-Prompt-Tokens": str(usage["prompt_tokens"]),
+        }
+    if encoding_format == "base64":
+        data = dict(data)
+        data["data"] = [
+            dict(
+                item,
+                embedding=base64.b64encode(
+                    np.ascontiguousarray(item["embedding"], dtype="<f4").data
+                ).decode(),
+            )
+            for item in data["data"]
+        ]
+    return encode(data, media_type), {}
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from aioprometheus import Counter, Gauge
+
+from ..core.utils import json_dumps
+
+# 响应的来源, 同时作为 X-Cache 响应头与指标标签
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_COALESCED = "coalesced"
+
+
+class ResponseCacheMetrics:
+    '''
+    响应缓存的监控指标, 注册在 aioprometheus 的默认 REGISTRY 中, 与 MetricsMiddleware 一同导出
+    '''
+
+    def __init__(self):
+        self.requests = Counter(
+            "xinference_response_cache_requests_total",
+            "Number of cacheable requests per model and result (hit, miss, coalesced).",
+        )
+        self.size = Gauge(
+            "xinference_response_cache_bytes",
+            "Approximate memory held by cached responses.",
+        )
+
+
+def request_key(kind: str, model_uid: str, *parts: Any) -> str:
+    '''
+    归一化请求的摘要: 字典按键排序后序列化, 字段顺序与空白不同的相同请求得到相同的键
+    '''
+    payload = orjson.dumps((kind, model_uid) + parts, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("model_uid", "value", "size", "expire_at")
+
+    def __init__(self, model_uid: str, value: Any, size: int, expire_at: float):
+        self.model_uid = model_uid
+        self.value = value
+        self.size = size
+        self.expire_at = expire_at
+
+
+class _Flight:
+    '''
+    正在进行的模型调用, started 在调用通过准入控制、真正开始时置位
+    '''
+
+    __slots__ = ("model_uid", "future", "started")
+
+    def __init__(self, model_uid: str):
+        self.model_uid = model_uid
+        self.future: Optional[asyncio.Future] = None
+        self.started = asyncio.Event()
+
+
+class ResponseCache:
+    '''
+    确定性请求 (temperature=0 的非流式补全与对话、embedding) 的响应缓存, 位于准入控制之前:
+        并发的相同请求合并为一次模型调用 (single-flight), 其余请求等待同一结果
+        调用成功的结果按 LRU 保存, 条目数与估计的内存均有上限, 超过 ttl 秒后失效
+    命中缓存与被合并的请求不占用准入名额, 缓存有效期内相同的请求不会再次到达 ModelActor
+    每个 API 进程各自维护缓存; 键中包含 Supervisor 为每次启动分配的 generation,
+    模型在其他 API 进程中被终止并以相同的 uid 重新启动后, 本进程不会返回旧模型的结果
+    '''
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        metrics: Optional[ResponseCacheMetrics] = None,
+    ):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._metrics = metrics
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[str, _Flight] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _record(self, model_uid: str, result: str):
+        if self._metrics is not None:
+            self._metrics.requests.inc({"model": model_uid, "result": result})
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expire_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def _put(self, key: str, model_uid: str, value: Any):
+        size = len(json_dumps(value))
+        if size > self._max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(
+            model_uid, value, size, time.monotonic() + self._ttl
+        )
+        self._size += size
+        while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+        if self._metrics is not None:
+            self._metrics.size.set({}, self._size)
+
+    def invalidate(self, model_uid: str):
+        '''
+        模型被终止时删除其全部缓存, 正在进行的调用的结果也不再写入缓存
+        '''
+        for key in [k for k, e in self._entries.items() if e.model_uid == model_uid]:
+            self._remove(key)
+        for key in [k for k, f in self._inflight.items() if f.model_uid == model_uid]:
+            del self._inflight[key]
+        if self._metrics is not None:
+            self._metrics.size.set({}, self._size)
+
+    def _on_done(self, key: str, flight: _Flight):
+        if self._inflight.get(key) is not flight:
+            # 调用期间模型被终止 (invalidate)
+            return
+        # 先写入缓存再移出 in-flight 表, 两者之间不会有相同的请求漏到模型
+        future = flight.future
+        if not future.cancelled() and future.exception() is None:
+            self._put(key, flight.model_uid, future.result())
+        del self._inflight[key]
+
+    @staticmethod
+    async def _wait_started(flight: _Flight, deadline: Optional[float]):
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        started = asyncio.ensure_future(flight.started.wait())
+        try:
+            done, _ = await asyncio.wait(
+                (started, flight.future),
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            started.cancel()
+        if not done:
+            raise asyncio.TimeoutError
+
+    async def get_or_compute(
+        self,
+        key: str,
+        model_uid: str,
+        compute: Callable[[Callable[[], None]], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        retry: Optional[Callable[[BaseException], bool]] = None,
+    ) -> Tuple[Any, str]:
+        '''
+        返回 (结果, 来源), 来源为 hit、miss 或 coalesced
+        模型调用 compute(on_start) 在独立的任务中执行, 调用通过准入控制后调用 on_start;
+        发起调用的请求被取消时, 等待同一结果的其他请求不受影响
+        被合并的请求按自己的 timeout 等待调用开始, 超时抛出 asyncio.TimeoutError
+        调用失败时, retry(异常) 为 True 的异常 (发起者按自己的优先级与截止时间被拒绝) 使等待者各自重新发起调用,
+        其余异常传给所有等待者, 结果不被缓存
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = self._get(key)
+            if entry is not None:
+                self._record(model_uid, CACHE_HIT)
+                return entry.value, CACHE_HIT
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _Flight(model_uid)
+                flight.future = asyncio.ensure_future(compute(flight.started.set))
+                flight.future.add_done_callback(
+                    lambda _, flight=flight: self._on_done(key, flight)
+                )
+                self._record(model_uid, CACHE_MISS)
+                return await asyncio.shield(flight.future), CACHE_MISS
+            try:
+                if not flight.started.is_set():
+                    await self._wait_started(flight, deadline)
+                value = await asyncio.shield(flight.future)
+            except Exception as e:
+                if flight.future.done() and retry is not None and retry(e):
+                    if self._inflight.get(key) is flight:
+                        del self._inflight[key]
+                    continue
+                raise
+            self._record(model_uid, CACHE_COALESCED)
+            return value, CACHE_COALESCED
@@ -1,15 +1,30 @@
 import asyncio
+import functools
 import inspect
 import json
 import logging
+import math
+import multiprocessing
 import os
 import pprint
+import socket
 import sys
 import warnings
-from typing import Optional, Any
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import xoscar as xo
 from aioprometheus import REGISTRY, MetricsMiddleware
+from aioprometheus.asgi.starlette import metrics
 from fastapi import (
     APIRouter,
     FastAPI,
@@ -24,16 +39,42 @@ from fastapi import (
     status,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 # from fastapi.staticfiles import StaticFiles
 from starlette.responses import JSONResponse as StarletteJSONResponse # starlette 是 fastAPI 的组件
+from starlette.background import BackgroundTask
 from starlette.responses import RedirectResponse
 from uvicorn import Config, Server
 from xoscar.utils import get_next_port
 
-from ..constants import XINFERENCE_DEFAULT_ENDPOINT_PORT
+from ..constants import (
+    XINFERENCE_ADMISSION_MAX_CONCURRENCY,
+    XINFERENCE_ADMISSION_MAX_QUEUE_SIZE,
+    XINFERENCE_DEFAULT_ENDPOINT_PORT,
+    XINFERENCE_RESPONSE_CACHE_MEMORY,
+    XINFERENCE_RESPONSE_CACHE_SIZE,
+    XINFERENCE_RESPONSE_CACHE_TTL,
+)
 from ..core.supervisor import SupervisorActor
 from ..core.utils import json_dumps
+from .admission import (
+    PRIORITY_INTERACTIVE,
+    AdmissionController,
+    AdmissionMetrics,
+    AdmissionRejected,
+    AdmissionTicket,
+)
+from .encoding import (
+    MEDIA_TYPE_JSON,
+    compress,
+    encode,
+    encode_embedding,
+    negotiate_content_encoding,
+    negotiate_media_type,
+)
+from .response_cache import ResponseCache, ResponseCacheMetrics, request_key
+from .routing import ReplicaLease, ReplicaRouter
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +87,118 @@ class JSONResponse(StarletteJSONResponse):  # type: ignore # noqa: F811
     def render(self, content: Any) -> bytes:
         return json_dumps(content)
 
+async def stream_events(
+    iterator, on_close: Optional[Callable[[], None]] = None
+) -> AsyncGenerator[bytes, None]:
+    '''
+    将 ModelActor 返回的异步生成器转换为 server-sent events
+    按需逐块从 ModelActor 拉取, 客户端消费慢时上游也随之暂停; 客户端断开时销毁远端生成器
+    '''
+    finished = False
+    try:
+        async for chunk in iterator:
+            yield b"data: " + json_dumps(chunk) + b"\n\n"
+        finished = True
+        yield b"data: [DONE]\n\n"
+    except Exception as e:
+        # 出错时 xoscar 已销毁远端生成器
+        finished = True
+        logger.error("Chat completion stream got an error: %s", e, exc_info=True)
+        yield b"data: " + json_dumps({"error": str(e)}) + b"\n\n"
+    finally:
+        try:
+            if not finished:
+                await asyncio.shield(iterator.destroy())
+        finally:
+            # 客户端断开时 destroy 会再次收到 CancelledError, on_close 仍需执行
+            if on_close is not None:
+                on_close()
+
+
+def event_stream_response(iterator, on_close: Callable[[], None]) -> StreamingResponse:
+    '''
+    以 SSE 返回 ModelActor 的异步生成器
+    客户端在生成器开始前断开时生成器的 finally 不会执行, 因此 on_close 同时作为 background 任务,
+    由 StreamingResponse 在响应结束 (包括客户端断开) 后执行, on_close 需可重复调用
+    '''
+
+    async def close():
+        # 同步函数会被 BackgroundTask 放入线程池执行, 这里保持在事件循环中释放
+        on_close()
+
+    return StreamingResponse(
+        stream_events(iterator, on_close=on_close),
+        media_type="text/event-stream",
+        background=BackgroundTask(close),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _check_route_annotations(routes: Tuple[Tuple[str, Callable], ...]) -> List:
+    '''
+    返回返回值类型不是 Response 的路由
+    结果按路由函数缓存, 同一进程重复 serve 以及 fork 出的 API 进程不再重复检查
+    '''
+    invalid_routes = []
+    try:
+        for path, endpoint in routes:
+            return_annotation = endpoint.__annotations__.get("return")
+            if not inspect.isclass(return_annotation) or not issubclass(
+                return_annotation, Response
+            ):
+                invalid_routes.append((path, endpoint, return_annotation))
+    except Exception:
+        pass  # In case that some Python version does not have __annotations__
+    return invalid_routes
+
+
+def _bind_socket(
+    host: str, port: int, reuse_port: bool, listen: bool = True
+) -> socket.socket:
+    '''
+    创建监听 socket, reuse_port 为 True 时多个进程可绑定同一端口, 由内核在进程间分发连接
+    只 bind 不 listen 的 socket 不会被分配连接, 可用于预先检查端口
+    '''
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        if listen:
+            sock.listen(2048)
+    except OSError:
+        sock.close()
+        raise
+    sock.set_inheritable(True)
+    return sock
+
+
+class CreateCompletionRequest(BaseModel):
+    model: str
+    prompt: str
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    temperature: Optional[float] = Field(default=None, ge=0.0)
+    stop: Optional[Union[str, List[str]]] = None
+    stream: bool = False
+
+
+class CreateChatCompletionRequest(BaseModel):
+    model: str
+    messages: List[Dict[str, str]]
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    temperature: Optional[float] = Field(default=None, ge=0.0)
+    stop: Optional[Union[str, List[str]]] = None
+    stream: bool = False
+
+
+class CreateEmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+    encoding_format: Literal["float", "base64"] = "float"
+
+
 class RESTfulAPI:
     '''
     创建并管理 FastAPI 和 APIRouter 对象
@@ -58,12 +211,19 @@ class RESTfulAPI:
         host: str,
         port: int,
         auth_config_file: Optional[str] = None,
+        api_workers: int = 1,
     ):
         super().__init__()
         self._supervisor_address = supervisor_address
         self._host = host
         self._port = port
+        self._api_workers = api_workers
+        # 每个 API 进程各自缓存 Supervisor 引用, fork 出的进程从 None 开始重新建立连接
         self._supervisor_ref = None
+        self._router_replicas = ReplicaRouter()
+        self._admission: Dict[str, AdmissionController] = {}
+        self._admission_metrics: Optional[AdmissionMetrics] = None
+        self._response_cache: Optional[ResponseCache] = None
         # self._auth_config: AuthStartupConfig = self.init_auth_config(auth_config_file)
         self._auth_config = True
         self._router = APIRouter()
@@ -80,6 +240,69 @@ class RESTfulAPI:
         return self._supervisor_ref
 
     def serve(self, logging_conf: Optional[dict] = None):
+        self._build_app()
+        config = Config(
+            app=self._app, host=self._host, port=self._port, log_config=logging_conf
+        )
+        if self._api_workers <= 1:
+            server = Server(config)
+            server.run()
+        else:
+            self._serve_workers(config)
+
+    def _serve_workers(self, config: Config):
+        '''
+        在 api_workers 个 fork 出的进程中运行同一个 app
+        支持 SO_REUSEPORT 时每个进程绑定自己的 socket, 由内核均衡分发连接;
+        否则由主进程绑定 socket 并由各进程共享 accept
+        '''
+        reuse_port = hasattr(socket, "SO_REUSEPORT")
+        try:
+            # 主进程先绑定端口, 端口被占用时与单进程模式一样以 SystemExit 退出
+            sock = _bind_socket(
+                self._host, self._port, reuse_port, listen=not reuse_port
+            )
+        except OSError as e:
+            logger.error(str(e))
+            raise SystemExit(1)
+
+        ctx = multiprocessing.get_context("fork")
+        processes = [
+            ctx.Process(
+                target=self._serve_in_process,
+                args=(config, sock, reuse_port),
+                name=f"xinference-api-{i}",
+            )
+            for i in range(self._api_workers)
+        ]
+        for p in processes:
+            p.start()
+        # 端口由子进程中的 socket 继续监听
+        sock.close()
+        logger.info(
+            f"Started {len(processes)} API processes: {[p.pid for p in processes]}"
+        )
+        try:
+            for p in processes:
+                p.join()
+        finally:
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+            for p in processes:
+                p.join()
+
+    def _serve_in_process(
+        self, config: Config, sock: socket.socket, reuse_port: bool
+    ):
+        if reuse_port:
+            # 主进程的 socket 只用于检查端口, 每个进程绑定并监听自己的 socket
+            sock.close()
+            sock = _bind_socket(self._host, self._port, reuse_port=True)
+        server = Server(config)
+        server.run(sockets=[sock])
+
+    def _build_app(self):
         self._app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -100,30 +323,55 @@ class RESTfulAPI:
         self._router.add_api_route(
             "/v1/cluster/devices", self._get_devices_count, methods=["GET"]
         )
+        self._router.add_api_route(
+            "/v1/cluster/history", self._get_resource_history, methods=["GET"]
+        )
         self._router.add_api_route("/v1/address", self.get_address, methods=["GET"])
 
+        # running instances
+        self._router.add_api_route("/v1/models", self.list_models, methods=["GET"])
+        self._router.add_api_route(
+            "/v1/models/{model_uid}", self.describe_model, methods=["GET"]
+        )
+        self._router.add_api_route("/v1/models", self.launch_model, methods=["POST"])
+        self._router.add_api_route(
+            "/v1/models/{model_uid}", self.terminate_model, methods=["DELETE"]
+        )
+        self._router.add_api_route(
+            "/v1/completions", self.create_completion, methods=["POST"]
+        )
+        self._router.add_api_route(
+            "/v1/chat/completions", self.create_chat_completion, methods=["POST"]
+        )
+        self._router.add_api_route(
+            "/v1/embeddings", self.create_embedding, methods=["POST"]
+        )
+
         # Clear the global Registry for the MetricsMiddleware, or
         # the MetricsMiddleware will register duplicated metrics if the port
         # conflict (This serve method run more than once).
         REGISTRY.clear()
+        self._admission.clear()
+        self._admission_metrics = AdmissionMetrics()
+        self._response_cache = ResponseCache(
+            max_entries=XINFERENCE_RESPONSE_CACHE_SIZE,
+            max_bytes=int(XINFERENCE_RESPONSE_CACHE_MEMORY * 2**20),
+            ttl=XINFERENCE_RESPONSE_CACHE_TTL,
+            metrics=ResponseCacheMetrics(),
+        )
         self._app.add_middleware(MetricsMiddleware)
+        self._router.add_api_route("/metrics", metrics, methods=["GET"])
         self._app.include_router(self._router)
 
         # 检查路由返回的 Response 类型是否合法.
         # This is to avoid `jsonable_encoder` performance issue:
         # https://github.com/xorbitsai/inference/issues/647
-        invalid_routes = []
-        try:
-            for router in self._router.routes:
-                return_annotation = router.endpoint.__annotations__.get("return")
-                if not inspect.isclass(return_annotation) or not issubclass(
-                    return_annotation, Response
-                ):
-                    invalid_routes.append(
-                        (router.path, router.endpoint, return_annotation)
-                    )
-        except Exception:
-            pass  # In case that some Python version does not have __annotations__
+        invalid_routes = _check_route_annotations(
+            tuple(
+                (route.path, getattr(route.endpoint, "__func__", route.endpoint))
+                for route in self._router.routes
+            )
+        )
         if invalid_routes:
             raise Exception(
                 f"The return value type of the following routes is not Response:\n"
@@ -168,12 +416,6 @@ class RESTfulAPI:
         #     """
         #     )
 
-        config = Config(
-            app=self._app, host=self._host, port=self._port, log_config=logging_conf
-        )
-        server = Server(config)
-        server.run()
-
     async def _get_builtin_prompts(self) -> JSONResponse:
         """
         For internal usage: /v1/models/prompts
@@ -210,6 +452,32 @@ class RESTfulAPI:
             logger.error(e, exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
 
+    async def _get_resource_history(
+        self,
+        window: float = Query(300.0, description="seconds"),
+        worker: Optional[str] = Query(None),
+        metrics: Optional[str] = Query(None, description="comma separated"),
+        percentiles: Optional[str] = Query(None, description="comma separated"),
+    ) -> JSONResponse:
+        """
+        For internal usage: /v1/cluster/history
+        返回最近 window 秒内 worker 资源指标 (model_count、cpu.usage、cpu.memory_available 等) 的统计
+        """
+        try:
+            data = await (await self._get_supervisor_ref()).get_resource_history(
+                window,
+                worker,
+                metrics.split(",") if metrics else None,
+                [float(p) for p in percentiles.split(",")] if percentiles else None,
+            )
+            return JSONResponse(content=data)
+        except ValueError as ve:
+            logger.error(str(ve), exc_info=True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
     async def get_status(self) -> JSONResponse:
         """
         返回 worker 状态
@@ -223,13 +491,430 @@ class RESTfulAPI:
         
     async def get_address(self) -> JSONResponse:
         return JSONResponse(content=self._supervisor_address)
-        
+
+    async def list_models(self) -> JSONResponse:
+        try:
+            data = await (await self._get_supervisor_ref()).list_models()
+            return JSONResponse(content=data)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def describe_model(self, model_uid: str) -> JSONResponse:
+        try:
+            data = await (await self._get_supervisor_ref()).describe_model(model_uid)
+            return JSONResponse(content=data)
+        except ValueError as ve:
+            logger.error(str(ve), exc_info=True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def launch_model(self, request: Request) -> JSONResponse:
+        """
+        启动模型: {"model_uid": 可选, "model_name": 必填, "model_type": 默认 LLM, ...}
+        """
+        payload = await request.json()
+        model_uid = payload.pop("model_uid", None)
+        model_name = payload.pop("model_name", None)
+        model_type = payload.pop("model_type", "LLM")
+        if model_name is None:
+            raise HTTPException(
+                status_code=400, detail="Invalid input. Please specify the model name"
+            )
+
+        try:
+            model_uid = await (await self._get_supervisor_ref()).launch_builtin_model(
+                model_uid=model_uid,
+                model_name=model_name,
+                model_type=model_type,
+                **payload,
+            )
+        except ValueError as ve:
+            logger.error(str(ve), exc_info=True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except RuntimeError as re:
+            logger.error(str(re), exc_info=True)
+            raise HTTPException(status_code=503, detail=str(re))
+        except Exception as e:
+            logger.error(str(e), exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+        return JSONResponse(content={"model_uid": model_uid})
+
+    async def terminate_model(self, model_uid: str) -> JSONResponse:
+        if self._response_cache is not None:
+            self._response_cache.invalidate(model_uid)
+        self._router_replicas.invalidate(model_uid)
+        self._drop_admission(model_uid)
+        try:
+            await (await self._get_supervisor_ref()).terminate_model(model_uid)
+        except ValueError as ve:
+            logger.error(str(ve), exc_info=True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+        return JSONResponse(content=None)
+
+    async def _get_model_replicas(self, model_uid: str):
+        return await (await self._get_supervisor_ref()).get_model_replicas(model_uid)
+
+    async def _route_model(self, model_uid: str, route: Callable[..., Any]) -> Any:
+        try:
+            return await route(model_uid, self._get_model_replicas)
+        except ValueError as ve:
+            # 模型不存在 (可能已由其他 API 进程终止), 同时删除本进程的准入控制
+            self._drop_admission(model_uid)
+            logger.error(str(ve), exc_info=True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _acquire_model(self, model_uid: str) -> ReplicaLease:
+        '''
+        按各副本未完成的请求数选择一个副本
+        '''
+        return await self._route_model(model_uid, self._router_replicas.acquire)
+
+    def _drop_admission(self, model_uid: str):
+        controller = self._admission.pop(model_uid, None)
+        if controller is not None:
+            controller.close()
+
+    async def _get_admission(self, model_uid: str) -> AdmissionController:
+        controller = self._admission.get(model_uid)
+        if controller is not None:
+            return controller
+        # 先确认模型存在, 避免为任意 model 字符串创建准入控制与监控指标
+        await self._route_model(model_uid, self._router_replicas.get_replicas)
+        controller = self._admission.get(model_uid)
+        if controller is None:
+            # 每个 API 进程独立做准入控制, 按进程数均分上限
+            controller = self._admission[model_uid] = AdmissionController(
+                model_uid,
+                max_concurrency=math.ceil(
+                    XINFERENCE_ADMISSION_MAX_CONCURRENCY / self._api_workers
+                ),
+                max_queue_size=math.ceil(
+                    XINFERENCE_ADMISSION_MAX_QUEUE_SIZE / self._api_workers
+                ),
+                metrics=self._admission_metrics,
+            )
+        return controller
+
+    async def _admit(self, model_uid: str, request: Request) -> AdmissionTicket:
+        """
+        准入控制: 请求头 X-Priority 指定优先级 (interactive/batch), X-Request-Timeout 指定截止时间 (秒)
+        过载时返回 429/503 并附带 Retry-After
+        """
+        priority = request.headers.get("X-Priority", PRIORITY_INTERACTIVE).lower()
+        timeout = self._request_timeout(request)
+        controller = await self._get_admission(model_uid)
+        try:
+            return await controller.acquire(priority, timeout)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        except AdmissionRejected as ar:
+            raise HTTPException(
+                status_code=ar.status_code,
+                detail=ar.detail,
+                headers={"Retry-After": str(ar.retry_after)},
+            ) from ar
+
+    @staticmethod
+    def _request_timeout(request: Request) -> Optional[float]:
+        timeout = request.headers.get("X-Request-Timeout")
+        if timeout is None:
+            return None
+        try:
+            return float(timeout)
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid X-Request-Timeout: {timeout}"
+            )
+
+    @staticmethod
+    def _is_admission_rejected(e: BaseException) -> bool:
+        return isinstance(e, HTTPException) and isinstance(
+            e.__cause__, AdmissionRejected
+        )
+
+    async def _acquire(
+        self, model_uid: str, request: Request
+    ) -> Tuple[AdmissionTicket, ReplicaLease]:
+        ticket = await self._admit(model_uid, request)
+        try:
+            lease = await self._acquire_model(model_uid)
+        except BaseException:
+            ticket.release()
+            raise
+        return ticket, lease
+
+    @staticmethod
+    def _encoded_response(
+        request: Request,
+        content: Any = None,
+        media_type: str = MEDIA_TYPE_JSON,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        """
+        按请求头 Accept-Encoding 压缩响应; body 为空时按 media_type 编码 content
+        """
+        if body is None:
+            body = encode(content, media_type)
+        body, content_encoding = compress(
+            body, negotiate_content_encoding(request.headers.get("Accept-Encoding"))
+        )
+        headers = dict(headers or {})
+        headers["Vary"] = "Accept, Accept-Encoding"
+        if content_encoding is not None:
+            headers["Content-Encoding"] = content_encoding
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    async def _response_cache_key(
+        self, request: Request, kind: str, model_uid: str, *parts: Any
+    ) -> Optional[str]:
+        """
+        返回可缓存请求的键; 缓存未启用或请求头 Cache-Control 包含 no-cache/no-store 时返回 None
+        键中包含模型的 generation (随副本列表缓存在本进程), 以相同 uid 重新启动的模型不会命中旧的结果
+        """
+        if self._response_cache is None or not self._response_cache.enabled:
+            return None
+        cache_control = request.headers.get("Cache-Control", "").lower()
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return None
+        generation, _ = await self._route_model(
+            model_uid, self._router_replicas.get_replicas
+        )
+        return request_key(kind, model_uid, generation, *parts)
+
+    async def _call_model(
+        self,
+        model_uid: str,
+        request: Request,
+        call: Callable[[Any], Any],
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """
+        经过准入控制与副本路由后调用模型, 调用结束即归还名额与副本
+        on_start 在通过准入控制、开始调用模型时调用
+        """
+        ticket, lease = await self._acquire(model_uid, request)
+        if on_start is not None:
+            on_start()
+        try:
+            return await call(lease.model)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            self._router_replicas.invalidate(model_uid)
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            lease.release()
+            ticket.release()
+
+    async def _call_model_cached(
+        self,
+        model_uid: str,
+        request: Request,
+        key: Optional[str],
+        call: Callable[[Any], Any],
+    ) -> Tuple[Any, Dict[str, str]]:
+        """
+        返回 (模型调用结果, 额外的响应头)
+        key 不为 None 时先查响应缓存, 并发的相同请求合并为一次调用; 命中的请求不经过准入控制
+        被合并的请求按自己的 X-Request-Timeout 等待调用开始; 发起调用的请求被准入控制拒绝时,
+        被合并的请求按自己的 X-Priority 与 X-Request-Timeout 重新申请, 不继承发起者的 429/503
+        """
+        if key is None:
+            return await self._call_model(model_uid, request, call), {}
+        timeout = self._request_timeout(request)
+        try:
+            data, source = await self._response_cache.get_or_compute(
+                key,
+                model_uid,
+                lambda on_start: self._call_model(model_uid, request, call, on_start),
+                timeout=timeout,
+                retry=self._is_admission_rejected,
+            )
+        except asyncio.TimeoutError:
+            controller = self._admission.get(model_uid)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Request to model {model_uid} waited longer than "
+                f"its deadline of {timeout:g} s",
+                headers={
+                    "Retry-After": str(
+                        controller.retry_after if controller is not None else 1
+                    )
+                },
+            )
+        return data, {"X-Cache": source}
+
+    @staticmethod
+    def _normalize_stop(generate_config: Dict) -> Dict:
+        stop = generate_config.get("stop")
+        if isinstance(stop, str):
+            stop = [stop]
+        if stop is not None:
+            generate_config = dict(generate_config, stop=sorted(set(stop)))
+        return generate_config
+
+    async def create_completion(
+        self, body: CreateCompletionRequest, request: Request
+    ) -> Response:
+        """
+        /v1/completions, OpenAI 兼容的文本补全接口, stream=true 时以 SSE 流式返回
+        temperature=0 的非流式请求结果是确定的, 经过响应缓存
+        """
+        generate_config = body.model_dump(exclude={"model", "prompt"})
+        if not body.stream:
+            key = None
+            if body.temperature == 0:
+                key = await self._response_cache_key(
+                    request,
+                    "completion",
+                    body.model,
+                    body.prompt,
+                    self._normalize_stop(generate_config),
+                )
+            data, headers = await self._call_model_cached(
+                body.model,
+                request,
+                key,
+                lambda model: model.generate(body.prompt, generate_config),
+            )
+            return self._encoded_response(
+                request,
+                data,
+                negotiate_media_type(request.headers.get("Accept")),
+                headers=headers,
+            )
+
+        ticket, lease = await self._acquire(body.model, request)
+        try:
+            data = await lease.model.generate(body.prompt, generate_config)
+            return event_stream_response(
+                data, lambda: (lease.release(), ticket.release())
+            )
+        except asyncio.CancelledError:
+            lease.release()
+            ticket.release()
+            raise
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            self._router_replicas.invalidate(body.model)
+            lease.release()
+            ticket.release()
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def create_chat_completion(
+        self, body: CreateChatCompletionRequest, request: Request
+    ) -> Response:
+        """
+        /v1/chat/completions, OpenAI 兼容的对话接口, stream=true 时以 SSE 流式返回
+        最后一条 user 消息作为本轮输入, system 消息作为系统提示词, 其余作为对话历史
+        temperature=0 的非流式请求结果是确定的, 经过响应缓存
+        """
+        messages = list(body.messages)
+        system_prompt = None
+        if messages and messages[0].get("role") == "system":
+            system_prompt = messages.pop(0).get("content")
+        if not messages or messages[-1].get("role") != "user":
+            raise HTTPException(
+                status_code=400, detail="Invalid input. The last message must be from user"
+            )
+        prompt = messages[-1].get("content", "")
+        chat_history = messages[:-1]
+
+        generate_config = body.model_dump(exclude={"model", "messages"})
+        if not body.stream:
+            key = None
+            if body.temperature == 0:
+                key = await self._response_cache_key(
+                    request,
+                    "chat",
+                    body.model,
+                    body.messages,
+                    self._normalize_stop(generate_config),
+                )
+            data, headers = await self._call_model_cached(
+                body.model,
+                request,
+                key,
+                lambda model: model.chat(
+                    prompt, system_prompt, chat_history, generate_config
+                ),
+            )
+            return self._encoded_response(
+                request,
+                data,
+                negotiate_media_type(request.headers.get("Accept")),
+                headers=headers,
+            )
+
+        ticket, lease = await self._acquire(body.model, request)
+        try:
+            data = await lease.model.chat(
+                prompt, system_prompt, chat_history, generate_config
+            )
+            return event_stream_response(
+                data, lambda: (lease.release(), ticket.release())
+            )
+        except asyncio.CancelledError:
+            lease.release()
+            ticket.release()
+            raise
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            self._router_replicas.invalidate(body.model)
+            lease.release()
+            ticket.release()
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def create_embedding(
+        self, body: CreateEmbeddingRequest, request: Request
+    ) -> Response:
+        """
+        /v1/embeddings, OpenAI 兼容的 embedding 接口
+        同一模型的并发请求在 ModelActor 中被合并为 batch 计算, 相同的输入经过响应缓存
+        按 Accept 返回 JSON、msgpack 或原始小端 float32 (application/octet-stream)
+        """
+        if not body.input:
+            raise HTTPException(
+                status_code=400, detail="Invalid input. The input must not be empty"
+            )
+        texts = [body.input] if isinstance(body.input, str) else body.input
+        key = await self._response_cache_key(request, "embedding", body.model, texts)
+        data, cache_headers = await self._call_model_cached(
+            body.model,
+            request,
+            key,
+            lambda model: model.create_embedding(texts),
+        )
+        try:
+            media_type = negotiate_media_type(request.headers.get("Accept"), binary=True)
+            content, headers = encode_embedding(data, media_type, body.encoding_format)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+        return self._encoded_response(
+            request,
+            media_type=media_type,
+            body=content,
+            headers=dict(headers, **cache_headers),
+        )
+
 def run(
     supervisor_address: str,
     host: str,
     port: int,
     logging_conf: Optional[dict] = None,
     auth_config_file: Optional[str] = None,
+    api_workers: int = 1,
 ):
     logger.info(f"Starting Xinference at endpoint: http://{host}:{port}")
     try:
@@ -238,6 +923,7 @@ def run(
             host=host,
             port=port,
             auth_config_file=auth_config_file,
+            api_workers=api_workers,
         )
         api.serve(logging_conf=logging_conf)
     except SystemExit:
@@ -253,6 +939,7 @@ def run(
                 host=host,
                 port=port,
                 auth_config_file=auth_config_file,
+                api_workers=api_workers,
             )
             api.serve(logging_conf=logging_conf)
         else:
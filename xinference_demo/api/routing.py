@@ -0,0 +1,95 @@
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 缓存的副本列表的有效期, 超时后重新从 Supervisor 获取, 以感知扩容与故障转移
+DEFAULT_REPLICA_REFRESH_INTERVAL = 10.0
+
+# 按 model_uid 从 Supervisor 获取 (generation, 副本引用列表)
+FetchReplicas = Callable[[str], Awaitable[Tuple[int, List[Any]]]]
+
+
+class ReplicaLease:
+    '''
+    一次请求占用的副本, 请求结束 (包括流式响应结束) 后调用 release 归还
+    '''
+
+    __slots__ = ("model", "_counts", "_key", "_released")
+
+    def __init__(self, model: Any, counts: Dict[Tuple[str, str], int], key):
+        self.model = model
+        self._counts = counts
+        self._key = key
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        count = self._counts.get(self._key, 0) - 1
+        if count > 0:
+            self._counts[self._key] = count
+        else:
+            self._counts.pop(self._key, None)
+
+
+class ReplicaRouter:
+    '''
+    RESTful API 进程内的副本路由
+    缓存每个模型的副本引用, 记录本进程发往每个副本的未完成请求数,
+    以 power-of-two-choices 选择副本: 随机取两个副本, 选择未完成请求较少的一个
+    客户端只需使用 model_uid, 副本扩缩容对其透明
+    '''
+
+    def __init__(
+        self,
+        refresh_interval: float = DEFAULT_REPLICA_REFRESH_INTERVAL,
+        rng: Optional[random.Random] = None,
+    ):
+        self._refresh_interval = refresh_interval
+        self._rng = rng or random.Random()
+        # model_uid -> (获取时间, generation, 副本引用列表)
+        self._replicas: Dict[str, Tuple[float, int, List[Any]]] = {}
+        self._outstanding: Dict[Tuple[str, str], int] = {}
+
+    @staticmethod
+    def _key(ref: Any) -> Tuple[str, str]:
+        return ref.address, ref.uid
+
+    def invalidate(self, model_uid: str):
+        '''
+        副本调用失败 (例如副本被终止或迁移) 时清除缓存, 下次请求重新获取
+        '''
+        self._replicas.pop(model_uid, None)
+
+    async def get_replicas(
+        self, model_uid: str, fetch_replicas: FetchReplicas
+    ) -> Tuple[int, List[Any]]:
+        '''
+        返回模型的 (generation, 副本引用), 缓存过期时重新获取; 模型不存在时 fetch_replicas 抛出 ValueError
+        '''
+        cached = self._replicas.get(model_uid)
+        now = time.monotonic()
+        if cached is None or now - cached[0] > self._refresh_interval:
+            generation, replicas = await fetch_replicas(model_uid)
+            cached = self._replicas[model_uid] = (now, generation, list(replicas))
+        return cached[1], cached[2]
+
+    async def acquire(
+        self, model_uid: str, fetch_replicas: FetchReplicas
+    ) -> ReplicaLease:
+        _, replicas = await self.get_replicas(model_uid, fetch_replicas)
+
+        if len(replicas) == 1:
+            chosen = replicas[0]
+        else:
+            a, b = self._rng.sample(replicas, 2)
+            chosen = (
+                a
+                if self._outstanding.get(self._key(a), 0)
+                <= self._outstanding.get(self._key(b), 0)
+                else b
+            )
+        key = self._key(chosen)
+        self._outstanding[key] = self._outstanding.get(key, 0) + 1
+        return ReplicaLease(chosen, self._outstanding, key)
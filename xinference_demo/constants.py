@@ -4,9 +4,24 @@ from pathlib import Path
 # XINFERENCE_ENV_ENDPOINT = "XINFERENCE_ENDPOINT"
 # XINFERENCE_ENV_MODEL_SRC = "XINFERENCE_MODEL_SRC"
 XINFERENCE_ENV_HOME_PATH = "XINFERENCE_HOME"
-# XINFERENCE_ENV_HEALTH_CHECK_ATTEMPTS = "XINFERENCE_HEALTH_CHECK_ATTEMPTS"
-# XINFERENCE_ENV_HEALTH_CHECK_INTERVAL = "XINFERENCE_HEALTH_CHECK_INTERVAL"
+XINFERENCE_ENV_HEALTH_CHECK_ATTEMPTS = "XINFERENCE_HEALTH_CHECK_ATTEMPTS"
+XINFERENCE_ENV_HEALTH_CHECK_INTERVAL = "XINFERENCE_HEALTH_CHECK_INTERVAL"
 # XINFERENCE_ENV_DISABLE_VLLM = "XINFERENCE_DISABLE_VLLM"
+XINFERENCE_ENV_PLACEMENT_POLICY = "XINFERENCE_PLACEMENT_POLICY"
+XINFERENCE_ENV_MODEL_ACTOR_AUTO_RECOVER_LIMIT = "XINFERENCE_MODEL_ACTOR_AUTO_RECOVER_LIMIT"
+XINFERENCE_ENV_PREWARM_SUB_POOLS = "XINFERENCE_PREWARM_SUB_POOLS"
+XINFERENCE_ENV_CACHE_QUOTA = "XINFERENCE_CACHE_QUOTA"
+XINFERENCE_ENV_MODEL_IDLE_TTL = "XINFERENCE_MODEL_IDLE_TTL"
+XINFERENCE_ENV_MODEL_MEMORY_BUDGET_RATIO = "XINFERENCE_MODEL_MEMORY_BUDGET_RATIO"
+XINFERENCE_ENV_PREFIX_CACHE_SIZE = "XINFERENCE_PREFIX_CACHE_SIZE"
+XINFERENCE_ENV_MODEL_CPU_CORES = "XINFERENCE_MODEL_CPU_CORES"
+XINFERENCE_ENV_RESPONSE_CACHE_SIZE = "XINFERENCE_RESPONSE_CACHE_SIZE"
+XINFERENCE_ENV_RESPONSE_CACHE_MEMORY = "XINFERENCE_RESPONSE_CACHE_MEMORY"
+XINFERENCE_ENV_RESPONSE_CACHE_TTL = "XINFERENCE_RESPONSE_CACHE_TTL"
+XINFERENCE_ENV_RESOURCE_HISTORY_INTERVAL = "XINFERENCE_RESOURCE_HISTORY_INTERVAL"
+XINFERENCE_ENV_RESOURCE_HISTORY_SIZE = "XINFERENCE_RESOURCE_HISTORY_SIZE"
+XINFERENCE_ENV_ADMISSION_MAX_CONCURRENCY = "XINFERENCE_ADMISSION_MAX_CONCURRENCY"
+XINFERENCE_ENV_ADMISSION_MAX_QUEUE_SIZE = "XINFERENCE_ADMISSION_MAX_QUEUE_SIZE"
 
 
 def get_xinference_home() -> str:
@@ -22,6 +37,8 @@ def get_xinference_home() -> str:
 
 XINFERENCE_HOME = get_xinference_home()
 XINFERENCE_CACHE_DIR = os.path.join(XINFERENCE_HOME, "cache")
+# 缓存目录的磁盘配额 (GiB), 超出时按 LRU 淘汰, 0 表示不限制
+XINFERENCE_CACHE_QUOTA = int(float(os.environ.get(XINFERENCE_ENV_CACHE_QUOTA, 20)) * 2**30)
 # XINFERENCE_MODEL_DIR = os.path.join(XINFERENCE_HOME, "model")
 # XINFERENCE_LOG_DIR = os.path.join(XINFERENCE_HOME, "logs")
 # XINFERENCE_IMAGE_DIR = os.path.join(XINFERENCE_HOME, "image")
@@ -33,10 +50,55 @@ XINFERENCE_DEFAULT_ENDPOINT_PORT = 8080
 # XINFERENCE_DEFAULT_LOG_FILE_NAME = "xinference.log"
 XINFERENCE_LOG_MAX_BYTES = 100 * 1024 * 1024
 XINFERENCE_LOG_BACKUP_COUNT = 30
-# XINFERENCE_HEALTH_CHECK_ATTEMPTS = int(
-#     os.environ.get(XINFERENCE_ENV_HEALTH_CHECK_ATTEMPTS, 3)
-# )
-# XINFERENCE_HEALTH_CHECK_INTERVAL = int(
-#     os.environ.get(XINFERENCE_ENV_HEALTH_CHECK_INTERVAL, 3)
-# )
+# Supervisor 在 Worker 连续错过多少次心跳后将其驱逐, 并把其上的模型副本迁移到其他 Worker
+XINFERENCE_HEALTH_CHECK_ATTEMPTS = int(
+    os.environ.get(XINFERENCE_ENV_HEALTH_CHECK_ATTEMPTS, 3)
+)
+# Supervisor 检查 Worker 心跳的周期 (秒)
+XINFERENCE_HEALTH_CHECK_INTERVAL = float(
+    os.environ.get(XINFERENCE_ENV_HEALTH_CHECK_INTERVAL, 3)
+)
 # XINFERENCE_DISABLE_VLLM = bool(int(os.environ.get(XINFERENCE_ENV_DISABLE_VLLM, 0)))
+# Supervisor 记录 Worker 资源历史的采样周期 (秒) 与每个 Worker 保留的采样数, 默认保留最近 1 小时
+XINFERENCE_RESOURCE_HISTORY_INTERVAL = float(
+    os.environ.get(XINFERENCE_ENV_RESOURCE_HISTORY_INTERVAL, 5)
+)
+XINFERENCE_RESOURCE_HISTORY_SIZE = int(
+    os.environ.get(XINFERENCE_ENV_RESOURCE_HISTORY_SIZE, 720)
+)
+
+# 模型放置策略: spread (分散到剩余资源最多的节点) 或 pack (填满一个节点再使用下一个)
+XINFERENCE_PLACEMENT_POLICY = os.environ.get(XINFERENCE_ENV_PLACEMENT_POLICY, "spread")
+# 每个模型同时进入模型的请求数上限, 以及超出上限后允许排队的请求数上限
+XINFERENCE_ADMISSION_MAX_CONCURRENCY = int(
+    os.environ.get(XINFERENCE_ENV_ADMISSION_MAX_CONCURRENCY, 64)
+)
+XINFERENCE_ADMISSION_MAX_QUEUE_SIZE = int(
+    os.environ.get(XINFERENCE_ENV_ADMISSION_MAX_QUEUE_SIZE, 256)
+)
+# 每个 API 进程缓存的确定性请求响应的条目数上限 (0 表示不缓存)、内存上限 (MiB) 与有效期 (秒)
+XINFERENCE_RESPONSE_CACHE_SIZE = int(
+    os.environ.get(XINFERENCE_ENV_RESPONSE_CACHE_SIZE, 1024)
+)
+XINFERENCE_RESPONSE_CACHE_MEMORY = float(
+    os.environ.get(XINFERENCE_ENV_RESPONSE_CACHE_MEMORY, 256)
+)
+XINFERENCE_RESPONSE_CACHE_TTL = float(
+    os.environ.get(XINFERENCE_ENV_RESPONSE_CACHE_TTL, 600)
+)
+# 模型子进程崩溃后自动恢复的次数上限
+XINFERENCE_MODEL_ACTOR_AUTO_RECOVER_LIMIT = int(
+    os.environ.get(XINFERENCE_ENV_MODEL_ACTOR_AUTO_RECOVER_LIMIT, 3)
+)
+# 每个 Worker 预先启动的空闲子进程数, 模型启动时直接使用, 0 表示不预热
+XINFERENCE_PREWARM_SUB_POOLS = int(os.environ.get(XINFERENCE_ENV_PREWARM_SUB_POOLS, 1))
+# 模型空闲超过该时间 (秒) 后卸载, 下次请求时重新加载, 0 表示不卸载; 启动模型时可用 idle_ttl 覆盖
+XINFERENCE_MODEL_IDLE_TTL = float(os.environ.get(XINFERENCE_ENV_MODEL_IDLE_TTL, 1800))
+# 每个 Worker 上驻留模型的内存预算占节点总内存的比例, 超出时按 LRU 卸载空闲模型
+XINFERENCE_MODEL_MEMORY_BUDGET_RATIO = float(
+    os.environ.get(XINFERENCE_ENV_MODEL_MEMORY_BUDGET_RATIO, 0.8)
+)
+# 每个 LLM 模型前缀 K/V 缓存的内存上限 (MiB), 0 表示不缓存; 启动模型时可用 prefix_cache_size 覆盖
+XINFERENCE_PREFIX_CACHE_SIZE = float(os.environ.get(XINFERENCE_ENV_PREFIX_CACHE_SIZE, 64))
+# 每个模型子进程独占的 CPU 核数, 按 NUMA 节点分配并绑定, 0 表示不绑定 (与其他模型共享所有核); 启动模型时可用 n_cpu 覆盖
+XINFERENCE_MODEL_CPU_CORES = int(os.environ.get(XINFERENCE_ENV_MODEL_CPU_CORES, 0))
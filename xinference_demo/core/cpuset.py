@@ -0,0 +1,136 @@
+import logging
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .resource import get_numa_topology
+
+logger = logging.getLogger(__name__)
+
+# OpenMP 与常见 BLAS 实现读取的线程数环境变量
+THREAD_COUNT_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+def affinity_supported() -> bool:
+    return hasattr(os, "sched_setaffinity") and hasattr(os, "sched_getaffinity")
+
+
+class CpuSetAllocator:
+    '''
+    Worker 所在节点的 CPU 核分配, 与 _gpu_to_model_uid 管理 GPU 的方式相同, 用 _core_to_model_uid 记录每个核的占用
+    可分配的核为 Worker 进程自身的 CPU 亲和性 (容器的 cpuset), 按 NUMA 节点分组:
+        优先放在同一个 NUMA 节点内, 选择空闲核足够且最少的节点 (best fit), 为之后的大模型保留完整的节点
+        单个节点放不下时跨节点分配, 从空闲核最多的节点开始取, 尽量减少跨越的节点数
+    '''
+
+    def __init__(
+        self,
+        cores: Optional[Iterable[int]] = None,
+        numa_nodes: Optional[Dict[int, List[int]]] = None,
+    ):
+        if cores is None:
+            cores = (
+                os.sched_getaffinity(0)
+                if affinity_supported()
+                else range(os.cpu_count() or 1)
+            )
+        cores = sorted(cores)
+        if numa_nodes is None:
+            numa_nodes = get_numa_topology()
+        self._core_to_node: Dict[int, int] = {}
+        for node, node_cores in numa_nodes.items():
+            for core in node_cores:
+                self._core_to_node[core] = node
+        # 没有 NUMA 信息的核视为节点 0
+        self._core_to_node = {core: self._core_to_node.get(core, 0) for core in cores}
+        self._core_to_model_uid: Dict[int, str] = {}
+        self._model_uid_to_cores: Dict[str, List[int]] = {}
+
+    @property
+    def total(self) -> int:
+        return len(self._core_to_node)
+
+    def free_cores(self) -> List[int]:
+        return [c for c in self._core_to_node if c not in self._core_to_model_uid]
+
+    def get_cores(self, model_uid: str) -> Optional[List[int]]:
+        return self._model_uid_to_cores.get(model_uid)
+
+    def allocate(self, model_uid: str, n_cores: int) -> List[int]:
+        if n_cores <= 0:
+            raise ValueError(f"Number of CPU cores must be positive, got {n_cores}")
+        if model_uid in self._model_uid_to_cores:
+            raise ValueError(f"CPU cores are already allocated to model {model_uid}")
+        free_by_node: Dict[int, List[int]] = {}
+        for core in self.free_cores():
+            free_by_node.setdefault(self._core_to_node[core], []).append(core)
+        n_free = sum(len(cores) for cores in free_by_node.values())
+        if n_free < n_cores:
+            raise RuntimeError(
+                f"Not enough CPU cores for model {model_uid}: "
+                f"requested {n_cores}, {n_free} of {self.total} free"
+            )
+
+        fitting = [
+            (len(cores), node)
+            for node, cores in free_by_node.items()
+            if len(cores) >= n_cores
+        ]
+        if fitting:
+            allocated = free_by_node[min(fitting)[1]][:n_cores]
+        else:
+            allocated = []
+            for cores in sorted(free_by_node.values(), key=len, reverse=True):
+                allocated.extend(cores[: n_cores - len(allocated)])
+                if len(allocated) == n_cores:
+                    break
+        for core in allocated:
+            self._core_to_model_uid[core] = model_uid
+        self._model_uid_to_cores[model_uid] = allocated
+        return allocated
+
+    def release(self, model_uid: str) -> List[int]:
+        cores = self._model_uid_to_cores.pop(model_uid, [])
+        for core in cores:
+            self._core_to_model_uid.pop(core, None)
+        return cores
+
+
+def pin_current_process(cores: Sequence[int]):
+    '''
+    在模型子进程中调用: 把进程的所有线程绑定到 cores, 并把 OpenMP/BLAS/torch 的线程数设为核数
+    os.sched_setaffinity(0) 只作用于调用线程, 已经存在的线程 (事件循环、BLAS 线程池) 需逐个设置, 之后创建的线程继承
+    子进程在导入 numpy 之后才能拿到分配结果, 环境变量对已加载的 BLAS 不再生效, 已加载的线程池通过
+    threadpoolctl 调整 (可选依赖: pip install threadpoolctl)
+    '''
+    mask = set(cores)
+    os.sched_setaffinity(0, mask)
+    try:
+        threads = os.listdir("/proc/self/task")
+    except OSError:
+        threads = []
+    for tid in threads:
+        try:
+            os.sched_setaffinity(int(tid), mask)
+        except OSError:
+            # 线程已退出
+            pass
+
+    n_threads = str(len(mask))
+    for name in THREAD_COUNT_ENV_VARS:
+        os.environ[name] = n_threads
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(limits=len(mask))
+    except ImportError:
+        logger.debug("threadpoolctl is not installed, BLAS thread pools are not resized")
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(len(mask))
@@ -0,0 +1,146 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .resource import ResourceStatus
+
+# 心跳间隔 (秒): 负载变化时缩短到最小值, 没有变化时逐次加倍直到最大值
+MIN_HEARTBEAT_INTERVAL = 1.0
+MAX_HEARTBEAT_INTERVAL = 15.0
+
+# 每个资源在心跳中依次占用的字段, 槽位 0 为运行中的模型数
+HEARTBEAT_FIELDS = ("available", "total", "memory_available", "memory_total")
+# CPU/GPU 使用率的变化超过该值才上报
+USAGE_THRESHOLD = 0.05
+# 可用内存的变化超过总内存的该比例才上报
+MEMORY_THRESHOLD = 0.01
+
+# 心跳消息: (序号, 距下一次心跳的间隔, 资源名称 (仅全量心跳), 变化槽位的位图, 变化槽位的值)
+HeartbeatMessage = Tuple[int, float, Optional[Tuple[str, ...]], int, Tuple[float, ...]]
+
+
+def _changed(field: str, old: float, new: float, memory_total: float) -> bool:
+    if field == "available":
+        return abs(new - old) >= USAGE_THRESHOLD
+    if field == "memory_available":
+        return abs(new - old) >= memory_total * MEMORY_THRESHOLD
+    return new != old
+
+
+class HeartbeatEncoder:
+    '''
+    Worker 端的心跳编码
+    第一次 (以及 Supervisor 要求时) 发送全量心跳, 之后只发送变化超过阈值的槽位
+    与上一次 *发送* 的值比较, 缓慢的漂移累计超过阈值后同样会被上报
+    '''
+
+    def __init__(
+        self,
+        min_interval: float = MIN_HEARTBEAT_INTERVAL,
+        max_interval: float = MAX_HEARTBEAT_INTERVAL,
+    ):
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._interval = min_interval
+        self._seq = 0
+        self._resources: Optional[Tuple[str, ...]] = None
+        self._sent: List[float] = []
+
+    def reset(self):
+        '''
+        下一次心跳发送全量数据
+        '''
+        self._resources = None
+
+    def encode(
+        self, status: Dict[str, ResourceStatus], model_count: int
+    ) -> HeartbeatMessage:
+        values = [float(model_count)]
+        for name in status:
+            resource = status[name]
+            values.extend(getattr(resource, field) for field in HEARTBEAT_FIELDS)
+
+        resources = tuple(status)
+        self._seq += 1
+        if resources != self._resources:
+            # 全量心跳, 资源集合变化 (例如 GPU 上线) 时同样重新发送布局
+            self._resources = resources
+            self._sent = values
+            self._interval = self._min_interval
+            return (
+                self._seq,
+                self._interval,
+                resources,
+                (1 << len(values)) - 1,
+                tuple(values),
+            )
+
+        mask = 0
+        changed = []
+        sent = self._sent
+        for i, value in enumerate(values):
+            if i == 0:
+                is_changed = value != sent[0]
+            else:
+                field_index = (i - 1) % len(HEARTBEAT_FIELDS)
+                memory_total = values[i - field_index + 3]
+                is_changed = _changed(
+                    HEARTBEAT_FIELDS[field_index], sent[i], value, memory_total
+                )
+            if is_changed:
+                mask |= 1 << i
+                changed.append(value)
+                sent[i] = value
+        if mask:
+            self._interval = self._min_interval
+        else:
+            self._interval = min(self._interval * 2, self._max_interval)
+        return self._seq, self._interval, None, mask, tuple(changed)
+
+
+class HeartbeatDecoder:
+    '''
+    Supervisor 端单个 Worker 的心跳状态
+    全量心跳重建资源状态, 增量心跳只按位图更新变化的字段, 开销与变化的字段数成正比
+    '''
+
+    __slots__ = ("seq", "interval", "resources", "status", "model_count")
+
+    def __init__(self):
+        self.seq = -1
+        self.interval = 0.0
+        self.resources: Tuple[str, ...] = ()
+        self.status: Dict[str, ResourceStatus] = {}
+        self.model_count = 0
+
+    def apply(self, message: HeartbeatMessage) -> Optional[int]:
+        '''
+        应用一条心跳, 返回变化的槽位位图; 序号不连续或缺少布局时返回 None, 需要 Worker 重发全量心跳
+        '''
+        seq, interval, resources, mask, values = message
+        if resources is not None:
+            self.resources = resources
+            self.status = {
+                name: ResourceStatus(*values[1 + 4 * i : 5 + 4 * i])
+                for i, name in enumerate(resources)
+            }
+            self.model_count = int(values[0])
+        elif seq != self.seq + 1 or not self.resources:
+            return None
+        else:
+            self._apply_delta(mask, values)
+        self.seq = seq
+        self.interval = interval
+        return mask
+
+    def _apply_delta(self, mask: int, values: Sequence[float]):
+        resources = self.resources
+        status = self.status
+        num_fields = len(HEARTBEAT_FIELDS)
+        for value in values:
+            low = mask & -mask
+            mask ^= low
+            slot = low.bit_length() - 1
+            if slot == 0:
+                self.model_count = int(value)
+                continue
+            resource, field = divmod(slot - 1, num_fields)
+            setattr(status[resources[resource]], HEARTBEAT_FIELDS[field], value)
@@ -0,0 +1,200 @@
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class WorkerLoad:
+    '''
+        Worker 负载条目：
+            运行中的模型数量
+            可用内存与总内存 (字节)
+            空闲 CPU 核数与总核数
+            最近一次心跳时间, 以及 Worker 声明的距下一次心跳的间隔
+            最近一次上报资源 (内存、CPU) 的时间, 只刷新心跳时间的心跳不更新
+    '''
+    address: str
+    model_count: int
+    memory_available: float
+    cpu_free: float
+    update_time: float
+    version: int
+    memory_total: float = 0.0
+    cpu_total: float = 0.0
+    heartbeat_interval: float = 0.0
+    stale: bool = False
+    resource_time: float = 0.0
+
+
+class WorkerLoadIndex:
+    '''
+    Supervisor 本地维护的 Worker 负载索引
+    以 (运行模型数, -可用内存, -空闲 CPU) 为键构成最小堆, 由 Worker 心跳更新
+    选择 Worker 时无需逐个 RPC, 为本地 O(log n) 操作
+    心跳超时的条目被标记为 stale, 不参与选择, 直到下一次心跳到达
+    超时时间至少为 stale_timeout, Worker 声明的心跳间隔较长时为连续错过 stale_misses 次心跳的时间
+    '''
+
+    def __init__(self, stale_timeout: float, stale_misses: int = 3):
+        self._stale_timeout = stale_timeout
+        self._stale_misses = stale_misses
+        self._entries: Dict[str, WorkerLoad] = {}
+        # 堆中的旧版本条目采用惰性删除, 通过 version 判断是否有效
+        self._heap: List[Tuple[int, float, float, int, str]] = []
+        self._version = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._entries
+
+    def get(self, address: str) -> Optional[WorkerLoad]:
+        return self._entries.get(address)
+
+    def entries(self) -> List[WorkerLoad]:
+        return list(self._entries.values())
+
+    def fresh_entries(self, now: Optional[float] = None) -> List[WorkerLoad]:
+        '''
+        返回心跳未超时的 Worker 条目
+        '''
+        now = time.time() if now is None else now
+        return [e for e in self._entries.values() if not self.is_stale(e.address, now)]
+
+    def add(self, address: str, now: Optional[float] = None):
+        '''
+        注册新 Worker, 在首次心跳到达前以空负载参与选择
+        '''
+        self.update(address, 0, 0.0, 0.0, now=now)
+
+    def remove(self, address: str):
+        self._entries.pop(address, None)
+
+    def update(
+        self,
+        address: str,
+        model_count: int,
+        memory_available: float,
+        cpu_free: float,
+        memory_total: float = 0.0,
+        cpu_total: float = 0.0,
+        now: Optional[float] = None,
+        heartbeat_interval: float = 0.0,
+    ):
+        '''
+        根据心跳更新 Worker 负载, 同时清除 stale 标记
+        '''
+        now = time.time() if now is None else now
+        entry = WorkerLoad(
+            address=address,
+            model_count=model_count,
+            memory_available=memory_available,
+            cpu_free=cpu_free,
+            update_time=now,
+            version=next(self._version),
+            memory_total=memory_total,
+            cpu_total=cpu_total,
+            heartbeat_interval=heartbeat_interval,
+            resource_time=now,
+        )
+        self._entries[address] = entry
+        self._push(entry)
+
+    def touch(
+        self,
+        address: str,
+        now: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+    ):
+        '''
+        负载没有变化的心跳只刷新心跳时间, 条目已被标记为 stale 时重新加入堆
+        '''
+        entry = self._entries.get(address)
+        if entry is None:
+            return
+        entry.update_time = time.time() if now is None else now
+        if heartbeat_interval is not None:
+            entry.heartbeat_interval = heartbeat_interval
+        if entry.stale:
+            entry.stale = False
+            entry.version = next(self._version)
+            self._push(entry)
+
+    def timeout(self, address: str, misses: int, min_timeout: float) -> float:
+        '''
+        连续错过 misses 次心跳所需的时间, 不小于 min_timeout
+        '''
+        entry = self._entries.get(address)
+        if entry is None:
+            return min_timeout
+        return max(min_timeout, misses * entry.heartbeat_interval)
+
+    def adjust_model_count(self, address: str, delta: int):
+        '''
+        在两次心跳之间记录已经下发的放置, 避免连续放置集中到同一个 Worker
+        '''
+        entry = self._entries.get(address)
+        if entry is None:
+            return
+        entry.model_count = max(entry.model_count + delta, 0)
+        entry.version = next(self._version)
+        if not entry.stale:
+            self._push(entry)
+
+    def is_stale(self, address: str, now: Optional[float] = None) -> bool:
+        entry = self._entries.get(address)
+        if entry is None:
+            return True
+        now = time.time() if now is None else now
+        if not entry.stale and now - entry.update_time > self.timeout(
+            address, self._stale_misses, self._stale_timeout
+        ):
+            entry.stale = True
+        return entry.stale
+
+    def choose(self, now: Optional[float] = None) -> Optional[str]:
+        '''
+        返回负载最低且心跳未超时的 Worker 地址, 没有可用 Worker 时返回 None
+        '''
+        now = time.time() if now is None else now
+        heap = self._heap
+        while heap:
+            _, _, _, version, address = heap[0]
+            entry = self._entries.get(address)
+            if entry is None or entry.version != version:
+                heapq.heappop(heap)
+                continue
+            if self.is_stale(address, now):
+                heapq.heappop(heap)
+                continue
+            return address
+        return None
+
+    def _push(self, entry: WorkerLoad):
+        heapq.heappush(
+            self._heap,
+            (
+                entry.model_count,
+                -entry.memory_available,
+                -entry.cpu_free,
+                entry.version,
+                entry.address,
+            ),
+        )
+        # 每次心跳都会压入新条目, 失效条目过多时重建堆, 保证内存与 Worker 数量成正比
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._heap = [
+                (
+                    e.model_count,
+                    -e.memory_available,
+                    -e.cpu_free,
+                    e.version,
+                    e.address,
+                )
+                for e in self._entries.values()
+                if not e.stale
+            ]
+            heapq.heapify(self._heap)
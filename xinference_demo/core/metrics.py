@@ -0,0 +1,302 @@
+import asyncio
+import bisect
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .resource import NodeSample
+
+logger = logging.getLogger(__name__)
+
+# 调用耗时直方图的桶上界 (纳秒), 1-2.5-5 递增, 覆盖 1 微秒到 60 秒
+_BUCKET_BOUNDS_NS: List[int] = [
+    int(m * 10**e) for e in range(3, 10) for m in (1, 2.5, 5)
+] + [10**10, 6 * 10**10]
+
+
+class CallStats:
+    '''
+    单个函数的调用统计: 调用次数、累计耗时与耗时直方图, 均以纳秒记录
+    '''
+
+    __slots__ = ("name", "count", "sum_ns", "buckets")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.sum_ns = 0
+        # 最后一个桶对应 +Inf
+        self.buckets = [0] * (len(_BUCKET_BOUNDS_NS) + 1)
+
+    def record(self, elapsed_ns: int):
+        self.count += 1
+        self.sum_ns += elapsed_ns
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+
+
+class _Instrumentation:
+    '''
+    进程内的埋点注册表
+    未启用时被装饰函数只多一次属性读取与判断; 启用后记录每次调用的次数与纳秒级耗时
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self._stats: Dict[str, CallStats] = {}
+
+    def get_call_stats(self, name: str) -> CallStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = CallStats(name)
+        return stats
+
+    def render(self) -> str:
+        '''
+        以 Prometheus 文本格式导出调用直方图, 耗时单位为秒
+        '''
+        metric = "xinference_call_duration_seconds"
+        lines = [
+            f"# HELP {metric} Latency of instrumented supervisor and worker calls.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, stats in sorted(self._stats.items()):
+            if stats.count == 0:
+                continue
+            cumulative = 0
+            for bound, n in zip(_BUCKET_BOUNDS_NS, stats.buckets):
+                cumulative += n
+                lines.append(
+                    f'{metric}_bucket{{func="{name}",le="{bound / 1e9:g}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_bucket{{func="{name}",le="+Inf"}} {stats.count}')
+            lines.append(f'{metric}_sum{{func="{name}"}} {stats.sum_ns / 1e9:.9f}')
+            lines.append(f'{metric}_count{{func="{name}"}} {stats.count}')
+        return "\n".join(lines) + "\n"
+
+
+INSTRUMENTATION = _Instrumentation()
+
+
+def enable_instrumentation():
+    INSTRUMENTATION.enabled = True
+
+
+def remove_labels(collector, labels: Dict[str, str]):
+    '''
+    删除 aioprometheus collector 中包含 labels 的所有序列, 用于模型终止后不再导出其指标
+    aioprometheus 没有提供删除接口, values 的键为按键排序的 JSON 编码的标签
+    '''
+    import orjson
+
+    for key in list(collector.values):
+        try:
+            series = orjson.loads(key)
+        except orjson.JSONDecodeError:
+            # 无标签序列的键为 MetricDict.EMPTY_KEY
+            continue
+        if all(series.get(name) == value for name, value in labels.items()):
+            del collector.values[key]
+
+
+class ModelMetrics:
+    '''
+    Worker 定期从模型子进程拉取的调度器统计, 注册在 aioprometheus 的默认 REGISTRY 中, 由 /metrics 导出
+    统计值在子进程中累计, 这里只设置为最新的绝对值
+    '''
+
+    def __init__(self):
+        from aioprometheus import Counter, Gauge
+
+        self.prefix_cache_hit_ratio = Gauge(
+            "xinference_prefix_cache_hit_ratio",
+            "Fraction of requests that reused a cached prompt prefix per model.",
+        )
+        self.prefix_cache_saved_tokens = Counter(
+            "xinference_prefix_cache_saved_prefill_tokens_total",
+            "Number of prompt tokens whose prefill was skipped by the prefix cache per model.",
+        )
+        self.prefix_cache_bytes = Gauge(
+            "xinference_prefix_cache_bytes",
+            "Memory held by the prefix KV cache per model.",
+        )
+
+    def update(self, model_uid: str, stats: Dict[str, int]):
+        if "prefix_cache_queries" not in stats:
+            return
+        labels = {"model": model_uid}
+        queries = stats["prefix_cache_queries"]
+        self.prefix_cache_hit_ratio.set(
+            labels, stats["prefix_cache_hits"] / queries if queries else 0.0
+        )
+        self.prefix_cache_saved_tokens.set(labels, stats["prefix_cache_hit_tokens"])
+        self.prefix_cache_bytes.set(labels, stats["prefix_cache_bytes"])
+
+    def remove(self, model_uid: str):
+        labels = {"model": model_uid}
+        for collector in (
+            self.prefix_cache_hit_ratio,
+            self.prefix_cache_saved_tokens,
+            self.prefix_cache_bytes,
+        ):
+            remove_labels(collector, labels)
+
+
+_MODEL_METRICS: Optional[ModelMetrics] = None
+
+
+def get_model_metrics() -> ModelMetrics:
+    '''
+    同一进程中的指标只能注册一次, 多个 WorkerActor 共享同一个实例
+    '''
+    global _MODEL_METRICS
+    if _MODEL_METRICS is None:
+        _MODEL_METRICS = ModelMetrics()
+    return _MODEL_METRICS
+
+
+class NodeMetrics:
+    '''
+    Worker 所在节点的遥测数据, 注册在 aioprometheus 的默认 REGISTRY 中, 由 /metrics 导出
+    心跳只上报资源 (cpu、numa-N、gpu-N) 给 Supervisor, 每核使用率、负载、磁盘与网络吞吐只在这里导出
+    '''
+
+    def __init__(self):
+        from aioprometheus import Gauge
+
+        self.resource_usage = Gauge(
+            "xinference_node_resource_usage",
+            "Utilization of each node resource (cpu, numa-N, gpu-N).",
+        )
+        self.memory_available = Gauge(
+            "xinference_node_memory_available_bytes",
+            "Available memory of each node resource.",
+        )
+        self.memory_total = Gauge(
+            "xinference_node_memory_total_bytes",
+            "Total memory of each node resource, the cgroup limit inside a container.",
+        )
+        self.core_usage = Gauge(
+            "xinference_node_cpu_core_usage",
+            "Utilization of each logical CPU core.",
+        )
+        # NodeSample.metrics 中 "<前缀>.<标签值>" 形式的指标按前缀映射到 (Gauge, 标签名)
+        self._scalars = {
+            "load_average": (
+                Gauge("xinference_node_load_average", "System load average."),
+                "period",
+            ),
+            "disk": (
+                Gauge(
+                    "xinference_node_disk_bytes_per_second",
+                    "Disk read and write throughput.",
+                ),
+                "direction",
+            ),
+            "network": (
+                Gauge(
+                    "xinference_node_network_bytes_per_second",
+                    "Network receive and send throughput, excluding loopback.",
+                ),
+                "direction",
+            ),
+            "cgroup": (
+                Gauge(
+                    "xinference_node_cgroup_limit",
+                    "CPU quota (cores) and memory limit (bytes) of the worker's cgroup.",
+                ),
+                "resource",
+            ),
+        }
+
+    def update(self, worker: str, sample: "NodeSample"):
+        for name, status in sample.resources.items():
+            labels = {"worker": worker, "resource": name}
+            self.resource_usage.set(labels, status.available)
+            self.memory_available.set(labels, status.memory_available)
+            self.memory_total.set(labels, status.memory_total)
+        for core, usage in enumerate(sample.per_core_usage.tolist()):
+            self.core_usage.set({"worker": worker, "core": str(core)}, usage)
+        for name, value in sample.metrics.items():
+            prefix, _, label = name.partition(".")
+            scalar = self._scalars.get(prefix)
+            if scalar is not None:
+                gauge, label_name = scalar
+                gauge.set({"worker": worker, label_name: label}, value)
+
+
+_NODE_METRICS: Optional[NodeMetrics] = None
+
+
+def get_node_metrics() -> NodeMetrics:
+    global _NODE_METRICS
+    if _NODE_METRICS is None:
+        _NODE_METRICS = NodeMetrics()
+    return _NODE_METRICS
+
+
+def launch_metrics_export_server(
+    q: queue.Queue, host: Optional[str] = None, port: Optional[int] = None
+):
+    '''
+    在独立线程中运行的 Prometheus 导出服务, 启动后将监听地址放入 q
+    /metrics 同时导出 aioprometheus 默认 REGISTRY 与本进程的调用统计
+    '''
+    import uvicorn
+    from aioprometheus import REGISTRY, render
+    from fastapi import FastAPI, Request, Response
+
+    app = FastAPI()
+
+    @app.get("/metrics")
+    async def metrics(request: Request) -> Response:
+        content, http_headers = render(REGISTRY, [])
+        body = content.decode() + INSTRUMENTATION.render()
+        return Response(content=body, media_type=http_headers["Content-Type"])
+
+    async def main():
+        config = uvicorn.Config(
+            app, host=host or "127.0.0.1", port=port or 0, log_level="error"
+        )
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve())
+
+        while not server.started and not task.done():
+            await asyncio.sleep(0.1)
+
+        if task.done():
+            await task
+        else:
+            q.put(server.servers[0].sockets[0].getsockname())
+            await task
+
+    asyncio.run(main())
+
+
+def start_metrics_export_server(
+    host: Optional[str] = None, port: Optional[int] = None
+) -> threading.Thread:
+    '''
+    在守护线程中启动导出服务, 等待其开始监听后返回该线程, 并启用本进程的调用埋点
+    Worker 与独立部署的 Supervisor 进程各自调用
+    '''
+    logger.info(f"Starting metrics export server at {host}:{port}")
+    enable_instrumentation()
+    q: queue.Queue = queue.Queue()
+    thread = threading.Thread(
+        name="Metrics Export Server",
+        target=launch_metrics_export_server,
+        args=(q, host, port),
+        daemon=True,
+    )
+    thread.start()
+    logger.info("Checking metrics export server...")
+    while thread.is_alive():
+        try:
+            host, port = q.get(timeout=0.1)[:2]
+            logger.info(f"Metrics server is started at: http://{host}:{port}")
+            return thread
+        except queue.Empty:
+            pass
+    raise Exception("Metrics server thread exit.")
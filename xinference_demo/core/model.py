@@ -0,0 +1,350 @@
+import asyncio
+import time
+import uuid
+from contextlib import aclosing
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Optional, Union
+
+import xoscar as xo
+
+from .cpuset import pin_current_process
+from .utils import log_async, parse_replica_model_uid
+
+if TYPE_CHECKING:
+    from .scheduler import (
+        ContinuousBatchingScheduler,
+        EmbeddingBatcher,
+        InferenceRequest,
+    )
+
+logger = getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 128
+DEFAULT_TEMPERATURE = 1.0
+
+
+class _ActivityTracker:
+    '''
+    记录模型未完成的请求数与最近一次请求结束的时间, WorkerActor 据此卸载空闲模型
+    '''
+
+    __slots__ = ("inflight", "last_active")
+
+    def __init__(self):
+        self.inflight = 0
+        self.last_active = time.monotonic()
+
+    def __enter__(self):
+        self.inflight += 1
+
+    def __exit__(self, *exc_info):
+        self.inflight -= 1
+        self.last_active = time.monotonic()
+
+    def snapshot(self) -> Dict[str, float]:
+        idle_time = 0.0 if self.inflight else time.monotonic() - self.last_active
+        return {"idle_time": idle_time, "inflight": self.inflight}
+
+
+class ModelActor(xo.StatelessActor):
+    '''
+    运行在 WorkerActor 为每个模型创建的子进程 (SubPool) 中, 负责实际处理推理请求
+    所有 generate/chat 请求进入同一个连续批处理调度器, 一个子进程即可服务多个并发用户
+    stream=True 时返回异步生成器, 调用方通过 xoscar 逐块拉取输出
+    '''
+
+    def __init__(
+        self,
+        worker_address: str,
+        model: Any,
+        max_batch_size: Optional[int] = None,
+        prefix_cache_size: Optional[float] = None,
+        cpu_cores: Optional[List[int]] = None,
+    ):
+        super().__init__()
+        self._worker_address = worker_address
+        self._model = model
+        self._model_uid = parse_replica_model_uid(model.model_uid)[0]
+        self._max_batch_size = max_batch_size
+        # 前缀 K/V 缓存的内存上限 (MiB), None 表示使用 XINFERENCE_PREFIX_CACHE_SIZE
+        self._prefix_cache_size = prefix_cache_size
+        # WorkerActor 分配给本模型的 CPU 核, None 表示不绑定
+        self._cpu_cores = cpu_cores
+        self._scheduler: Optional["ContinuousBatchingScheduler"] = None
+        self._activity = _ActivityTracker()
+
+    async def __pre_destroy__(self):
+        if self._scheduler is not None:
+            await self._scheduler.stop()
+
+    @log_async(logger=logger)
+    async def load(self):
+        '''
+        在子进程中加载模型权重并启动调度器
+        '''
+        from .scheduler import (
+            DEFAULT_MAX_BATCH_SIZE,
+            DEFAULT_PREFIX_CACHE_BYTES,
+            ContinuousBatchingScheduler,
+        )
+
+        if self._cpu_cores:
+            # 在加载权重、创建线程池之前绑定
+            pin_current_process(self._cpu_cores)
+        await asyncio.to_thread(self._model.load)
+        self._scheduler = ContinuousBatchingScheduler(
+            self._model,
+            max_batch_size=self._max_batch_size or DEFAULT_MAX_BATCH_SIZE,
+            prefix_cache_bytes=(
+                DEFAULT_PREFIX_CACHE_BYTES
+                if self._prefix_cache_size is None
+                else int(self._prefix_cache_size * 2**20)
+            ),
+        )
+        self._scheduler.start()
+
+    def model_uid(self) -> str:
+        return self._model_uid
+
+    def describe(self) -> Dict[str, Any]:
+        family = self._model.model_family
+        return {
+            "model_type": "LLM",
+            "model_name": family.model_name,
+            "model_ability": family.model_ability,
+            "context_length": family.context_length,
+        }
+
+    def get_scheduler_stats(self) -> Dict[str, int]:
+        if self._scheduler is None:
+            return {}
+        return self._scheduler.get_stats()
+
+    def get_activity(self) -> Dict[str, float]:
+        return self._activity.snapshot()
+
+    @xo.generator
+    async def generate(
+        self, prompt: str, generate_config: Optional[Dict] = None
+    ) -> Union[Dict, AsyncGenerator[Dict, None]]:
+        from ..model.llm.utils import ChatModelMixin
+
+        req = self._create_request(self._model.tokenize(prompt), generate_config)
+        if req.stream is not None:
+            return self._completion_chunks(req)
+        await self._wait_request(req)
+        return ChatModelMixin.to_completion(
+            self._model_uid,
+            req.text,
+            req.finish_reason,
+            len(req.prompt_tokens),
+            len(req.output_tokens),
+        )
+
+    @xo.generator
+    async def chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        chat_history: Optional[List[Dict]] = None,
+        generate_config: Optional[Dict] = None,
+    ) -> Union[Dict, AsyncGenerator[Dict, None]]:
+        from ..model.llm.utils import ChatModelMixin
+
+        prompt_style = self._model.model_family.prompt_style
+        if prompt_style is None:
+            raise ValueError(f"Model {self._model.model_uid} does not support chat")
+        prompt_style = prompt_style.model_copy()
+        if system_prompt:
+            prompt_style.system_prompt = system_prompt
+        full_prompt = ChatModelMixin.get_prompt(
+            prompt, chat_history or [], prompt_style
+        )
+
+        generate_config = dict(generate_config or {})
+        stop = generate_config.get("stop") or []
+        if isinstance(stop, str):
+            stop = [stop]
+        generate_config["stop"] = list(stop) + list(prompt_style.stop or [])
+        generate_config["stop_token_ids"] = list(
+            generate_config.get("stop_token_ids") or []
+        ) + list(prompt_style.stop_token_ids or [])
+
+        req = self._create_request(self._model.tokenize(full_prompt), generate_config)
+        if req.stream is not None:
+            return self._chat_completion_chunks(req)
+        await self._wait_request(req)
+        return ChatModelMixin.to_chat_completion(
+            ChatModelMixin.to_completion(
+                self._model_uid,
+                req.text,
+                req.finish_reason,
+                len(req.prompt_tokens),
+                len(req.output_tokens),
+            )
+        )
+
+    def _create_request(
+        self, prompt_tokens: List[int], generate_config: Optional[Dict]
+    ) -> "InferenceRequest":
+        from .scheduler import InferenceRequest
+
+        if self._scheduler is None:
+            raise RuntimeError(f"Model {self._model.model_uid} is not loaded")
+        generate_config = generate_config or {}
+        stop = generate_config.get("stop")
+        if isinstance(stop, str):
+            stop = [stop]
+        temperature = generate_config.get("temperature")
+        req = InferenceRequest(
+            prompt_tokens,
+            max_tokens=generate_config.get("max_tokens") or DEFAULT_MAX_TOKENS,
+            temperature=DEFAULT_TEMPERATURE if temperature is None else temperature,
+            stop=stop,
+            stop_token_ids=set(generate_config.get("stop_token_ids") or []),
+            stream=bool(generate_config.get("stream")),
+        )
+        return req
+
+    async def _wait_request(self, req: "InferenceRequest") -> "InferenceRequest":
+        with self._activity:
+            self._scheduler.add_request(req)
+            try:
+                return await asyncio.shield(req.future)
+            except asyncio.CancelledError:
+                self._scheduler.abort_request(req)
+                raise
+
+    async def _iter_request(self, req: "InferenceRequest"):
+        '''
+        从请求的有界缓冲区中逐块读取 (新增文本, finish_reason)
+        请求在首次拉取时才进入调度器; 生成器被提前关闭 (客户端断开) 时取消请求, 释放其在 batch 中的位置
+        '''
+        with self._activity:
+            self._scheduler.add_request(req)
+            try:
+                while True:
+                    item = await req.stream.get()
+                    self._scheduler.notify_consumed()
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                    if item[1] is not None:
+                        break
+            finally:
+                if not req.finished:
+                    self._scheduler.abort_request(req)
+
+    async def _completion_chunks(self, req: "InferenceRequest"):
+        from ..model.llm.utils import ChatModelMixin
+
+        completion_id = f"cmpl-{uuid.uuid4()}"
+        created = int(time.time())
+        async with aclosing(self._iter_request(req)) as chunks:
+            async for delta, finish_reason in chunks:
+                yield ChatModelMixin.to_completion_chunk(
+                    completion_id, self._model_uid, created, delta, finish_reason
+                )
+
+    async def _chat_completion_chunks(self, req: "InferenceRequest"):
+        from ..model.llm.utils import ChatModelMixin
+
+        completion_id = f"cmpl-{uuid.uuid4()}"
+        created = int(time.time())
+        yield ChatModelMixin.to_chat_completion_chunk(
+            completion_id, self._model_uid, created, {"role": "assistant"}, None
+        )
+        async with aclosing(self._iter_request(req)) as chunks:
+            async for delta, finish_reason in chunks:
+                yield ChatModelMixin.to_chat_completion_chunk(
+                    completion_id,
+                    self._model_uid,
+                    created,
+                    {"content": delta} if delta else {},
+                    finish_reason,
+                )
+
+
+class EmbeddingModelActor(xo.StatelessActor):
+    '''
+    运行 embedding 模型的子进程 actor
+    并发请求经动态批处理器合并为 batch, 一次模型调用计算整个 batch 的向量
+    '''
+
+    def __init__(
+        self,
+        worker_address: str,
+        model: Any,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        cpu_cores: Optional[List[int]] = None,
+    ):
+        super().__init__()
+        self._worker_address = worker_address
+        self._model = model
+        self._model_uid = parse_replica_model_uid(model.model_uid)[0]
+        self._max_batch_size = max_batch_size
+        self._max_wait_ms = max_wait_ms
+        self._cpu_cores = cpu_cores
+        self._batcher: Optional["EmbeddingBatcher"] = None
+        self._activity = _ActivityTracker()
+
+    async def __pre_destroy__(self):
+        if self._batcher is not None:
+            await self._batcher.stop()
+
+    @log_async(logger=logger)
+    async def load(self):
+        '''
+        在子进程中加载模型权重并启动批处理器
+        '''
+        from .scheduler import (
+            DEFAULT_EMBEDDING_MAX_BATCH_SIZE,
+            DEFAULT_EMBEDDING_MAX_WAIT,
+            EmbeddingBatcher,
+        )
+
+        if self._cpu_cores:
+            # 在加载权重、创建线程池之前绑定
+            pin_current_process(self._cpu_cores)
+        await asyncio.to_thread(self._model.load)
+        self._batcher = EmbeddingBatcher(
+            self._model,
+            max_batch_size=self._max_batch_size or DEFAULT_EMBEDDING_MAX_BATCH_SIZE,
+            max_wait=(
+                DEFAULT_EMBEDDING_MAX_WAIT
+                if self._max_wait_ms is None
+                else self._max_wait_ms / 1000
+            ),
+        )
+        self._batcher.start()
+
+    def model_uid(self) -> str:
+        return self._model_uid
+
+    def describe(self) -> Dict[str, Any]:
+        spec = self._model.model_spec
+        return {
+            "model_type": "embedding",
+            "model_name": spec.model_name,
+            "dimensions": spec.dimensions,
+            "max_tokens": spec.max_tokens,
+        }
+
+    def get_scheduler_stats(self) -> Dict[str, int]:
+        if self._batcher is None:
+            return {}
+        return self._batcher.get_stats()
+
+    def get_activity(self) -> Dict[str, float]:
+        return self._activity.snapshot()
+
+    async def create_embedding(self, input: Union[str, List[str]]) -> Dict:
+        from ..model.embedding.utils import to_embedding
+
+        if self._batcher is None:
+            raise RuntimeError(f"Model {self._model.model_uid} is not loaded")
+        texts = [input] if isinstance(input, str) else list(input)
+        with self._activity:
+            vectors, token_counts = await self._batcher.encode(texts)
+        return to_embedding(self._model_uid, vectors, token_counts)
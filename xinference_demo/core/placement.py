@@ -0,0 +1,184 @@
+import itertools
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Dict, List, Optional, Set
+
+from .load_index import WorkerLoad, WorkerLoadIndex
+
+logger = getLogger(__name__)
+
+PLACEMENT_POLICY_SPREAD = "spread"
+PLACEMENT_POLICY_PACK = "pack"
+PLACEMENT_POLICIES = (PLACEMENT_POLICY_SPREAD, PLACEMENT_POLICY_PACK)
+
+
+@dataclass
+class ResourceRequest:
+    '''
+        模型的资源需求：
+            预计常驻内存 (字节)
+            独占 (绑定) 的 CPU 核数, 不绑定的模型与其他模型共享所有核, 为 0
+    '''
+    memory: float
+    cpu: float
+
+
+@dataclass
+class _Reservation:
+    address: str
+    request: ResourceRequest
+    # 启动完成 (release) 的时间, None 表示仍在启动中
+    released_at: Optional[float] = None
+
+
+class PlacementEngine:
+    '''
+    基于 Worker 心跳上报的实时资源信息进行模型放置 (bin-packing)
+        内存: 心跳中的可用内存减去尚未反映到心跳中的预留
+        CPU: 绑定的模型独占的核数之和不超过节点总核数, 不绑定的模型不占用
+    spread 策略选择放置后剩余内存最多的 Worker, pack 策略选择放置后剩余内存最少的 Worker (best-fit)
+    没有 Worker 能容纳时拒绝放置, 而不是让节点 OOM
+    '''
+
+    def __init__(
+        self,
+        load_index: WorkerLoadIndex,
+        policy: str = PLACEMENT_POLICY_SPREAD,
+        memory_headroom: float = 0.05,
+    ):
+        self._check_policy(policy)
+        self._load_index = load_index
+        self._policy = policy
+        # 每个节点保留的内存比例, 留给操作系统及模型运行时的临时分配
+        self._memory_headroom = memory_headroom
+        self._reservations: Dict[int, _Reservation] = {}
+        self._reservation_ids = itertools.count()
+        self._model_uid_to_commit: Dict[str, _Reservation] = {}
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @staticmethod
+    def _check_policy(policy: str):
+        if policy not in PLACEMENT_POLICIES:
+            raise ValueError(
+                f"Invalid placement policy: {policy}, "
+                f"available policies are {', '.join(PLACEMENT_POLICIES)}"
+            )
+
+    def free_resources(self, entry: WorkerLoad):
+        '''
+        返回 Worker 当前可供放置的 (内存, CPU 核数)
+        '''
+        reserved_memory = sum(
+            r.request.memory
+            for r in self._reservations.values()
+            if r.address == entry.address
+            and (r.released_at is None or r.released_at >= entry.resource_time)
+        )
+        committed_cpu = sum(
+            r.request.cpu
+            for r in self._model_uid_to_commit.values()
+            if r.address == entry.address
+        )
+        free_memory = (
+            entry.memory_available
+            - entry.memory_total * self._memory_headroom
+            - reserved_memory
+        )
+        return free_memory, entry.cpu_total - committed_cpu
+
+    def place(
+        self,
+        model_uid: str,
+        request: ResourceRequest,
+        policy: Optional[str] = None,
+        exclude: Optional[Set[str]] = None,
+    ) -> str:
+        '''
+        为模型选择 Worker 并预留资源, 返回 Worker 地址
+        无法在不超额分配的情况下放置时抛出 RuntimeError
+        '''
+        policy = policy or self._policy
+        self._check_policy(policy)
+        self._expire_reservations()
+
+        best_address = None
+        best_score = None
+        rejected: List[str] = []
+        for entry in self._load_index.fresh_entries():
+            if exclude and entry.address in exclude:
+                continue
+            if entry.memory_total <= 0:
+                rejected.append(f"{entry.address} (no resource report yet)")
+                continue
+            free_memory, free_cpu = self.free_resources(entry)
+            if free_memory < request.memory or free_cpu < request.cpu:
+                rejected.append(
+                    f"{entry.address} (free memory {free_memory / 2**20:.0f} MiB, "
+                    f"free cpu {free_cpu:g} cores)"
+                )
+                continue
+            remaining = free_memory - request.memory
+            score = (
+                (-remaining, entry.model_count)
+                if policy == PLACEMENT_POLICY_SPREAD
+                else (remaining, -entry.model_count)
+            )
+            if best_score is None or score < best_score:
+                best_score, best_address = score, entry.address
+
+        if best_address is None:
+            raise RuntimeError(
+                f"Cannot place model {model_uid}: it requires "
+                f"{request.memory / 2**20:.0f} MiB memory and {request.cpu:g} cpu cores, "
+                f"which would overcommit every worker. "
+                f"Candidates: {', '.join(rejected) or 'no available worker'}"
+            )
+
+        reservation = _Reservation(address=best_address, request=request)
+        self._reservations[next(self._reservation_ids)] = reservation
+        self._model_uid_to_commit[model_uid] = reservation
+        logger.debug(
+            "Place model %s on worker %s with policy %s", model_uid, best_address, policy
+        )
+        return best_address
+
+    def release(self, model_uid: str, launched: bool = True):
+        '''
+        模型启动结束后调用
+        launched 为 True 时预留内存保留到下一次上报资源的心跳 (此时心跳已经反映模型占用的内存), 否则立即释放
+        '''
+        reservation = self._model_uid_to_commit.get(model_uid)
+        if reservation is None:
+            return
+        if launched:
+            reservation.released_at = time.time()
+        else:
+            self.remove(model_uid)
+
+    def remove(self, model_uid: str):
+        '''
+        模型被终止时释放其全部资源
+        '''
+        reservation = self._model_uid_to_commit.pop(model_uid, None)
+        if reservation is None:
+            return
+        for rid, r in list(self._reservations.items()):
+            if r is reservation:
+                del self._reservations[rid]
+
+    def remove_worker(self, address: str):
+        for model_uid, r in list(self._model_uid_to_commit.items()):
+            if r.address == address:
+                self.remove(model_uid)
+
+    def _expire_reservations(self):
+        for rid, r in list(self._reservations.items()):
+            if r.released_at is None:
+                continue
+            entry = self._load_index.get(r.address)
+            if entry is None or entry.resource_time > r.released_at:
+                del self._reservations[rid]
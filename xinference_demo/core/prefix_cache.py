@@ -0,0 +1,183 @@
+import heapq
+import itertools
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# K/V 片段: 首维对应 token 的 NumPy 数组元组, 例如 (keys, values)
+KVSegment = Tuple[np.ndarray, ...]
+
+# 超出内存上限时淘汰到上限的该比例以下, 避免每次插入都遍历整棵树
+_EVICT_WATERMARK = 0.9
+
+
+class _RadixNode:
+    __slots__ = ("tokens", "kv", "nbytes", "children", "parent", "last_access")
+
+    def __init__(
+        self,
+        tokens: np.ndarray,
+        kv: KVSegment,
+        parent: Optional["_RadixNode"],
+        last_access: int,
+    ):
+        self.tokens = tokens
+        self.kv = kv
+        self.nbytes = sum(a.nbytes for a in kv)
+        # 子节点以边上的第一个 token 为键
+        self.children: Dict[int, "_RadixNode"] = {}
+        self.parent = parent
+        self.last_access = last_access
+
+
+def _common_prefix_length(edge: np.ndarray, tokens: np.ndarray) -> int:
+    n = min(edge.shape[0], tokens.shape[0])
+    diff = np.flatnonzero(edge[:n] != tokens[:n])
+    return int(diff[0]) if diff.size else n
+
+
+class PrefixCache:
+    '''
+    以 token 前缀为键的基数树 (radix tree), 节点保存边上各 token 的 K/V 片段
+    共享系统提示词与 few-shot 前缀的请求只需对剩余的 token 执行 prefill
+    树的总内存超过 max_bytes 时按最近使用时间淘汰叶子节点 (LRU), 父节点在子节点全部淘汰后成为叶子
+    缓存中的 K/V 在命中时被复制到请求自己的状态中, 淘汰不影响正在运行的请求
+    '''
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._clock = itertools.count()
+        self._root = _RadixNode(np.empty(0, dtype=np.int64), (), None, 0)
+        self._nbytes = 0
+        # 每个 token 的 K/V 字节数, 由第一次 export 得到, 同一模型中为常数
+        self._token_nbytes = 0
+        self._num_nodes = 0
+        self._num_queries = 0
+        self._num_hits = 0
+        self._num_query_tokens = 0
+        self._num_hit_tokens = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def match(self, tokens: Sequence[int]) -> Tuple[int, List[KVSegment]]:
+        '''
+        返回已缓存的最长前缀的长度与按顺序排列的 K/V 片段 (只读视图, 使用方需自行复制)
+        最后一个 token 总是留给 prefill 计算, 以得到下一 token 的 logits
+        '''
+        arr = np.asarray(tokens, dtype=np.int64)
+        limit = arr.shape[0] - 1
+        now = next(self._clock)
+        node, pos = self._root, 0
+        segments: List[KVSegment] = []
+        while pos < limit:
+            child = node.children.get(int(arr[pos]))
+            if child is None:
+                break
+            n = _common_prefix_length(child.tokens, arr[pos:limit])
+            child.last_access = now
+            if n < child.tokens.shape[0]:
+                segments.append(tuple(a[:n] for a in child.kv))
+                pos += n
+                break
+            segments.append(child.kv)
+            pos += n
+            node = child
+
+        self._num_queries += 1
+        self._num_query_tokens += arr.shape[0]
+        if pos:
+            self._num_hits += 1
+            self._num_hit_tokens += pos
+        return pos, segments
+
+    def insert(self, tokens: Sequence[int], export: Callable[[int, int], KVSegment]):
+        '''
+        将 tokens 的 K/V 加入缓存, export(start, end) 返回 tokens[start:end] 的 K/V 片段 (副本)
+        只对树中尚不存在的后缀调用 export; 后缀单独超过 max_bytes 时不调用 export, 也不淘汰已有节点
+        '''
+        arr = np.asarray(tokens, dtype=np.int64)
+        if self._max_bytes <= 0 or arr.shape[0] == 0:
+            return
+        now = next(self._clock)
+        node, pos = self._root, 0
+        while pos < arr.shape[0]:
+            child = node.children.get(int(arr[pos]))
+            if child is None:
+                if (arr.shape[0] - pos) * self._token_nbytes > self._max_bytes:
+                    break
+                child = _RadixNode(
+                    arr[pos:].copy(), export(pos, arr.shape[0]), node, now
+                )
+                if not self._token_nbytes:
+                    self._token_nbytes = child.nbytes // (arr.shape[0] - pos)
+                if child.nbytes > self._max_bytes:
+                    break
+                node.children[int(arr[pos])] = child
+                self._nbytes += child.nbytes
+                self._num_nodes += 1
+                break
+            n = _common_prefix_length(child.tokens, arr[pos:])
+            child.last_access = now
+            if n < child.tokens.shape[0]:
+                child = self._split(child, n)
+            node = child
+            pos += n
+        if self._nbytes > self._max_bytes:
+            self._evict(int(self._max_bytes * _EVICT_WATERMARK))
+
+    def _split(self, node: _RadixNode, n: int) -> _RadixNode:
+        '''
+        在边的第 n 个 token 处拆分节点, 返回新的前半段节点
+        两段各自复制 K/V, 淘汰其中一段时内存能够真正释放
+        '''
+        parent = node.parent
+        head = _RadixNode(
+            node.tokens[:n].copy(),
+            tuple(a[:n].copy() for a in node.kv),
+            parent,
+            node.last_access,
+        )
+        node.tokens = node.tokens[n:].copy()
+        node.kv = tuple(a[n:].copy() for a in node.kv)
+        node.nbytes = sum(a.nbytes for a in node.kv)
+        node.parent = head
+        head.children[int(node.tokens[0])] = node
+        parent.children[int(head.tokens[0])] = head
+        self._num_nodes += 1
+        return head
+
+    def _evict(self, target: int):
+        heap = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                stack.extend(node.children.values())
+            elif node is not self._root:
+                heap.append((node.last_access, id(node), node))
+        heapq.heapify(heap)
+        while self._nbytes > target and heap:
+            _, _, leaf = heapq.heappop(heap)
+            parent = leaf.parent
+            del parent.children[int(leaf.tokens[0])]
+            self._nbytes -= leaf.nbytes
+            self._num_nodes -= 1
+            if parent is not self._root and not parent.children:
+                heapq.heappush(heap, (parent.last_access, id(parent), parent))
+
+    def clear(self):
+        self._root.children.clear()
+        self._nbytes = 0
+        self._num_nodes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "prefix_cache_queries": self._num_queries,
+            "prefix_cache_hits": self._num_hits,
+            "prefix_cache_query_tokens": self._num_query_tokens,
+            "prefix_cache_hit_tokens": self._num_hit_tokens,
+            "prefix_cache_bytes": self._nbytes,
+            "prefix_cache_nodes": self._num_nodes,
+        }
@@ -0,0 +1,151 @@
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Dict, List, Optional
+
+logger = getLogger(__name__)
+
+# 最近一次请求距今不足该时间 (秒) 的模型不会被卸载
+# 与 RESTful API 缓存副本引用的有效期一致, 保证 API 进程不会拿着已卸载模型的引用
+MIN_UNLOAD_IDLE_TIME = 10.0
+
+
+@dataclass
+class _Residency:
+    memory: float
+    # 空闲超过该时间 (秒) 后卸载, None 表示不按空闲时间卸载
+    idle_ttl: Optional[float]
+    last_active: float
+    # 独占的 CPU 核数, 0 表示不绑定
+    cores: int = 0
+    inflight: int = 0
+    loaded: bool = True
+
+
+class ModelResidencyManager:
+    '''
+    单个 Worker 上模型的驻留管理:
+        空闲时间超过 idle_ttl 的模型被卸载
+        加载模型时, 已驻留模型的内存加上新模型超出预算, 或空闲的 CPU 核不足以绑定新模型, 则按 LRU 卸载空闲模型
+    只维护状态并给出需要卸载的模型, 实际的卸载与重新加载由 WorkerActor 完成
+    '''
+
+    def __init__(self, min_idle_time: float = MIN_UNLOAD_IDLE_TIME):
+        self._min_idle_time = min_idle_time
+        self._models: Dict[str, _Residency] = {}
+
+    def __contains__(self, model_uid: str) -> bool:
+        return model_uid in self._models
+
+    def is_loaded(self, model_uid: str) -> bool:
+        residency = self._models.get(model_uid)
+        return residency is not None and residency.loaded
+
+    def loaded_model_uids(self) -> List[str]:
+        return [uid for uid, r in self._models.items() if r.loaded]
+
+    def resident_memory(self) -> float:
+        return sum(r.memory for r in self._models.values() if r.loaded)
+
+    def set_loaded(
+        self,
+        model_uid: str,
+        memory: float,
+        idle_ttl: Optional[float],
+        cores: int = 0,
+    ):
+        self._models[model_uid] = _Residency(
+            memory=memory,
+            idle_ttl=idle_ttl,
+            last_active=time.monotonic(),
+            cores=cores,
+        )
+
+    def set_unloaded(self, model_uid: str):
+        residency = self._models.get(model_uid)
+        if residency is not None:
+            residency.loaded = False
+            residency.inflight = 0
+
+    def remove(self, model_uid: str):
+        self._models.pop(model_uid, None)
+
+    def update_activity(self, model_uid: str, idle_time: float, inflight: int):
+        '''
+        记录 ModelActor 上报的空闲时间与未完成请求数
+        '''
+        residency = self._models.get(model_uid)
+        if residency is None or not residency.loaded:
+            return
+        residency.last_active = time.monotonic() - idle_time
+        residency.inflight = inflight
+
+    def _unloadable(self, residency: _Residency, now: float) -> bool:
+        return (
+            residency.loaded
+            and residency.inflight == 0
+            and now - residency.last_active >= self._min_idle_time
+        )
+
+    def expired(self) -> List[str]:
+        '''
+        返回空闲时间超过各自 idle_ttl 的模型
+        '''
+        now = time.monotonic()
+        return [
+            uid
+            for uid, r in self._models.items()
+            if self._unloadable(r, now)
+            and r.idle_ttl is not None
+            and now - r.last_active >= r.idle_ttl
+        ]
+
+    def reclaimable_memory(self) -> float:
+        '''
+        可以通过卸载空闲模型释放的内存, 计入心跳上报的可用内存
+        '''
+        now = time.monotonic()
+        return sum(r.memory for r in self._models.values() if self._unloadable(r, now))
+
+    def select_victims(
+        self,
+        model_uid: str,
+        memory: float,
+        budget: float,
+        cores: int = 0,
+        free_cores: int = 0,
+    ) -> List[str]:
+        '''
+        返回加载 model_uid 前需要卸载的模型, 按最近使用时间从旧到新
+        卸载后内存需在预算内, 且空闲核数 (free_cores 加上卸载模型释放的核) 不少于 cores
+        卸载全部空闲模型仍无法满足时抛出 RuntimeError, 此时不卸载任何模型
+        '''
+        resident = self.resident_memory()
+        if resident + memory <= budget and free_cores >= cores:
+            return []
+        now = time.monotonic()
+        candidates = sorted(
+            (r.last_active, uid, r.memory, r.cores)
+            for uid, r in self._models.items()
+            if uid != model_uid and self._unloadable(r, now)
+        )
+        victims = []
+        for _, uid, victim_memory, victim_cores in candidates:
+            if resident + memory <= budget and not victim_cores:
+                # 只缺少 CPU 核时, 不卸载未绑定核的模型
+                continue
+            victims.append(uid)
+            resident -= victim_memory
+            free_cores += victim_cores
+            if resident + memory <= budget and free_cores >= cores:
+                return victims
+        if free_cores < cores:
+            raise RuntimeError(
+                f"Cannot load model {model_uid}: it requires {cores} CPU cores, "
+                f"but only {free_cores} are free or held by idle models"
+            )
+        raise RuntimeError(
+            f"Cannot load model {model_uid}: it requires {memory / 2**20:.0f} MiB, "
+            f"but {self.resident_memory() / 2**20:.0f} MiB of the "
+            f"{budget / 2**20:.0f} MiB model memory budget is held by busy models"
+        )
@@ -1,37 +1,708 @@
+import glob
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import psutil
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# CPU 使用率 EMA 的半衰期 (秒)
+DEFAULT_CPU_USAGE_HALF_LIFE = 10.0
+
+PROC_ROOT = "/proc"
+CGROUP_ROOT = "/sys/fs/cgroup"
+NUMA_NODE_ROOT = "/sys/devices/system/node"
+SYS_BLOCK_ROOT = "/sys/block"
+# /proc/diskstats 中的扇区固定为 512 字节
+DISK_SECTOR_SIZE = 512
+
+@dataclass(slots=True)
 class ResourceStatus:
     '''
         Worker 所在节点资源信息
+            available 为使用率 (0-1), total 为核数 (GPU 为 1), 内存单位为字节
     '''
     available: float
     total: float
     memory_available: float
     memory_total: float
 
-def gather_node_info() -> Dict[str, ResourceStatus]:
-    '''
-    计算节点 CPU 和内存资源信息并返回
-    '''
-    node_resource = dict()
-    mem_info = psutil.virtual_memory()
-    node_resource["cpu"] = ResourceStatus(
-        available=psutil.cpu_percent() / 100.0,
-        total=psutil.cpu_count(),
-        memory_available=mem_info.available,
-        memory_total=mem_info.total,
-    )
-    # TODO: record GPU stats
-    # for idx, gpu_card_stat in enumerate(resource.cuda_card_stats()):
-    #     node_resource[f"gpu-{idx}"] = ResourceStatus(
-    #         available=gpu_card_stat.gpu_usage / 100.0,
-    #         total=1,
-    #         memory_available=gpu_card_stat.fb_mem_info.available,
-    #         memory_total=gpu_card_stat.fb_mem_info.total,
-    #     )
-
-    return node_resource
\ No newline at end of file
+
+class ProcFile:
+    '''
+    长期打开的 /proc、/sys 或 cgroup 文件, 每次用 pread 从头读取, 省去 open/close 的系统调用
+    文件不存在或不可读时 read 返回 None
+    '''
+
+    __slots__ = ("path", "_fd", "_size")
+
+    def __init__(self, path: str):
+        self.path = path
+        # 读取缓冲区按文件实际大小增长, 之后一次 pread 即可读完
+        self._size = 4096
+        try:
+            self._fd: Optional[int] = os.open(path, os.O_RDONLY)
+        except OSError:
+            self._fd = None
+
+    @property
+    def available(self) -> bool:
+        return self._fd is not None
+
+    def read(self) -> Optional[bytes]:
+        if self._fd is None:
+            return None
+        try:
+            data = os.pread(self._fd, self._size, 0)
+            if len(data) < self._size:
+                return data
+            chunks = [data]
+            offset = len(data)
+            while True:
+                chunk = os.pread(self._fd, self._size, offset)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                offset += len(chunk)
+            self._size = offset * 2
+            return b"".join(chunks)
+        except OSError:
+            return None
+
+    def read_int(self) -> Optional[int]:
+        data = self.read()
+        try:
+            return int(data) if data is not None else None
+        except ValueError:
+            return None
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _parse_key_values(data: bytes, key_index: int = 0) -> Dict[bytes, int]:
+    '''
+    解析 "key value [kB]" 格式的行 (meminfo、memory.stat、cpu.stat 等), 单位为 kB 时换算为字节
+    NUMA 节点的 meminfo 每行以 "Node N" 开头, key_index 为 2
+    '''
+    result = {}
+    for line in data.splitlines():
+        parts = line.split()
+        if len(parts) <= key_index + 1:
+            continue
+        value = int(parts[key_index + 1])
+        if parts[-1] == b"kB":
+            value *= 1024
+        result[parts[key_index].rstrip(b":")] = value
+    return result
+
+
+class _Ema:
+    '''
+    按两次采样的时间间隔加权的指数移动平均, 平滑结果与采样频率无关
+    '''
+
+    __slots__ = ("half_life", "value")
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self.value: Optional[float] = None
+
+    def update(self, value: float, elapsed: Optional[float]) -> float:
+        if self.value is None or not elapsed:
+            self.value = value
+        else:
+            alpha = 1.0 - 0.5 ** (elapsed / self.half_life)
+            self.value += alpha * (value - self.value)
+        return self.value
+
+
+class NodeSample:
+    '''
+    一次采样的结果, 由 NodeSampler 持有并在每次采样时原地更新
+        resources: 通过心跳上报 Supervisor 的资源 (cpu、numa-N、gpu-N)
+        metrics: 只在本节点导出的标量指标, 如 load_average.1m、disk.read (字节/秒)、cgroup.memory (字节)
+        per_core_usage: 每个逻辑核的使用率
+    '''
+
+    __slots__ = ("resources", "metrics", "per_core_usage")
+
+    def __init__(self):
+        self.resources: Dict[str, ResourceStatus] = {}
+        self.metrics: Dict[str, float] = {}
+        self.per_core_usage: np.ndarray = np.zeros(0)
+
+    def resource(self, name: str) -> ResourceStatus:
+        status = self.resources.get(name)
+        if status is None:
+            status = self.resources[name] = ResourceStatus(0.0, 0.0, 0.0, 0.0)
+        return status
+
+
+class Collector(ABC):
+    '''
+    节点遥测的数据源, 由 NodeSampler 依次调用 collect 原地更新采样结果
+    elapsed 为距上一次采样的秒数, 第一次采样时为 None
+    数据源在本节点不可用 (非 Linux、没有 cgroup 限制、单 NUMA 节点等) 时 available 为 False, 不会被调用
+    '''
+
+    available = True
+
+    @abstractmethod
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryCollector(Collector):
+    '''
+    节点内存, 记录在 cpu 资源的 memory_available/memory_total 中
+    '''
+
+    def __init__(self, proc_root: str = PROC_ROOT):
+        self._meminfo = ProcFile(os.path.join(proc_root, "meminfo"))
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        cpu = sample.resource("cpu")
+        data = self._meminfo.read()
+        meminfo = _parse_key_values(data) if data is not None else {}
+        if b"MemAvailable" in meminfo:
+            cpu.memory_total = float(meminfo[b"MemTotal"])
+            cpu.memory_available = float(meminfo[b"MemAvailable"])
+        else:
+            mem_info = psutil.virtual_memory()
+            cpu.memory_total = float(mem_info.total)
+            cpu.memory_available = float(mem_info.available)
+
+    def close(self):
+        self._meminfo.close()
+
+
+class CpuCollector(Collector):
+    '''
+    每个逻辑核与整个节点的 CPU 使用率, 由 /proc/stat 两次采样之间的 jiffies 差值计算
+    节点使用率做时间加权的 EMA, 第一次采样使用开机以来的平均值
+    '''
+
+    def __init__(
+        self,
+        proc_root: str = PROC_ROOT,
+        half_life: float = DEFAULT_CPU_USAGE_HALF_LIFE,
+    ):
+        self._stat = ProcFile(os.path.join(proc_root, "stat"))
+        self._usage = _Ema(half_life)
+        # 每个核累计的 (忙碌, 总计) 时间
+        self._last: Optional[np.ndarray] = None
+
+    def _read_times(self) -> np.ndarray:
+        data = self._stat.read()
+        if data is not None:
+            # user nice system idle iowait irq softirq steal, guest 已计入 user
+            rows = [
+                line.split()[1:9]
+                for line in data.splitlines()
+                if line.startswith(b"cpu") and line[3:4].isdigit()
+            ]
+            times = np.array(rows, dtype=np.float64)
+            total = times.sum(axis=1)
+            idle = times[:, 3] + times[:, 4]
+        else:
+            cpu_times = psutil.cpu_times(percpu=True)
+            total = np.array([sum(t) for t in cpu_times])
+            idle = np.array([t.idle + getattr(t, "iowait", 0.0) for t in cpu_times])
+        return np.stack((total - idle, total), axis=1)
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        times = self._read_times()
+        last = self._last
+        if last is None or last.shape != times.shape:
+            # 第一次采样或核数变化 (CPU 热插拔)
+            busy, total = times[:, 0], times[:, 1]
+            instant = busy.sum() / max(total.sum(), 1.0)
+            elapsed = None
+        else:
+            busy, total = times[:, 0] - last[:, 0], times[:, 1] - last[:, 1]
+            instant = busy.sum() / total.sum() if total.sum() > 0 else 0.0
+        self._last = times
+        sample.per_core_usage = np.divide(
+            busy, total, out=np.zeros_like(busy), where=total > 0
+        )
+        cpu = sample.resource("cpu")
+        cpu.total = float(len(times))
+        cpu.available = self._usage.update(float(instant), elapsed)
+
+    def close(self):
+        self._stat.close()
+
+
+def _parse_proc_self_cgroup(proc_root: str) -> Dict[str, str]:
+    '''
+    返回 controller -> 本进程所在 cgroup 路径, cgroup v2 的 controller 为空字符串
+    '''
+    result = {}
+    try:
+        with open(os.path.join(proc_root, "self", "cgroup")) as f:
+            for line in f:
+                _, controllers, path = line.rstrip("\n").split(":", 2)
+                for controller in controllers.split(","):
+                    result[controller] = path
+    except (OSError, ValueError):
+        pass
+    return result
+
+
+def _cgroup_dir(root: str, path: Optional[str]) -> str:
+    # 容器有独立的 cgroup namespace 时, /proc/self/cgroup 中的路径在挂载点下不存在, 使用挂载点本身
+    if path:
+        candidate = os.path.join(root, path.lstrip("/"))
+        if os.path.isdir(candidate):
+            return candidate
+    return root
+
+
+class CgroupCollector(Collector):
+    '''
+    容器内按 cgroup 的 CPU 配额与内存上限上报资源, 而不是宿主机的核数与内存
+    优先读取 cgroup v2 (cpu.max、cpu.stat、memory.max、memory.current、memory.stat), 否则回退到 v1
+    没有配额或上限时不修改 MemoryCollector 与 CpuCollector 的结果
+    内存用量不计可回收的 inactive_file 页缓存, 与 kubelet 的 working set 一致
+    '''
+
+    def __init__(self, root: str = CGROUP_ROOT, proc_root: str = PROC_ROOT):
+        paths = _parse_proc_self_cgroup(proc_root)
+        self._v2 = os.path.exists(os.path.join(root, "cgroup.controllers"))
+        if self._v2:
+            base = _cgroup_dir(root, paths.get(""))
+            self._cpu_max = ProcFile(os.path.join(base, "cpu.max"))
+            self._cpu_usage = ProcFile(os.path.join(base, "cpu.stat"))
+            self._memory_max = ProcFile(os.path.join(base, "memory.max"))
+            self._memory_usage = ProcFile(os.path.join(base, "memory.current"))
+            self._memory_stat = ProcFile(os.path.join(base, "memory.stat"))
+            self._inactive_file_key = b"inactive_file"
+        else:
+            cpu = _cgroup_dir(os.path.join(root, "cpu"), paths.get("cpu"))
+            cpuacct = _cgroup_dir(os.path.join(root, "cpuacct"), paths.get("cpuacct"))
+            memory = _cgroup_dir(os.path.join(root, "memory"), paths.get("memory"))
+            self._cpu_quota = ProcFile(os.path.join(cpu, "cpu.cfs_quota_us"))
+            self._cpu_period = ProcFile(os.path.join(cpu, "cpu.cfs_period_us"))
+            self._cpu_usage = ProcFile(os.path.join(cpuacct, "cpuacct.usage"))
+            self._memory_max = ProcFile(os.path.join(memory, "memory.limit_in_bytes"))
+            self._memory_usage = ProcFile(os.path.join(memory, "memory.usage_in_bytes"))
+            self._memory_stat = ProcFile(os.path.join(memory, "memory.stat"))
+            self._inactive_file_key = b"total_inactive_file"
+        self.available = self._memory_max.available or self._cpu_usage.available
+        self._usage = _Ema(DEFAULT_CPU_USAGE_HALF_LIFE)
+        # 上一次采样时 cgroup 累计的 CPU 时间 (秒)
+        self._last_cpu_seconds: Optional[float] = None
+
+    def _cpu_limit(self) -> Optional[float]:
+        if self._v2:
+            data = self._cpu_max.read()
+            if data is None:
+                return None
+            quota, _, period = data.strip().partition(b" ")
+            if quota == b"max" or not period:
+                return None
+            return int(quota) / int(period)
+        quota = self._cpu_quota.read_int()
+        period = self._cpu_period.read_int()
+        if quota is None or quota <= 0 or not period:
+            return None
+        return quota / period
+
+    def _cpu_seconds(self) -> Optional[float]:
+        if self._v2:
+            data = self._cpu_usage.read()
+            if data is None:
+                return None
+            usage = _parse_key_values(data).get(b"usage_usec")
+            return usage / 1e6 if usage is not None else None
+        usage = self._cpu_usage.read_int()
+        return usage / 1e9 if usage is not None else None
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        cpu = sample.resource("cpu")
+        limit = self._cpu_limit()
+        cpu_seconds = self._cpu_seconds()
+        if limit is not None and limit < cpu.total:
+            cpu.total = limit
+            sample.metrics["cgroup.cpu"] = limit
+            if cpu_seconds is not None and self._last_cpu_seconds is not None and elapsed:
+                usage = (cpu_seconds - self._last_cpu_seconds) / (elapsed * limit)
+                cpu.available = self._usage.update(min(max(usage, 0.0), 1.0), elapsed)
+        self._last_cpu_seconds = cpu_seconds
+
+        memory_max = self._memory_max.read()
+        if memory_max is None or memory_max.strip() == b"max":
+            return
+        memory_limit = float(int(memory_max))
+        # v1 没有上限时为接近 2^63 的值
+        if memory_limit >= cpu.memory_total:
+            return
+        used = float(self._memory_usage.read_int() or 0)
+        stat = self._memory_stat.read()
+        if stat is not None:
+            used -= _parse_key_values(stat).get(self._inactive_file_key, 0)
+        cpu.memory_total = memory_limit
+        cpu.memory_available = min(
+            cpu.memory_available, max(memory_limit - max(used, 0.0), 0.0)
+        )
+        sample.metrics["cgroup.memory"] = memory_limit
+
+    def close(self):
+        for f in (
+            getattr(self, name, None)
+            for name in (
+                "_cpu_max", "_cpu_quota", "_cpu_period", "_cpu_usage",
+                "_memory_max", "_memory_usage", "_memory_stat",
+            )
+        ):
+            if f is not None:
+                f.close()
+
+
+def _parse_cpu_list(text: str) -> List[int]:
+    '''
+    解析 "0-3,8-11" 格式的核列表
+    '''
+    cores: List[int] = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cores.extend(range(int(start), int(end or start) + 1))
+    return cores
+
+
+def get_numa_topology(root: str = NUMA_NODE_ROOT) -> Dict[int, List[int]]:
+    '''
+    返回 NUMA 节点编号 -> 所属的逻辑核, 没有 NUMA 信息 (非 Linux、容器未挂载 sysfs) 时返回空字典
+    '''
+    topology = {}
+    for path in glob.glob(os.path.join(root, "node[0-9]*")):
+        try:
+            with open(os.path.join(path, "cpulist")) as f:
+                cores = _parse_cpu_list(f.read())
+        except (OSError, ValueError):
+            continue
+        topology[int(os.path.basename(path)[4:])] = cores
+    return dict(sorted(topology.items()))
+
+
+class NumaCollector(Collector):
+    '''
+    每个 NUMA 节点的内存与所属核的平均使用率, 上报为 numa-N 资源, 需在 CpuCollector 之后调用
+    只有一个 NUMA 节点时与 cpu 资源重复, 不上报
+    可用内存按 MemFree + FilePages - Shmem 估计 (页缓存可回收, 共享内存不可)
+    '''
+
+    def __init__(self, root: str = NUMA_NODE_ROOT):
+        self._nodes: List[Tuple[str, ProcFile, np.ndarray]] = []
+        for node, cores in get_numa_topology(root).items():
+            meminfo = ProcFile(os.path.join(root, f"node{node}", "meminfo"))
+            if meminfo.available:
+                self._nodes.append(
+                    (f"numa-{node}", meminfo, np.array(cores, dtype=np.intp))
+                )
+        self.available = len(self._nodes) > 1
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        per_core = sample.per_core_usage
+        for name, meminfo, cores in self._nodes:
+            data = meminfo.read()
+            if data is None:
+                continue
+            info = _parse_key_values(data, key_index=2)
+            status = sample.resource(name)
+            status.total = float(len(cores))
+            valid = cores[cores < len(per_core)]
+            status.available = float(per_core[valid].mean()) if len(valid) else 0.0
+            status.memory_total = float(info.get(b"MemTotal", 0))
+            status.memory_available = float(
+                info.get(b"MemFree", 0) + info.get(b"FilePages", 0) - info.get(b"Shmem", 0)
+            )
+
+    def close(self):
+        for _, meminfo, _ in self._nodes:
+            meminfo.close()
+
+
+class LoadAverageCollector(Collector):
+    def __init__(self, proc_root: str = PROC_ROOT):
+        self._loadavg = ProcFile(os.path.join(proc_root, "loadavg"))
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        data = self._loadavg.read()
+        if data is not None:
+            load = [float(v) for v in data.split()[:3]]
+        else:
+            load = list(os.getloadavg())
+        for period, value in zip(("1m", "5m", "15m"), load):
+            sample.metrics[f"load_average.{period}"] = value
+
+    def close(self):
+        self._loadavg.close()
+
+
+class _RateCollector(Collector):
+    '''
+    由累计计数器计算每秒速率, 第一次采样时速率为 0
+    '''
+
+    names: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self._last: Optional[Tuple[int, ...]] = None
+
+    @abstractmethod
+    def _read_counters(self) -> Optional[Tuple[int, ...]]:
+        pass
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        counters = self._read_counters()
+        if counters is None:
+            return
+        last, self._last = self._last, counters
+        for i, name in enumerate(self.names):
+            if last is None or not elapsed:
+                sample.metrics[name] = 0.0
+            else:
+                # 计数器回绕或设备移除时差值为负, 记为 0
+                sample.metrics[name] = max(counters[i] - last[i], 0) / elapsed
+
+
+class DiskCollector(_RateCollector):
+    '''
+    整盘 (不含分区与 loop/ram 设备) 的读写吞吐, 单位为字节/秒
+    '''
+
+    names = ("disk.read", "disk.write")
+
+    def __init__(self, proc_root: str = PROC_ROOT, block_root: str = SYS_BLOCK_ROOT):
+        super().__init__()
+        self._diskstats = ProcFile(os.path.join(proc_root, "diskstats"))
+        try:
+            devices = os.listdir(block_root)
+        except OSError:
+            devices = []
+        self._devices = {
+            name.encode() for name in devices if not name.startswith(("loop", "ram"))
+        }
+        self.available = self._diskstats.available
+
+    def _read_counters(self) -> Optional[Tuple[int, ...]]:
+        data = self._diskstats.read()
+        if data is None:
+            return None
+        read = written = 0
+        for line in data.splitlines():
+            parts = line.split()
+            if len(parts) > 9 and parts[2] in self._devices:
+                read += int(parts[5])
+                written += int(parts[9])
+        return read * DISK_SECTOR_SIZE, written * DISK_SECTOR_SIZE
+
+    def close(self):
+        self._diskstats.close()
+
+
+class NetworkCollector(_RateCollector):
+    '''
+    除 lo 以外所有网卡的收发吞吐, 单位为字节/秒
+    '''
+
+    names = ("network.recv", "network.sent")
+
+    def __init__(self, proc_root: str = PROC_ROOT):
+        super().__init__()
+        self._dev = ProcFile(os.path.join(proc_root, "net", "dev"))
+        self.available = self._dev.available
+
+    def _read_counters(self) -> Optional[Tuple[int, ...]]:
+        data = self._dev.read()
+        if data is None:
+            return None
+        recv = sent = 0
+        # 前两行为表头
+        for line in data.splitlines()[2:]:
+            name, _, fields = line.partition(b":")
+            if name.strip() == b"lo":
+                continue
+            values = fields.split()
+            recv += int(values[0])
+            sent += int(values[8])
+        return recv, sent
+
+    def close(self):
+        self._dev.close()
+
+
+class GpuProvider(ABC):
+    '''
+    GPU 遥测的提供方, read 返回每张卡的 (使用率, 可用显存, 总显存)
+    '''
+
+    @abstractmethod
+    def read(self) -> Sequence[Tuple[float, float, float]]:
+        pass
+
+    def close(self):
+        pass
+
+
+class NvmlGpuProvider(GpuProvider):
+    '''
+    通过 NVML 读取 GPU 使用率与显存, 需要安装可选依赖: pip install nvidia-ml-py
+    '''
+
+    def __init__(self):
+        import pynvml
+
+        pynvml.nvmlInit()
+        self._nvml = pynvml
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+
+    def read(self) -> Sequence[Tuple[float, float, float]]:
+        result = []
+        for handle in self._handles:
+            utilization = self._nvml.nvmlDeviceGetUtilizationRates(handle)
+            memory = self._nvml.nvmlDeviceGetMemoryInfo(handle)
+            result.append(
+                (utilization.gpu / 100.0, float(memory.free), float(memory.total))
+            )
+        return result
+
+    def close(self):
+        self._nvml.nvmlShutdown()
+
+
+class StubGpuProvider(GpuProvider):
+    '''
+    没有 GPU 或驱动的环境 (开发、测试、benchmark) 中的替身, 报告固定数量的空闲设备
+    '''
+
+    def __init__(self, count: int = 1, memory_total: float = 24 * 2**30):
+        self._devices = [(0.0, float(memory_total), float(memory_total))] * count
+
+    def read(self) -> Sequence[Tuple[float, float, float]]:
+        return self._devices
+
+
+def get_gpu_provider() -> Optional[GpuProvider]:
+    '''
+    有 CUDA 设备且安装了 NVML 绑定时返回 NvmlGpuProvider, 否则不采集 GPU
+    '''
+    from ..utils import cuda_count
+
+    if cuda_count() == 0:
+        return None
+    try:
+        return NvmlGpuProvider()
+    except ImportError:
+        logger.info("pynvml is not installed, GPU stats are not reported")
+    except Exception as e:
+        logger.warning("Failed to initialize NVML, GPU stats are not reported: %s", e)
+    return None
+
+
+class GpuCollector(Collector):
+    '''
+    每张 GPU 上报为 gpu-N 资源, total 为 1
+    '''
+
+    def __init__(self, provider: GpuProvider):
+        self._provider = provider
+
+    def collect(self, sample: NodeSample, elapsed: Optional[float]):
+        for i, (usage, memory_available, memory_total) in enumerate(
+            self._provider.read()
+        ):
+            status = sample.resource(f"gpu-{i}")
+            status.available = usage
+            status.total = 1.0
+            status.memory_available = memory_available
+            status.memory_total = memory_total
+
+    def close(self):
+        self._provider.close()
+
+
+def default_collectors(
+    extended: bool = True, gpu_provider: Optional[GpuProvider] = None
+) -> List[Collector]:
+    '''
+    默认的数据源, 顺序即调用顺序: cgroup 依赖节点级的核数与内存, NUMA 依赖每核使用率
+    extended 为 False 时只采集心跳需要的资源, 不采集负载、磁盘与网络
+    '''
+    collectors: List[Collector] = [
+        MemoryCollector(),
+        CpuCollector(),
+        CgroupCollector(),
+        NumaCollector(),
+    ]
+    if gpu_provider is not None:
+        collectors.append(GpuCollector(gpu_provider))
+    if extended:
+        collectors.extend([LoadAverageCollector(), DiskCollector(), NetworkCollector()])
+    return collectors
+
+
+class NodeSampler:
+    '''
+    长期存在的节点遥测采样器
+    数据源在创建时打开所需的文件并一直持有, 每次采样只有 pread 与解析, 开销低到可以直接在事件循环中调用
+    采样结果 (包括其中的 ResourceStatus) 被原地更新, 调用方如需保留需自行复制
+    '''
+
+    def __init__(self, collectors: Optional[List[Collector]] = None):
+        if collectors is None:
+            collectors = default_collectors()
+        self._collectors = [c for c in collectors if c.available]
+        self._sample = NodeSample()
+        self._last_time: Optional[float] = None
+
+    def sample(self) -> NodeSample:
+        now = time.monotonic()
+        elapsed = None if self._last_time is None else now - self._last_time
+        self._last_time = now
+        for collector in self._collectors:
+            try:
+                collector.collect(self._sample, elapsed)
+            except Exception:  # pragma: no cover
+                logger.debug(
+                    "Failed to collect %s", type(collector).__name__, exc_info=True
+                )
+        return self._sample
+
+    def close(self):
+        for collector in self._collectors:
+            collector.close()
+        self._collectors = []
+
+
+def gather_node_info(
+    sampler: Optional[NodeSampler] = None,
+) -> Dict[str, ResourceStatus]:
+    '''
+    计算节点 CPU 和内存 (以及 NUMA 节点、GPU) 资源信息并返回
+    指定 sampler 时返回其原地更新的结果, 否则创建临时的采样器, CPU 使用率为开机以来的平均值
+    '''
+    if sampler is not None:
+        return sampler.sample().resources
+    sampler = NodeSampler(default_collectors(extended=False))
+    try:
+        return sampler.sample().resources
+    finally:
+        sampler.close()
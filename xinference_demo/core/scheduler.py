@@ -0,0 +1,488 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from logging import getLogger
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..constants import XINFERENCE_PREFIX_CACHE_SIZE
+from ..model.llm.stop import compile_stop_matcher
+from .prefix_cache import PrefixCache
+
+logger = getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 32
+# 前缀 K/V 缓存的内存上限 (字节)
+DEFAULT_PREFIX_CACHE_BYTES = int(XINFERENCE_PREFIX_CACHE_SIZE * 2**20)
+# 流式请求最多缓存的未被消费的输出块数, 缓冲区满时该序列暂停生成
+DEFAULT_STREAM_BUFFER_SIZE = 8
+# embedding 动态批处理: 一个 batch 最多包含的输入条数, 以及第一个请求最多等待的时间 (秒)
+DEFAULT_EMBEDDING_MAX_BATCH_SIZE = 64
+DEFAULT_EMBEDDING_MAX_WAIT = 0.005
+
+
+class InferenceRequest:
+    '''
+    一次生成请求在调度器中的状态
+    由 ModelActor 创建, 调度器在每个 decode 迭代中推进, 结束后通过 future 返回
+    流式请求每个迭代向有界缓冲区 stream 写入 (新增文本, finish_reason)
+    输出文本以文本块列表保存, 可能是停止词开头的尾部文本暂缓输出, 确认不是停止词后再写入
+    '''
+
+    def __init__(
+        self,
+        prompt_tokens: List[int],
+        max_tokens: int,
+        temperature: float = 0.0,
+        stop: Optional[List[str]] = None,
+        stop_token_ids: Optional[Set[int]] = None,
+        stream: bool = False,
+        stream_buffer_size: int = DEFAULT_STREAM_BUFFER_SIZE,
+    ):
+        self.request_id = uuid.uuid4().hex
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.stop = [s for s in (stop or []) if s]
+        self.stop_token_ids = stop_token_ids or set()
+        self.stop_matcher = compile_stop_matcher(self.stop)
+        self.stop_state = 0
+        self.output_tokens: List[int] = []
+        self.text_chunks: List[str] = []
+        self.holdback = ""
+        self.finish_reason: Optional[str] = None
+        self.aborted = False
+        self.state: Any = None
+        self.detokenizer: Any = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.stream: Optional[asyncio.Queue] = (
+            asyncio.Queue(maxsize=stream_buffer_size) if stream else None
+        )
+        # 已写入流式缓冲区的文本块数
+        self.emitted = 0
+        self.arrival_time = time.perf_counter()
+        self.first_token_time: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_chunks)
+
+    @property
+    def finished(self) -> bool:
+        return self.finish_reason is not None or self.aborted
+
+    @property
+    def paused(self) -> bool:
+        '''
+        流式请求的缓冲区已满 (客户端消费过慢), 暂不参与 decode
+        '''
+        return self.stream is not None and self.stream.full()
+
+
+class ContinuousBatchingScheduler:
+    '''
+    迭代级 (iteration-level) 连续批处理调度器, 运行在 ModelActor 所在的子进程中
+    每个 decode 迭代:
+        1. 从等待队列中接纳新请求并执行 prefill, 新请求在下一步即加入 batch
+        2. 对 batch 中的全部序列向量化采样下一个 token
+        3. 已结束的序列离开 batch, 其余序列执行一次 decode
+    模型计算在线程中执行, 不阻塞 actor 接收新请求
+    流式输出缓冲区已满的序列被暂停, 直到客户端消费后再恢复, 避免无限制地积压 token
+    模型支持导出 K/V (export_kv) 时, prefill 复用前缀缓存中最长的已计算前缀
+    '''
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        seed: Optional[int] = None,
+        prefix_cache_bytes: int = DEFAULT_PREFIX_CACHE_BYTES,
+    ):
+        self._model = model
+        self._max_batch_size = max_batch_size
+        self._prefix_cache: Optional[PrefixCache] = (
+            PrefixCache(prefix_cache_bytes)
+            if prefix_cache_bytes > 0 and hasattr(model, "export_kv")
+            else None
+        )
+        self._waiting: Deque[InferenceRequest] = deque()
+        self._running: List[InferenceRequest] = []
+        self._has_work = asyncio.Event()
+        self._rng = np.random.default_rng(seed)
+        self._task: Optional[asyncio.Task] = None
+        self._num_steps = 0
+        self._num_generated_tokens = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for req in list(self._waiting) + self._running:
+            self._fail(req, RuntimeError("Model is stopped"))
+        self._waiting.clear()
+        self._running = []
+
+    def add_request(self, req: InferenceRequest):
+        self._waiting.append(req)
+        self._has_work.set()
+
+    def abort_request(self, req: InferenceRequest):
+        '''
+        取消请求, 序列在下一次迭代时离开 batch
+        '''
+        req.aborted = True
+        self._has_work.set()
+
+    def notify_consumed(self):
+        '''
+        流式请求的缓冲区被消费后调用, 唤醒可能因全部序列暂停而等待的调度循环
+        '''
+        self._has_work.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = {
+            "num_running": len(self._running),
+            "num_waiting": len(self._waiting),
+            "num_steps": self._num_steps,
+            "num_generated_tokens": self._num_generated_tokens,
+        }
+        if self._prefix_cache is not None:
+            stats.update(self._prefix_cache.get_stats())
+        return stats
+
+    async def _run(self):
+        while True:
+            await self._has_work.wait()
+            self._retire_aborted()
+            admitted = self._admit()
+            active = [req for req in self._running if not req.paused]
+            if not admitted and not active:
+                self._has_work.clear()
+                continue
+            try:
+                await asyncio.to_thread(self._step, admitted, active)
+            except Exception as e:
+                logger.exception("Decode step failed")
+                for req in admitted + self._running:
+                    self._fail(req, e)
+                self._running = []
+                continue
+            self._num_steps += 1
+            running = []
+            for req in self._running + admitted:
+                if req.stream is not None:
+                    self._emit(req)
+                if req.finished:
+                    self._on_finished(req)
+                else:
+                    running.append(req)
+            self._running = running
+
+    def _retire_aborted(self):
+        running = []
+        for req in self._running:
+            if req.aborted:
+                self._on_finished(req)
+            else:
+                running.append(req)
+        self._running = running
+
+    def _admit(self) -> List[InferenceRequest]:
+        admitted = []
+        capacity = self._max_batch_size - len(self._running)
+        while self._waiting and len(admitted) < capacity:
+            req = self._waiting.popleft()
+            if req.aborted:
+                self._on_finished(req)
+                continue
+            admitted.append(req)
+        return admitted
+
+    def _on_finished(self, req: InferenceRequest):
+        if not req.future.done():
+            req.future.set_result(req)
+
+    @staticmethod
+    def _emit(req: InferenceRequest):
+        '''
+        将本次迭代新增的文本写入流式缓冲区
+        只对未暂停的序列执行迭代, 因此每次写入时缓冲区至少有一个空位
+        '''
+        if req.aborted:
+            return
+        delta = "".join(req.text_chunks[req.emitted :])
+        if delta or req.finish_reason is not None:
+            req.stream.put_nowait((delta, req.finish_reason))
+            req.emitted = len(req.text_chunks)
+
+    @staticmethod
+    def _fail(req: InferenceRequest, error: Exception):
+        if req.stream is not None:
+            # 出错时必须让消费者感知, 缓冲区已满则丢弃最早的输出块
+            if req.stream.full():
+                req.stream.get_nowait()
+            req.stream.put_nowait(error)
+        elif not req.future.done():
+            req.future.set_exception(error)
+
+    def _step(self, admitted: List[InferenceRequest], running: List[InferenceRequest]):
+        '''
+        在线程中执行的一个调度迭代
+        '''
+        model = self._model
+        for req in admitted:
+            req.state = self._prefill(req.prompt_tokens)
+            req.detokenizer = model.detokenizer()
+
+        batch = [req for req in running + admitted if not req.aborted]
+        if not batch:
+            return
+        logits = np.stack([req.state.logits for req in batch])
+        temperatures = np.array([req.temperature for req in batch], dtype=np.float32)
+        tokens = self._sample(logits, temperatures)
+
+        now = time.perf_counter()
+        to_decode = []
+        for req, token in zip(batch, tokens.tolist()):
+            if req.first_token_time is None:
+                req.first_token_time = now
+            self._append_token(req, token)
+            if not req.finished:
+                to_decode.append(req)
+        self._num_generated_tokens += len(batch)
+
+        if to_decode:
+            model.decode(
+                [req.state for req in to_decode],
+                [req.output_tokens[-1] for req in to_decode],
+            )
+
+    def _prefill(self, prompt_tokens: List[int]) -> Any:
+        '''
+        跳过前缀缓存中已有的前缀, 只对剩余的 token 执行 prefill, 之后把 prompt 的 K/V 加入缓存
+        '''
+        model = self._model
+        cache = self._prefix_cache
+        if cache is None:
+            return model.prefill(prompt_tokens)
+        _, segments = cache.match(prompt_tokens)
+        state = model.prefill(prompt_tokens, segments)
+        cache.insert(
+            prompt_tokens, lambda start, end: model.export_kv(state, start, end)
+        )
+        return state
+
+    def _append_token(self, req: InferenceRequest, token: int):
+        if token == self._model.eos_token_id or token in req.stop_token_ids:
+            self._finish(
+                req, "stop", req.detokenizer.decode(self._model.eos_token_id)
+            )
+            return
+        req.output_tokens.append(token)
+        delta = req.detokenizer.decode(token)
+        if delta:
+            self._append_text(req, delta)
+            if req.finished:
+                return
+        if (
+            len(req.output_tokens) >= req.max_tokens
+            or len(req.prompt_tokens) + len(req.output_tokens)
+            >= self._model.context_length
+        ):
+            self._finish(req, "length")
+
+    @staticmethod
+    def _append_text(req: InferenceRequest, delta: str):
+        '''
+        停止词自动机逐字符读入新增文本, 每个 token 的开销只与新增文本及停止词长度有关
+        找到停止词时截断并结束; 否则输出除尾部可能是停止词开头的部分以外的文本
+        '''
+        matcher = req.stop_matcher
+        if matcher is None:
+            req.text_chunks.append(delta)
+            return
+        pending = req.holdback + delta
+        req.stop_state, end, length = matcher.feed(req.stop_state, delta)
+        if end >= 0:
+            # 停止词可能从暂缓输出的文本开始
+            start = len(req.holdback) + end - length
+            if start:
+                req.text_chunks.append(pending[:start])
+            req.holdback = ""
+            req.finish_reason = "stop"
+            return
+        keep = matcher.depth(req.stop_state)
+        if len(pending) > keep:
+            req.text_chunks.append(pending[: len(pending) - keep])
+        req.holdback = pending[len(pending) - keep :] if keep else ""
+
+    @staticmethod
+    def _finish(req: InferenceRequest, finish_reason: str, text: str = ""):
+        '''
+        没有遇到停止词而结束时, 暂缓输出的文本属于正常输出
+        '''
+        text = req.holdback + text
+        if text:
+            req.text_chunks.append(text)
+        req.holdback = ""
+        req.finish_reason = finish_reason
+
+    def _sample(self, logits: np.ndarray, temperatures: np.ndarray) -> np.ndarray:
+        '''
+        对整个 batch 向量化采样: temperature 为 0 时取 argmax, 否则使用 Gumbel-max 采样
+        '''
+        greedy = temperatures <= 0
+        if greedy.all():
+            return logits.argmax(axis=1)
+        t = np.where(greedy, 1.0, temperatures)[:, None]
+        noise = self._rng.gumbel(size=logits.shape).astype(np.float32)
+        scores = np.where(greedy[:, None], logits, logits / t + noise)
+        return scores.argmax(axis=1)
+
+
+class EmbeddingRequest:
+    '''
+    一次 embedding 请求在批处理器中的状态, 结果为 (向量矩阵, 各输入的 token 数)
+    '''
+
+    __slots__ = ("texts", "future", "arrival_time")
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = texts
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.arrival_time = time.monotonic()
+
+
+class EmbeddingBatcher:
+    '''
+    embedding 的动态批处理 (micro-batching) 调度器, 运行在 ModelActor 所在的子进程中
+    并发请求的输入被合并为一个 batch, 在以下任一条件满足时提交给模型:
+        1. 等待中的输入条数达到 max_batch_size
+        2. 最早到达的请求已等待 max_wait 秒
+    模型计算在线程中执行, 计算期间到达的请求组成下一个 batch
+    单个请求的输入不会被拆分到多个 batch 中
+    '''
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = DEFAULT_EMBEDDING_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_EMBEDDING_MAX_WAIT,
+    ):
+        self._model = model
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._waiting: Deque[EmbeddingRequest] = deque()
+        self._num_waiting_texts = 0
+        self._running: List[EmbeddingRequest] = []
+        self._has_work = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._num_batches = 0
+        self._num_texts = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for req in list(self._waiting) + self._running:
+            if not req.future.done():
+                req.future.set_exception(RuntimeError("Model is stopped"))
+        self._waiting.clear()
+        self._running = []
+        self._num_waiting_texts = 0
+
+    async def encode(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        req = EmbeddingRequest(texts)
+        self._waiting.append(req)
+        self._num_waiting_texts += len(texts)
+        self._has_work.set()
+        if self._num_waiting_texts >= self._max_batch_size:
+            self._batch_full.set()
+        # 请求被取消时 future 随之取消, 批处理器组 batch 时跳过
+        return await req.future
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "num_waiting": len(self._waiting),
+            "num_batches": self._num_batches,
+            "num_texts": self._num_texts,
+        }
+
+    async def _run(self):
+        while True:
+            await self._has_work.wait()
+            if self._num_waiting_texts < self._max_batch_size:
+                timeout = (
+                    self._waiting[0].arrival_time + self._max_wait - time.monotonic()
+                )
+                if timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._batch_full.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            batch = self._take_batch()
+            if not self._waiting:
+                self._has_work.clear()
+            if self._num_waiting_texts < self._max_batch_size:
+                self._batch_full.clear()
+            if not batch:
+                continue
+
+            texts = [text for req in batch for text in req.texts]
+            self._running = batch
+            try:
+                vectors, token_counts = await asyncio.to_thread(
+                    self._model.encode, texts
+                )
+            except Exception as e:
+                self._running = []
+                logger.exception("Embedding batch failed")
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(e)
+                continue
+            self._running = []
+            self._num_batches += 1
+            self._num_texts += len(texts)
+            offset = 0
+            for req in batch:
+                n = len(req.texts)
+                if not req.future.done():
+                    req.future.set_result(
+                        (vectors[offset : offset + n], token_counts[offset : offset + n])
+                    )
+                offset += n
+
+    def _take_batch(self) -> List[EmbeddingRequest]:
+        batch: List[EmbeddingRequest] = []
+        num_texts = 0
+        while self._waiting:
+            req = self._waiting[0]
+            if batch and num_texts + len(req.texts) > self._max_batch_size:
+                break
+            self._waiting.popleft()
+            self._num_waiting_texts -= len(req.texts)
+            if req.future.done():
+                continue
+            batch.append(req)
+            num_texts += len(req.texts)
+        return batch
@@ -1,16 +1,34 @@
 import asyncio
+import itertools
 import time
 from dataclasses import dataclass
 from logging import getLogger
-from typing import TYPE_CHECKING, Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Set, Tuple
 
 import xoscar as xo
 
+from ..constants import (
+    XINFERENCE_HEALTH_CHECK_ATTEMPTS,
+    XINFERENCE_HEALTH_CHECK_INTERVAL,
+    XINFERENCE_MODEL_CPU_CORES,
+    XINFERENCE_PLACEMENT_POLICY,
+    XINFERENCE_RESOURCE_HISTORY_INTERVAL,
+    XINFERENCE_RESOURCE_HISTORY_SIZE,
+)
+from .heartbeat import HeartbeatDecoder, HeartbeatMessage
+from .load_index import WorkerLoadIndex
+from .placement import PlacementEngine, ResourceRequest
 from .resource import ResourceStatus
+from .timeseries import DEFAULT_PERCENTILES, TimeSeriesRing
 from .utils import (
+    build_replica_model_uid,
+    gen_random_string,
+    iter_replica_model_uid,
     log_async,
-    log_sync
+    log_sync,
+    parse_replica_model_uid,
 )
+from .worker import DEFAULT_NODE_HEARTBEAT_INTERVAL
 
 # 当开启类型检查时，导入以下模块
 if TYPE_CHECKING:
@@ -19,10 +37,23 @@ if TYPE_CHECKING:
     # from ..model.llm import LLMFamilyV1
     # from ..model.multimodal import LVLMFamilyV1
     # from ..model.rerank import RerankModelSpec
+    from .model import ModelActor
     from .worker import WorkerActor
 
 logger = getLogger(__name__)
 
+# 连续错过 3 次心跳后, 负载索引中的 Worker 条目被标记为 stale
+# 心跳间隔随负载自适应, 以下超时时间为下限, 实际按 Worker 声明的心跳间隔计算
+DEFAULT_WORKER_STALE_TIMEOUT = 3 * DEFAULT_NODE_HEARTBEAT_INTERVAL
+# 连续错过 XINFERENCE_HEALTH_CHECK_ATTEMPTS 次心跳后, Worker 被驱逐, 其上的副本迁移到其他 Worker
+DEFAULT_WORKER_EVICT_TIMEOUT = (
+    XINFERENCE_HEALTH_CHECK_ATTEMPTS * DEFAULT_NODE_HEARTBEAT_INTERVAL
+)
+
+def _get_host(address: str) -> str:
+    return address.rsplit(":", 1)[0]
+
+
 @dataclass
 class WorkerStatus:
     '''
@@ -33,20 +64,60 @@ class WorkerStatus:
     update_time: float
     status: Dict[str, ResourceStatus]
 
+@dataclass
+class ReplicaInfo:
+    '''
+        模型副本信息：
+            副本数量
+            轮询选择副本的迭代器
+            启动参数 (模型名称、类型、资源需求等)
+            generation: 每次启动的唯一编号, 以相同 uid 重新启动的模型编号不同
+    '''
+    replica: int
+    scheduler: Iterator
+    launch_args: Dict[str, Any]
+    generation: int
+
 class SupervisorActor(xo.StatelessActor):
     '''
     一个集群只有一个 SupervisorActor 实例, 用于管理集群中各个节点的 WorkerActor
     SupervisorActor 聚合 WorkerActor, 维护 WorkerActor 的状态信息
     '''
 
-    def __init__(self):
+    def __init__(
+        self,
+        placement_policy: Optional[str] = None,
+        evict_timeout: float = DEFAULT_WORKER_EVICT_TIMEOUT,
+        health_check_interval: float = XINFERENCE_HEALTH_CHECK_INTERVAL,
+        history_interval: float = XINFERENCE_RESOURCE_HISTORY_INTERVAL,
+        history_size: int = XINFERENCE_RESOURCE_HISTORY_SIZE,
+    ):
         super().__init__()
         self._worker_address_to_worker: Dict[str, xo.ActorRefType["WorkerActor"]] = {}
         self._worker_status: Dict[str, WorkerStatus] = {}
+        self._heartbeats: Dict[str, HeartbeatDecoder] = {}
+        self._load_index = WorkerLoadIndex(stale_timeout=DEFAULT_WORKER_STALE_TIMEOUT)
+        self._placement = PlacementEngine(
+            self._load_index, policy=placement_policy or XINFERENCE_PLACEMENT_POLICY
+        )
         self._replica_model_uid_to_worker: Dict[
             str, xo.ActorRefType["WorkerActor"]
         ] = {}
-        # self._model_uid_to_replica_info: Dict[str, ReplicaInfo] = {}
+        self._model_uid_to_replica_info: Dict[str, ReplicaInfo] = {}
+        self._evict_timeout = evict_timeout
+        self._health_check_interval = health_check_interval
+        self._health_check_task: Optional[asyncio.Task] = None
+        # 每个 Worker 的资源历史, 按固定周期采样, 与心跳间隔无关
+        self._history: Dict[str, TimeSeriesRing] = {}
+        self._history_interval = history_interval
+        self._history_size = history_size
+        self._history_task: Optional[asyncio.Task] = None
+        # 已驱逐但可能仍在运行的 Worker, 心跳恢复后重新接纳
+        self._evicted_workers: Set[str] = set()
+        # 所在 Worker 被驱逐, 等待重新放置的副本
+        self._pending_replicas: Set[str] = set()
+        self._relaunching_replicas: Set[str] = set()
+        self._relaunch_tasks: Set[asyncio.Task] = set()
         self._uptime = None
         self._lock = asyncio.Lock()
 
@@ -56,6 +127,15 @@ class SupervisorActor(xo.StatelessActor):
     
     async def __post_create__(self):
         self._uptime = time.time()
+        self._health_check_task = asyncio.create_task(self._check_workers_health())
+        if self._history_interval > 0 and self._history_size > 0:
+            self._history_task = asyncio.create_task(self._record_history())
+
+    async def __pre_destroy__(self):
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+        if self._history_task is not None:
+            self._history_task.cancel()
 
     @staticmethod
     async def get_builtin_prompts() -> Dict[str, Any]:
@@ -87,34 +167,280 @@ class SupervisorActor(xo.StatelessActor):
 
         if self.is_local_deployment():
             return cuda_count()
-        # distributed deployment, choose a worker and return its cuda_count.
-        # Assume that each worker has the same count of cards.
-        worker_ref = await self._choose_worker()
-        return await worker_ref.get_devices_count()
+        # distributed deployment: 同一节点上的 Worker 共享该节点的设备, 每个节点只询问一个 Worker
+        workers_by_host: Dict[str, xo.ActorRefType["WorkerActor"]] = {}
+        for address, worker_ref in self._worker_address_to_worker.items():
+            workers_by_host.setdefault(_get_host(address), worker_ref)
+        if not workers_by_host:
+            raise RuntimeError("No available worker found")
+        counts = await asyncio.gather(
+            *(worker_ref.get_devices_count() for worker_ref in workers_by_host.values())
+        )
+        return sum(counts)
+
+    def _gen_model_uid(self, model_name: str) -> str:
+        if model_name not in self._model_uids():
+            return model_name
+        logger.debug(
+            f"{model_name} exists in xinference. Generate suffix to {model_name} for model_uid."
+        )
+        return f"{model_name}-{gen_random_string(8)}"
+
+    def _model_uids(self) -> List[str]:
+        return list(self._model_uid_to_replica_info)
+
+    @log_async(logger=logger)
+    async def launch_builtin_model(
+        self,
+        model_uid: Optional[str],
+        model_name: str,
+        model_type: str = "LLM",
+        replica: int = 1,
+        **kwargs,
+    ) -> str:
+        '''
+        被 restful_api 调用
+        根据模型的资源需求与 Worker 上报的资源信息选择 Worker 启动模型, 返回 model_uid
+        replica > 1 时各副本优先放置到不同的 Worker 上, 副本并发启动
+        可选参数:
+            memory_required: 覆盖模型预计占用的内存 (字节)
+            n_cpu: 模型独占的 CPU 核数, 为整数时 Worker 为模型分配同样数量的独占核并绑定, 放置时计入节点核数,
+                默认为 Supervisor 的 XINFERENCE_MODEL_CPU_CORES (0 或非整数表示不绑定, 与其他模型共享所有核, 不计入)
+            placement_policy: 本次放置使用的策略 (spread / pack)
+        '''
+        from ..model.core import estimate_model_resource
+
+        memory_required = kwargs.pop("memory_required", None)
+        # n_cpu 同时传给 Worker 用于绑定 CPU 核
+        # 未指定时在这里解析默认核数并显式传给 Worker, 放置与绑定使用同一数值, 不依赖各 Worker 的环境变量
+        n_cpu = kwargs.get("n_cpu")
+        if n_cpu is None:
+            n_cpu = kwargs["n_cpu"] = XINFERENCE_MODEL_CPU_CORES
+        # 与 Worker 一致: 只有整数个核才绑定
+        n_cpu = float(n_cpu)
+        pinned_cpu = int(n_cpu) if n_cpu.is_integer() else 0
+        placement_policy = kwargs.pop("placement_policy", None)
+
+        if replica < 1:
+            raise ValueError(f"Invalid replica: {replica}, it must be at least 1")
+        if model_uid is None:
+            model_uid = self._gen_model_uid(model_name)
+        if model_uid in self._model_uid_to_replica_info:
+            raise ValueError(f"Model is already in the model list, uid: {model_uid}")
+
+        estimated_memory, _ = estimate_model_resource(
+            model_type, model_name, kwargs.get("prefix_cache_size")
+        )
+        request = ResourceRequest(
+            memory=estimated_memory if memory_required is None else memory_required,
+            cpu=pinned_cpu,
+        )
+
+        # 先登记副本信息, 防止并发启动同名模型
+        self._model_uid_to_replica_info[model_uid] = ReplicaInfo(
+            replica=replica,
+            scheduler=itertools.cycle(range(replica)),
+            launch_args=dict(
+                model_name=model_name,
+                model_type=model_type,
+                request=request,
+                placement_policy=placement_policy,
+                kwargs=kwargs,
+            ),
+            # 使用纳秒时间戳, Supervisor 重启后也不会与之前的编号重复
+            generation=time.time_ns(),
+        )
+        placed: List[tuple] = []
+        try:
+            used: Set[str] = set()
+            for replica_model_uid in iter_replica_model_uid(model_uid, replica):
+                address = self._place_replica(
+                    replica_model_uid, request, placement_policy, used
+                )
+                used.add(address)
+                placed.append((replica_model_uid, address))
+        except Exception:
+            for replica_model_uid, _ in placed:
+                self._placement.release(replica_model_uid, launched=False)
+            del self._model_uid_to_replica_info[model_uid]
+            raise
 
-    async def _choose_worker(self) -> xo.ActorRefType["WorkerActor"]:
+        results = await asyncio.gather(
+            *(
+                self._launch_replica(
+                    replica_model_uid, address, model_name, model_type, kwargs
+                )
+                for replica_model_uid, address in placed
+            ),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            try:
+                for replica_model_uid, _ in placed:
+                    if replica_model_uid not in self._replica_model_uid_to_worker:
+                        continue
+                    # 单个副本回滚失败不影响其余副本的回滚
+                    try:
+                        await self._terminate_replica(replica_model_uid)
+                    except Exception:
+                        logger.exception(
+                            "Failed to terminate replica %s during rollback",
+                            replica_model_uid,
+                        )
+            finally:
+                self._model_uid_to_replica_info.pop(model_uid, None)
+            raise errors[0]
+        return model_uid
+
+    def _place_replica(
+        self,
+        replica_model_uid: str,
+        request: ResourceRequest,
+        placement_policy: Optional[str],
+        used: Set[str],
+    ) -> str:
         '''
-            被 self.get_devices_count 调用
+        优先放置到尚未运行该模型副本的 Worker, 资源不足时才与其他副本共用 Worker
+        '''
+        try:
+            return self._placement.place(
+                replica_model_uid, request, policy=placement_policy, exclude=used
+            )
+        except RuntimeError:
+            if not used:
+                raise
+        return self._placement.place(
+            replica_model_uid, request, policy=placement_policy
+        )
+
+    async def _launch_replica(
+        self,
+        replica_model_uid: str,
+        address: str,
+        model_name: str,
+        model_type: str,
+        kwargs: Dict[str, Any],
+    ):
+        worker_ref = self._worker_address_to_worker[address]
+        try:
+            await worker_ref.launch_builtin_model(
+                model_uid=replica_model_uid,
+                model_name=model_name,
+                model_type=model_type,
+                **kwargs,
+            )
+        except Exception:
+            self._placement.release(replica_model_uid, launched=False)
+            raise
+        self._placement.release(replica_model_uid)
+        self._replica_model_uid_to_worker[replica_model_uid] = worker_ref
+        self._load_index.adjust_model_count(address, 1)
+
+    async def _terminate_replica(self, replica_model_uid: str):
+        worker_ref = self._replica_model_uid_to_worker[replica_model_uid]
+        try:
+            await worker_ref.terminate_model(model_uid=replica_model_uid)
+        finally:
+            del self._replica_model_uid_to_worker[replica_model_uid]
+            self._placement.remove(replica_model_uid)
+            self._load_index.adjust_model_count(worker_ref.address, -1)
+
+    def _get_replica_info(self, model_uid: str) -> ReplicaInfo:
+        replica_info = self._model_uid_to_replica_info.get(model_uid, None)
+        if replica_info is None:
+            raise ValueError(f"Model not found in the model list, uid: {model_uid}")
+        return replica_info
+
+    def _replica_model_uids(self, model_uid: str) -> List[str]:
+        replica_info = self._get_replica_info(model_uid)
+        return [
+            replica_model_uid
+            for replica_model_uid in iter_replica_model_uid(
+                model_uid, replica_info.replica
+            )
+            if replica_model_uid in self._replica_model_uid_to_worker
+        ]
+
+    @log_async(logger=logger)
+    async def terminate_model(self, model_uid: str):
+        replica_model_uids = self._replica_model_uids(model_uid)
+        try:
+            for replica_model_uid in replica_model_uids:
+                await self._terminate_replica(replica_model_uid)
+        finally:
+            self._model_uid_to_replica_info.pop(model_uid, None)
 
+    @log_async(logger=logger)
+    async def get_model(self, model_uid: str) -> xo.ActorRefType["ModelActor"]:
+        '''
+        轮询返回模型的一个副本
         '''
-        # TODO: better allocation strategy.
-        min_running_model_count = None
-        target_worker = None
+        replica_info = self._get_replica_info(model_uid)
+        for _ in range(replica_info.replica):
+            replica_model_uid = build_replica_model_uid(
+                model_uid, replica_info.replica, next(replica_info.scheduler)
+            )
+            worker_ref = self._replica_model_uid_to_worker.get(replica_model_uid)
+            if worker_ref is not None:
+                return await worker_ref.get_model(model_uid=replica_model_uid)
+        raise RuntimeError(f"No available replica of model {model_uid}")
 
-        workers = list(self._worker_address_to_worker.values())
-        for worker in workers:
-            running_model_count = await worker.get_model_count()
-            if (
-                min_running_model_count is None
-                or running_model_count < min_running_model_count
-            ):
-                min_running_model_count = running_model_count
-                target_worker = worker
+    @log_async(logger=logger)
+    async def get_model_replicas(
+        self, model_uid: str
+    ) -> Tuple[int, List[xo.ActorRefType["ModelActor"]]]:
+        '''
+        被 restful_api 调用, 返回 (模型的 generation, 全部可用副本), 由调用方按负载路由请求
+        generation 用于区分以相同 uid 重新启动的模型, 例如作为响应缓存键的一部分
+        '''
+        replica_info = self._get_replica_info(model_uid)
+        replica_model_uids = self._replica_model_uids(model_uid)
+        if not replica_model_uids:
+            raise RuntimeError(f"No available replica of model {model_uid}")
+        replicas = await asyncio.gather(
+            *(
+                self._replica_model_uid_to_worker[replica_model_uid].get_model(
+                    model_uid=replica_model_uid
+                )
+                for replica_model_uid in replica_model_uids
+            )
+        )
+        return replica_info.generation, replicas
 
-        if target_worker:
-            return target_worker
+    @log_async(logger=logger)
+    async def describe_model(self, model_uid: str) -> Dict[str, Any]:
+        replica_info = self._get_replica_info(model_uid)
+        replica_model_uids = self._replica_model_uids(model_uid)
+        if not replica_model_uids:
+            raise RuntimeError(f"No available replica of model {model_uid}")
+        worker_ref = self._replica_model_uid_to_worker[replica_model_uids[0]]
+        info = await worker_ref.describe_model(model_uid=replica_model_uids[0])
+        info["model_uid"] = model_uid
+        info["replica"] = replica_info.replica
+        info["addresses"] = [
+            self._replica_model_uid_to_worker[replica_model_uid].address
+            for replica_model_uid in replica_model_uids
+        ]
+        return info
 
-        raise RuntimeError("No available worker found")
+    @log_async(logger=logger)
+    async def list_models(self) -> Dict[str, Dict[str, Any]]:
+        ret = {}
+        for model_uid in self._model_uids():
+            if self._replica_model_uids(model_uid):
+                ret[model_uid] = await self.describe_model(model_uid)
+                continue
+            # 全部副本所在的 Worker 都已失效, 等待迁移
+            replica_info = self._model_uid_to_replica_info[model_uid]
+            ret[model_uid] = {
+                "model_type": replica_info.launch_args["model_type"],
+                "model_name": replica_info.launch_args["model_name"],
+                "model_uid": model_uid,
+                "replica": replica_info.replica,
+                "addresses": [],
+            }
+        return ret
 
     @log_sync(logger=logger)
     def get_status(self) -> Dict:
@@ -128,10 +454,12 @@ class SupervisorActor(xo.StatelessActor):
         }
     
     def is_local_deployment(self) -> bool:
-        # TODO: temporary.
-        return (
-            len(self._worker_address_to_worker) == 1
-            and list(self._worker_address_to_worker)[0] == self.address
+        '''
+        全部 Worker (可以有多个进程) 与 Supervisor 位于同一节点
+        '''
+        host = _get_host(self.address)
+        return bool(self._worker_address_to_worker) and all(
+            _get_host(address) == host for address in self._worker_address_to_worker
         )
     
     @log_async(logger=logger)
@@ -141,13 +469,19 @@ class SupervisorActor(xo.StatelessActor):
         '''
         from .worker import WorkerActor
 
-        assert (
-            worker_address not in self._worker_address_to_worker
-        ), f"Worker {worker_address} exists"
+        if worker_address in self._worker_address_to_worker:
+            # Worker 进程重启后以相同地址重新注册, 原进程上的副本已不存在, 按驱逐处理后重新接纳
+            logger.warning(
+                "Worker %s registered again, it has restarted, evict its replicas",
+                worker_address,
+            )
+            await self._evict_worker(worker_address)
 
         # 通过 xo.actor_ref 函数和 Worker传入的 worker_address 获取 WorkerActor 实例引用
         worker_ref = await xo.actor_ref(address=worker_address, uid=WorkerActor.uid())
         self._worker_address_to_worker[worker_address] = worker_ref
+        self._evicted_workers.discard(worker_address)
+        self._load_index.add(worker_address)
         logger.debug("Worker %s has been added successfully", worker_address)
 
     @log_async(logger=logger)
@@ -157,6 +491,10 @@ class SupervisorActor(xo.StatelessActor):
         '''
         if worker_address in self._worker_address_to_worker:
             del self._worker_address_to_worker[worker_address]
+            self._heartbeats.pop(worker_address, None)
+            self._history.pop(worker_address, None)
+            self._load_index.remove(worker_address)
+            self._placement.remove_worker(worker_address)
             logger.debug("Worker %s has been removed successfully", worker_address)
         else:
             logger.warning(
@@ -164,10 +502,300 @@ class SupervisorActor(xo.StatelessActor):
             )
 
     async def report_worker_status(
-        self, worker_address: str, status: Dict[str, ResourceStatus]
+        self,
+        worker_address: str,
+        status: Dict[str, ResourceStatus],
+        model_count: int = 0,
     ):
+        '''
+        汇报完整的节点资源信息并刷新负载索引, WorkerActor 使用更紧凑的 report_worker_heartbeat
+        '''
+        if worker_address in self._evicted_workers:
+            await self._readmit_worker(worker_address)
         if worker_address not in self._worker_status:
             logger.debug("Worker %s resources: %s", worker_address, status)
+        now = time.time()
         self._worker_status[worker_address] = WorkerStatus(
-            update_time=time.time(), status=status
-        )
\ No newline at end of file
+            update_time=now, status=status
+        )
+        self._update_load_index(worker_address, status, model_count, now)
+
+    async def report_worker_heartbeat(
+        self, worker_address: str, message: HeartbeatMessage
+    ) -> bool:
+        '''
+        WorkerActor 按自适应的间隔调用, 消息只包含变化超过阈值的字段, 处理开销与变化的字段数成正比
+        返回 True 表示无法应用该增量心跳 (例如 Supervisor 重启或 Worker 被驱逐后), Worker 需重发全量心跳
+        '''
+        if worker_address in self._evicted_workers:
+            await self._readmit_worker(worker_address)
+        decoder = self._heartbeats.get(worker_address)
+        if decoder is None:
+            decoder = self._heartbeats[worker_address] = HeartbeatDecoder()
+        mask = decoder.apply(message)
+        if mask is None:
+            return True
+        now = time.time()
+        worker_status = self._worker_status.get(worker_address)
+        if worker_status is None or worker_status.status is not decoder.status:
+            # 全量心跳: 资源状态对象被重建, 之后的增量心跳原地更新
+            if worker_status is None:
+                logger.debug("Worker %s resources: %s", worker_address, decoder.status)
+            self._worker_status[worker_address] = WorkerStatus(
+                update_time=now, status=decoder.status
+            )
+        else:
+            worker_status.update_time = now
+        if mask:
+            self._update_load_index(
+                worker_address,
+                decoder.status,
+                decoder.model_count,
+                now,
+                decoder.interval,
+            )
+        elif worker_address in self._worker_address_to_worker:
+            self._load_index.touch(worker_address, now, decoder.interval)
+        return False
+
+    def _update_load_index(
+        self,
+        worker_address: str,
+        status: Dict[str, ResourceStatus],
+        model_count: int,
+        now: float,
+        heartbeat_interval: float = 0.0,
+    ):
+        if worker_address not in self._worker_address_to_worker:
+            return
+        cpu = status.get("cpu")
+        if cpu is not None:
+            # ResourceStatus.available 实际记录的是 CPU 使用率 (psutil.cpu_percent)
+            self._load_index.update(
+                worker_address,
+                model_count,
+                cpu.memory_available,
+                cpu.total * (1.0 - cpu.available),
+                memory_total=cpu.memory_total,
+                cpu_total=cpu.total,
+                now=now,
+                heartbeat_interval=heartbeat_interval,
+            )
+        else:
+            self._load_index.update(
+                worker_address,
+                model_count,
+                0.0,
+                0.0,
+                now=now,
+                heartbeat_interval=heartbeat_interval,
+            )
+
+    def _sample_history(self, now: float):
+        '''
+        记录每个在线 Worker 当前的运行模型数、各资源的使用率与可用内存, 心跳超时的 Worker 不采样
+        已驱逐的 Worker 的最后一次采样超出历史窗口 (history_size * history_interval) 后删除其历史,
+        以随机端口反复重启的 Worker 不会不断累积
+        '''
+        retention = self._history_size * self._history_interval
+        for address in [
+            address
+            for address, history in self._history.items()
+            if address not in self._worker_address_to_worker
+            and now - history.last_timestamp > retention
+        ]:
+            del self._history[address]
+
+        for address in self._worker_address_to_worker:
+            worker_status = self._worker_status.get(address)
+            entry = self._load_index.get(address)
+            if (
+                worker_status is None
+                or entry is None
+                or self._load_index.is_stale(address, now)
+            ):
+                continue
+            values = {"model_count": float(entry.model_count)}
+            for name, resource in worker_status.status.items():
+                values[f"{name}.usage"] = resource.available
+                values[f"{name}.memory_available"] = resource.memory_available
+            history = self._history.get(address)
+            if history is None:
+                history = self._history[address] = TimeSeriesRing(self._history_size)
+            history.append(now, values)
+
+    async def _record_history(self):
+        while True:
+            try:
+                await asyncio.sleep(self._history_interval)
+                self._sample_history(time.time())
+            except asyncio.CancelledError:
+                break
+            except Exception:  # pragma: no cover
+                logger.exception("Failed to record workers history")
+
+    @log_sync(logger=logger)
+    def get_resource_history(
+        self,
+        window: float,
+        worker_address: Optional[str] = None,
+        metrics: Optional[List[str]] = None,
+        percentiles: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        '''
+            被 restful_api 调用
+            返回最近 window 秒内各 Worker 资源指标的 min、max、mean 与百分位数
+            已被驱逐的 Worker 在历史窗口内保留驱逐前的历史, 注销后删除
+        '''
+        if window <= 0:
+            raise ValueError(f"Window must be positive, got {window}")
+        if percentiles is None:
+            percentiles = list(DEFAULT_PERCENTILES)
+        for p in percentiles:
+            if not 0 <= p <= 100:
+                raise ValueError(f"Percentiles must be in [0, 100], got {p}")
+        if worker_address is not None:
+            if worker_address not in self._history:
+                raise ValueError(f"Worker {worker_address} has no resource history")
+            addresses = [worker_address]
+        else:
+            addresses = list(self._history)
+
+        end = time.time()
+        start = end - window
+        workers = {}
+        for address in addresses:
+            history = self._history[address]
+            workers[address] = history.summarize(start, end, metrics, percentiles)
+        return {
+            "start": start,
+            "end": end,
+            "interval": self._history_interval,
+            "workers": workers,
+        }
+
+    async def _check_workers_health(self):
+        '''
+        周期性检查 Worker 心跳, 驱逐超时的 Worker, 并重试尚未成功迁移的副本
+        '''
+        while True:
+            try:
+                await asyncio.sleep(self._health_check_interval)
+                now = time.time()
+                for address in list(self._worker_address_to_worker):
+                    entry = self._load_index.get(address)
+                    if entry is None:
+                        continue
+                    # 空闲的 Worker 心跳间隔较长, 超时时间按其声明的间隔放宽
+                    timeout = self._load_index.timeout(
+                        address, XINFERENCE_HEALTH_CHECK_ATTEMPTS, self._evict_timeout
+                    )
+                    if now - entry.update_time > timeout:
+                        logger.warning(
+                            "Worker %s missed heartbeats for %.0f s, evict it",
+                            address,
+                            timeout,
+                        )
+                        await self._evict_worker(address)
+                for replica_model_uid in list(self._pending_replicas):
+                    if replica_model_uid not in self._relaunching_replicas:
+                        self._schedule_relaunch(replica_model_uid)
+            except asyncio.CancelledError:
+                break
+            except Exception:  # pragma: no cover
+                logger.exception("Failed to check workers health")
+
+    async def _evict_worker(self, worker_address: str):
+        '''
+        驱逐心跳超时 (或已重启) 的 Worker: 其上的副本立即不再对外提供, 并在健康的 Worker 上重新启动
+        '''
+        self._worker_address_to_worker.pop(worker_address, None)
+        self._worker_status.pop(worker_address, None)
+        self._heartbeats.pop(worker_address, None)
+        self._load_index.remove(worker_address)
+        self._placement.remove_worker(worker_address)
+        self._evicted_workers.add(worker_address)
+
+        for replica_model_uid, worker_ref in list(
+            self._replica_model_uid_to_worker.items()
+        ):
+            if worker_ref.address != worker_address:
+                continue
+            del self._replica_model_uid_to_worker[replica_model_uid]
+            self._pending_replicas.add(replica_model_uid)
+            self._schedule_relaunch(replica_model_uid)
+
+    def _schedule_relaunch(self, replica_model_uid: str):
+        task = asyncio.create_task(self._relaunch_replica(replica_model_uid))
+        self._relaunch_tasks.add(task)
+        task.add_done_callback(self._relaunch_tasks.discard)
+
+    async def _relaunch_replica(self, replica_model_uid: str):
+        '''
+        按模型启动时的参数重新放置并启动副本, 优先选择未运行该模型其他副本的 Worker
+        放置失败时保留在待迁移集合中, 由健康检查周期性重试
+        '''
+        model_uid = parse_replica_model_uid(replica_model_uid)[0]
+        replica_info = self._model_uid_to_replica_info.get(model_uid)
+        if replica_info is None:
+            # 模型已被终止
+            self._pending_replicas.discard(replica_model_uid)
+            return
+        if replica_model_uid in self._relaunching_replicas:
+            return
+
+        self._relaunching_replicas.add(replica_model_uid)
+        launch_args = replica_info.launch_args
+        try:
+            used = {
+                self._replica_model_uid_to_worker[uid].address
+                for uid in self._replica_model_uids(model_uid)
+            }
+            address = self._place_replica(
+                replica_model_uid,
+                launch_args["request"],
+                launch_args["placement_policy"],
+                used,
+            )
+            await self._launch_replica(
+                replica_model_uid,
+                address,
+                launch_args["model_name"],
+                launch_args["model_type"],
+                launch_args["kwargs"],
+            )
+        except Exception as e:
+            logger.warning("Failed to relaunch replica %s: %s", replica_model_uid, e)
+            return
+        finally:
+            self._relaunching_replicas.discard(replica_model_uid)
+
+        self._pending_replicas.discard(replica_model_uid)
+        if self._model_uid_to_replica_info.get(model_uid) is not replica_info:
+            # 迁移期间模型被终止
+            await self._terminate_replica(replica_model_uid)
+            return
+        logger.info("Replica %s has been relaunched on %s", replica_model_uid, address)
+
+    async def _readmit_worker(self, worker_address: str):
+        '''
+        被驱逐的 Worker 恢复心跳: 重新接纳, 并终止其上已被迁移到其他 Worker 的副本
+        '''
+        logger.warning("Evicted worker %s is alive again, readmit it", worker_address)
+        await self.add_worker(worker_address)
+        worker_ref = self._worker_address_to_worker[worker_address]
+        for replica_model_uid in await worker_ref.list_models():
+            owner = self._replica_model_uid_to_worker.get(replica_model_uid)
+            if (
+                owner is not None and owner.address == worker_address
+            ) or replica_model_uid in self._relaunching_replicas:
+                continue
+            try:
+                await worker_ref.terminate_model(model_uid=replica_model_uid)
+            except Exception as e:
+                logger.warning(
+                    "Failed to terminate stale replica %s on %s: %s",
+                    replica_model_uid,
+                    worker_address,
+                    e,
+                )
@@ -0,0 +1,101 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 窗口统计默认返回的百分位数
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+
+def _percentile_key(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+class TimeSeriesRing:
+    '''
+    固定容量的时间序列环形缓冲区, 所有指标共享一组时间戳, 每个指标为一列 float64 数组
+    写满后覆盖最旧的采样, 占用内存为 capacity * (指标数 + 1) * 8 字节, 与运行时长无关
+    新出现的指标在此前的采样中记为 NaN, 某次采样缺少的指标同样记为 NaN, 统计时忽略
+    '''
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got {capacity}")
+        self._capacity = capacity
+        self._times = np.full(capacity, np.nan)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return float(self._times[self._next - 1])
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + sum(c.nbytes for c in self._columns.values())
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        '''
+        追加一次采样, 时间戳需单调不减
+        '''
+        i = self._next
+        self._times[i] = timestamp
+        for name, column in self._columns.items():
+            column[i] = values.get(name, math.nan)
+        for name, value in values.items():
+            if name not in self._columns:
+                column = self._columns[name] = np.full(self._capacity, np.nan)
+                column[i] = value
+        self._next = (i + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def _window_mask(self, start: float, end: float) -> np.ndarray:
+        # 未写入的槽位时间戳为 NaN, 比较结果为 False
+        return (self._times >= start) & (self._times <= end)
+
+    def summarize(
+        self,
+        start: float,
+        end: float,
+        metrics: Optional[Iterable[str]] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        '''
+        返回 [start, end] 时间窗口内各指标的采样数、min、max、mean 与百分位数
+        窗口内没有有效采样的指标, 统计值为 None
+        '''
+        mask = self._window_mask(start, end)
+        names = self._columns if metrics is None else metrics
+        result = {}
+        for name in names:
+            column = self._columns.get(name)
+            values = column[mask] if column is not None else np.empty(0)
+            values = values[~np.isnan(values)]
+            summary: Dict[str, Optional[float]] = {"samples": int(values.size)}
+            if values.size:
+                summary["min"] = float(values.min())
+                summary["max"] = float(values.max())
+                summary["mean"] = float(values.mean())
+                if percentiles:
+                    for p, v in zip(percentiles, np.percentile(values, percentiles)):
+                        summary[_percentile_key(p)] = float(v)
+            else:
+                summary["min"] = summary["max"] = summary["mean"] = None
+                for p in percentiles:
+                    summary[_percentile_key(p)] = None
+            result[name] = summary
+        return result
@@ -1,5 +1,8 @@
 import logging
 import os
+import uuid
+from typing import Iterator, Tuple
+
 import orjson
 from pydantic import BaseModel
 
@@ -8,6 +11,7 @@ logger = logging.getLogger(__name__)
 def json_dumps(o):
     '''
         将 Python 结构体 dump 为 json 格式
+        NumPy 数组由 orjson 直接序列化, 不经过 Python 列表
     '''
     def _default(obj):
         if isinstance(obj, BaseModel):
@@ -15,52 +19,84 @@ def json_dumps(o):
             return obj.model_dump()
         raise TypeError
 
-    return orjson.dumps(o, default=_default)
+    return orjson.dumps(o, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
 
-def log_async(logger):
+def _instrument(logger, func, is_async: bool):
     '''
-    异步调用装饰器
-    在 Debug 模式下,打印函数名称、参数、消耗时间等信息
-    与同步调用装饰器的区别在于, 调用被装饰函数时添加 await 关键字
+    构造埋点包装函数
+    DEBUG 关闭且埋点未启用时直接调用被装饰函数, 不格式化参数也不计时
+    启用时以 perf_counter_ns 计时, 记录调用次数与耗时直方图
     '''
-    import time
     from functools import wraps
+    from time import perf_counter_ns
+
+    from .metrics import INSTRUMENTATION
+
+    name = func.__name__
+    stats = INSTRUMENTATION.get_call_stats(func.__qualname__)
+
+    if is_async:
 
-    def decorator(func):
         @wraps(func)
         async def wrapped(*args, **kwargs):
-            logger.debug(f"Enter {func.__name__}, args: {args}, kwargs: {kwargs}")
-            start = time.time()
-            ret = await func(*args, **kwargs)
-            logger.debug(
-                f"Leave {func.__name__}, elapsed time: {int(time.time() - start)} s"
-            )
-            return ret
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if not debug and not INSTRUMENTATION.enabled:
+                return await func(*args, **kwargs)
+            if debug:
+                logger.debug("Enter %s, args: %s, kwargs: %s", name, args, kwargs)
+            start = perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                stats.record(elapsed)
+                if debug:
+                    logger.debug(
+                        "Leave %s, elapsed time: %.3f ms", name, elapsed / 1e6
+                    )
+
+    else:
 
-        return wrapped
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if not debug and not INSTRUMENTATION.enabled:
+                return func(*args, **kwargs)
+            if debug:
+                logger.debug("Enter %s, args: %s, kwargs: %s", name, args, kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                stats.record(elapsed)
+                if debug:
+                    logger.debug(
+                        "Leave %s, elapsed time: %.3f ms", name, elapsed / 1e6
+                    )
+
+    return wrapped
+
+def log_async(logger):
+    '''
+    异步调用装饰器
+    在 Debug 模式下,打印函数名称、参数、消耗时间等信息; 埋点启用时记录调用次数与耗时
+    与同步调用装饰器的区别在于, 调用被装饰函数时添加 await 关键字
+    '''
+
+    def decorator(func):
+        return _instrument(logger, func, is_async=True)
 
     return decorator
 
 def log_sync(logger):
     '''
     同步调用装饰器
-    在 Debug 模式下,打印函数名称、参数、消耗时间等信息
+    在 Debug 模式下,打印函数名称、参数、消耗时间等信息; 埋点启用时记录调用次数与耗时
     '''
-    import time
-    from functools import wraps
 
     def decorator(func):
-        @wraps(func)
-        def wrapped(*args, **kwargs):
-            logger.debug(f"Enter {func.__name__}, args: {args}, kwargs: {kwargs}")
-            start = time.time()
-            ret = func(*args, **kwargs)
-            logger.debug(
-                f"Leave {func.__name__}, elapsed time: {int(time.time() - start)} s"
-            )
-            return ret
-
-        return wrapped
+        return _instrument(logger, func, is_async=False)
 
     return decorator
 
@@ -76,4 +112,30 @@ def purge_dir(d):
                 logger.info("Remove empty directory: %s", subdir)
                 os.rmdir(subdir)
         except Exception:
-            pass
\ No newline at end of file
+            pass
+
+def gen_random_string(length: int) -> str:
+    return uuid.uuid4().hex[:length]
+
+
+def build_replica_model_uid(model_uid: str, replica: int, rep_id: int) -> str:
+    '''
+    构造副本模型 uid, 格式为 {model_uid}-{replica}-{rep_id}
+    '''
+    return f"{model_uid}-{replica}-{rep_id}"
+
+
+def iter_replica_model_uid(model_uid: str, replica: int) -> Iterator[str]:
+    for rep_id in range(replica):
+        yield build_replica_model_uid(model_uid, replica, rep_id)
+
+
+def parse_replica_model_uid(replica_model_uid: str) -> Tuple[str, int, int]:
+    '''
+    解析副本模型 uid, 返回 (model_uid, replica, rep_id)
+    '''
+    parts = replica_model_uid.rsplit("-", 2)
+    try:
+        return parts[0], int(parts[1]), int(parts[2])
+    except (IndexError, ValueError):
+        return replica_model_uid, -1, -1
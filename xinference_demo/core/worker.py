@@ -1,18 +1,45 @@
 import asyncio
+import dataclasses
+import os
 from collections import defaultdict
 from logging import getLogger
-from typing import Dict, List, Optional, Dict, Set
+from typing import Any, Dict, List, Optional, Dict, Set
 
 import xoscar as xo
 from xoscar import MainActorPoolType
 
-from ..constants import XINFERENCE_CACHE_DIR
-from .resource import gather_node_info
-from .utils import purge_dir
+from ..constants import (
+    XINFERENCE_CACHE_DIR,
+    XINFERENCE_MODEL_ACTOR_AUTO_RECOVER_LIMIT,
+    XINFERENCE_MODEL_CPU_CORES,
+    XINFERENCE_MODEL_IDLE_TTL,
+    XINFERENCE_MODEL_MEMORY_BUDGET_RATIO,
+    XINFERENCE_PREWARM_SUB_POOLS,
+)
+from .cpuset import CpuSetAllocator, affinity_supported
+from .metrics import (
+    ModelMetrics,
+    NodeMetrics,
+    get_model_metrics,
+    get_node_metrics,
+    start_metrics_export_server,
+)
+from .model import EmbeddingModelActor, ModelActor
+from .residency import ModelResidencyManager
+from .heartbeat import HeartbeatEncoder
+from .resource import NodeSampler, default_collectors, get_gpu_provider
+from .utils import log_async, log_sync, purge_dir
 
 logger = getLogger(__name__)
 
-DEFAULT_NODE_HEARTBEAT_INTERVAL = 5 # 每 5 秒向 Supervisor 汇报一次状态
+# 心跳间隔的基准 (秒), 实际间隔在 heartbeat.MIN/MAX_HEARTBEAT_INTERVAL 之间随负载变化
+DEFAULT_NODE_HEARTBEAT_INTERVAL = 5
+DEFAULT_RESIDENCY_CHECK_INTERVAL = 5 # 每 5 秒检查一次模型的空闲时间
+# 模型子进程崩溃后, 第一次立即恢复, 之后每次恢复前等待的时间按指数增长
+DEFAULT_RECOVER_BACKOFF = 1.0
+DEFAULT_MAX_RECOVER_BACKOFF = 30.0
+# 子进程启动时预先导入的模块, 模型启动时反序列化 ModelActor 与模型实例不再需要导入
+_SUB_POOL_MODULES = [ModelActor.__module__, __name__.rsplit(".", 2)[0] + ".model"]
 
 class WorkerActor(xo.StatelessActor):
     '''
@@ -27,6 +54,7 @@ class WorkerActor(xo.StatelessActor):
         cuda_devices: List[int],
         metrics_exporter_host: Optional[str] = None,
         metrics_exporter_port: Optional[int] = None,
+        prewarm_sub_pools: Optional[int] = None,
     ):
         super().__init__()
         # static attrs.
@@ -34,40 +62,56 @@ class WorkerActor(xo.StatelessActor):
         self._supervisor_address = supervisor_address
         self._supervisor_ref = None
         self._main_pool = main_pool
-        # self._main_pool.recover_sub_pool = self.recover_sub_pool
+        self._main_pool.recover_sub_pool = self.recover_sub_pool
 
         # internal states.
         self._model_uid_to_model: Dict[str, xo.ActorRefType["ModelActor"]] = {}
         # self._model_uid_to_model_spec: Dict[str, ModelDescription] = {}
         self._gpu_to_model_uid: Dict[int, str] = {}
         self._gpu_to_embedding_model_uids: Dict[int, Set[str]] = defaultdict(set)
+        # CPU 核按模型独占分配, 模型子进程绑定到分配的核上
+        self._cpuset = CpuSetAllocator()
         self._model_uid_to_addr: Dict[str, str] = {}
         self._model_uid_to_recover_count: Dict[str, int] = {}
         self._model_uid_to_launch_args: Dict[str, Dict] = {}
+        self._model_uid_to_recover_task: Dict[str, asyncio.Task] = {}
+        # 预热的空闲子进程, 模型启动时取出一个使用, 之后在后台补充
+        self._prewarm_sub_pools = (
+            XINFERENCE_PREWARM_SUB_POOLS
+            if prewarm_sub_pools is None
+            else prewarm_sub_pools
+        )
+        self._idle_sub_pools: List[str] = []
+        self._refill_task: Optional[asyncio.Task] = None
+        # 模型驻留管理: 空闲模型被卸载, 只保留启动参数与描述信息, 请求到来时重新加载
+        self._residency = ModelResidencyManager()
+        # 节点遥测: 负载、磁盘与网络吞吐只在启用指标导出时采集
+        self._node_sampler = NodeSampler(
+            default_collectors(
+                extended=metrics_exporter_port is not None,
+                gpu_provider=get_gpu_provider(),
+            )
+        )
+        # 容器内按 cgroup 的内存上限计算
+        self._memory_budget = (
+            self._node_sampler.sample().resources["cpu"].memory_total
+            * XINFERENCE_MODEL_MEMORY_BUDGET_RATIO
+        )
+        self._model_uid_to_description: Dict[str, Dict[str, Any]] = {}
+        self._model_uid_to_load_task: Dict[str, asyncio.Task] = {}
+        # 心跳只发送变化超过阈值的字段, 负载变化时缩短间隔, 空闲时逐渐拉长
+        self._heartbeat = HeartbeatEncoder()
 
-        # # metrics export server.
-        # if metrics_exporter_host is not None or metrics_exporter_port is not None:
-        #     logger.info(
-        #         f"Starting metrics export server at {metrics_exporter_host}:{metrics_exporter_port}"
-        #     )
-        #     q: queue.Queue = queue.Queue()
-        #     self._metrics_thread = threading.Thread(
-        #         name="Metrics Export Server",
-        #         target=launch_metrics_export_server,
-        #         args=(q, metrics_exporter_host, metrics_exporter_port),
-        #         daemon=True,
-        #     )
-        #     self._metrics_thread.start()
-        #     logger.info("Checking metrics export server...")
-        #     while self._metrics_thread.is_alive():
-        #         try:
-        #             host, port = q.get(block=False)[:2]
-        #             logger.info(f"Metrics server is started at: http://{host}:{port}")
-        #             break
-        #         except queue.Empty:
-        #             pass
-        #     else:
-        #         raise Exception("Metrics server thread exit.")
+        # metrics export server.
+        # 仅在指定了导出端口时启动, 同时启用本进程 (Supervisor 与 Worker) 的调用埋点
+        self._model_metrics: Optional[ModelMetrics] = None
+        self._node_metrics: Optional[NodeMetrics] = None
+        if metrics_exporter_port is not None:
+            self._model_metrics = get_model_metrics()
+            self._node_metrics = get_node_metrics()
+            self._metrics_thread = start_metrics_export_server(
+                metrics_exporter_host, metrics_exporter_port
+            )
 
         self._lock = asyncio.Lock()
 
@@ -87,13 +131,24 @@ class WorkerActor(xo.StatelessActor):
         await self._supervisor_ref.add_worker(self.address)
         # xo.StatelessActor._upload_task 会被自动执行吗？
         self._upload_task = asyncio.create_task(self._periodical_report_status())
+        self._residency_task = asyncio.create_task(self._periodical_check_residency())
         logger.info(f"Xinference worker {self.address} started")
         logger.info("Purge cache directory: %s", XINFERENCE_CACHE_DIR)
         purge_dir(XINFERENCE_CACHE_DIR)
+        from ..model.cache_manager import CacheManager
+
+        freed = await asyncio.to_thread(CacheManager().purge)
+        if freed:
+            logger.info("Evicted %d bytes from cache directory", freed)
+        self._schedule_refill()
 
 
     async def __pre_destroy__(self):
         self._upload_task.cancel()
+        self._residency_task.cancel()
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+        self._node_sampler.close()
 
     @classmethod
     def uid(cls) -> str:
@@ -104,21 +159,443 @@ class WorkerActor(xo.StatelessActor):
         from ..utils import cuda_count
 
         return cuda_count()
+
+    def get_model_count(self) -> int:
+        return len(self._model_uid_to_model)
+
+    @staticmethod
+    def _get_start_method():
+        return "forkserver" if os.name != "nt" else "spawn"
+
+    async def _create_sub_pool(self) -> str:
+        return await self._main_pool.append_sub_pool(
+            start_method=self._get_start_method(), modules=_SUB_POOL_MODULES
+        )
+
+    async def _take_sub_pool(self) -> str:
+        '''
+        优先使用预热的空闲子进程, 没有时当场创建
+        '''
+        if self._idle_sub_pools:
+            return self._idle_sub_pools.pop()
+        return await self._create_sub_pool()
+
+    def _schedule_refill(self):
+        if self._prewarm_sub_pools <= 0:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_sub_pools())
+
+    async def _refill_sub_pools(self):
+        '''
+        补充空闲子进程至 prewarm_sub_pools 个
+        '''
+        while len(self._idle_sub_pools) < self._prewarm_sub_pools:
+            try:
+                address = await self._create_sub_pool()
+            except Exception:
+                logger.exception("Failed to create pre-warmed sub pool")
+                return
+            self._idle_sub_pools.append(address)
+            logger.debug("Pre-warmed sub pool %s is ready", address)
+
+    @log_sync(logger=logger)
+    def get_idle_sub_pool_count(self) -> int:
+        return len(self._idle_sub_pools)
+
+    @log_async(logger=logger)
+    async def launch_builtin_model(
+        self,
+        model_uid: str,
+        model_name: str,
+        model_type: str = "LLM",
+        **kwargs,
+    ):
+        '''
+        SupervisorActor 调用, 为模型创建独立的子进程 (SubPool) 并在其中创建 ModelActor
+        '''
+        from ..model.core import create_model_instance, estimate_model_resource
+
+        launch_args = dict(
+            model_uid=model_uid, model_name=model_name, model_type=model_type, **kwargs
+        )
+        if model_uid in self._model_uid_to_model:
+            raise ValueError(f"{model_uid} is running")
+
+        # 批处理参数由 actor 使用, 其余参数传给模型实现
+        actor_kwargs = {"max_batch_size": kwargs.pop("max_batch_size", None)}
+        if model_type == "embedding":
+            actor_cls = EmbeddingModelActor
+            actor_kwargs["max_wait_ms"] = kwargs.pop("max_wait_ms", None)
+        else:
+            actor_cls = ModelActor
+            actor_kwargs["prefix_cache_size"] = kwargs.pop("prefix_cache_size", None)
+        idle_ttl = kwargs.pop("idle_ttl", None)
+        idle_ttl = XINFERENCE_MODEL_IDLE_TTL if idle_ttl is None else float(idle_ttl)
+        # 整数个核时独占并绑定, 不足一个核或非整数时与其他模型共享所有核
+        n_cpu = kwargs.pop("n_cpu", None)
+        n_cpu = float(XINFERENCE_MODEL_CPU_CORES if n_cpu is None else n_cpu)
+        n_cpu = int(n_cpu) if n_cpu.is_integer() else 0
+        model = create_model_instance(model_uid, model_type, model_name, **kwargs)
+        memory, _ = estimate_model_resource(
+            model_type, model_name, actor_kwargs.get("prefix_cache_size")
+        )
+        actor_kwargs["cpu_cores"] = await self._reserve_resources(
+            model_uid, memory, n_cpu, idle_ttl or None
+        )
+        try:
+            subpool_address = await self._take_sub_pool()
+        except BaseException:
+            # 恢复任务被取消时同样需要清理, CancelledError 不是 Exception 的子类
+            self._release_resources(model_uid)
+            raise
+        try:
+            model_ref = await xo.create_actor(
+                actor_cls,
+                address=subpool_address,
+                uid=model_uid,
+                worker_address=self.address,
+                model=model,
+                **actor_kwargs,
+            )
+            await model_ref.load()
+            description = await model_ref.describe()
+        except BaseException:
+            logger.error(f"Failed to load model {model_uid}", exc_info=True)
+            self._release_resources(model_uid)
+            await self._main_pool.remove_sub_pool(subpool_address)
+            raise
+        finally:
+            # 模型加载完成后再补充空闲子进程, 避免与模型加载争抢 CPU
+            self._schedule_refill()
+
+        self._model_uid_to_model[model_uid] = model_ref
+        self._model_uid_to_addr[model_uid] = subpool_address
+        self._model_uid_to_launch_args[model_uid] = launch_args
+        self._model_uid_to_description[model_uid] = description
+
+    async def _reserve_resources(
+        self,
+        model_uid: str,
+        memory: float,
+        n_cpu: int,
+        idle_ttl: Optional[float],
+    ) -> Optional[List[int]]:
+        '''
+        加载模型前在内存预算中为其预留空间, 并分配 n_cpu 个独占的 CPU 核 (0 表示不绑定), 返回分配的核
+        内存预算或空闲核不足时按 LRU 卸载空闲模型; 卸载全部空闲模型仍不足时抛出 RuntimeError, 不卸载任何模型
+        卸载的模型释放其核, 重新加载时同样经过这里, 必要时卸载其他空闲模型以取回核
+        '''
+        if n_cpu > 0 and not affinity_supported():
+            logger.warning(
+                "CPU affinity is not supported on this platform, model %s is not pinned",
+                model_uid,
+            )
+            n_cpu = 0
+        async with self._lock:
+            for victim in self._residency.select_victims(
+                model_uid,
+                memory,
+                self._memory_budget,
+                n_cpu,
+                len(self._cpuset.free_cores()),
+            ):
+                logger.info(
+                    "Unload least recently used model %s to make room for %s",
+                    victim,
+                    model_uid,
+                )
+                await self._unload_model(victim)
+            cores = None
+            if n_cpu > 0:
+                cores = self._cpuset.allocate(model_uid, n_cpu)
+                logger.info("Pin model %s to CPU cores %s", model_uid, cores)
+            self._residency.set_loaded(model_uid, memory, idle_ttl, n_cpu)
+            return cores
+
+    def _release_resources(self, model_uid: str):
+        self._cpuset.release(model_uid)
+        if model_uid in self._model_uid_to_launch_args:
+            # 重新加载失败, 保留记录, 下次请求时再次尝试
+            self._residency.set_unloaded(model_uid)
+        else:
+            self._residency.remove(model_uid)
+
+    async def _unload_model(self, model_uid: str):
+        '''
+        终止模型的子进程以释放内存, 保留启动参数以便之后重新加载
+        '''
+        model_ref = self._model_uid_to_model.pop(model_uid)
+        subpool_address = self._model_uid_to_addr.pop(model_uid)
+        self._residency.set_unloaded(model_uid)
+        # 重新加载时按启动参数再次分配
+        self._cpuset.release(model_uid)
+        try:
+            await xo.destroy_actor(model_ref)
+        except Exception as e:
+            logger.debug(
+                "Destroy model actor failed, model uid: %s, error: %s", model_uid, e
+            )
+        await self._main_pool.remove_sub_pool(subpool_address)
+        logger.info("Model %s has been unloaded", model_uid)
+
+    async def _ensure_loaded(self, model_uid: str):
+        '''
+        模型已卸载时重新加载; 同一模型的并发请求等待同一次加载
+        '''
+        if model_uid in self._model_uid_to_model:
+            return
+        load_task = self._model_uid_to_load_task.get(model_uid)
+        if load_task is None:
+            launch_args = self._model_uid_to_launch_args.get(model_uid)
+            if (
+                launch_args is None
+                or model_uid not in self._residency
+                or model_uid in self._model_uid_to_recover_task
+            ):
+                raise ValueError(f"Model not found in the model list, uid: {model_uid}")
+            load_task = self._model_uid_to_load_task[model_uid] = asyncio.create_task(
+                self._reload_model(model_uid, launch_args)
+            )
+        await asyncio.shield(load_task)
+
+    async def _reload_model(self, model_uid: str, launch_args: Dict[str, Any]):
+        try:
+            logger.info("Reloading model %s", model_uid)
+            await self.launch_builtin_model(**launch_args)
+        finally:
+            self._model_uid_to_load_task.pop(model_uid, None)
+
+    def _forget_model(self, model_uid: str):
+        self._model_uid_to_launch_args.pop(model_uid, None)
+        self._model_uid_to_recover_count.pop(model_uid, None)
+        self._model_uid_to_description.pop(model_uid, None)
+        self._residency.remove(model_uid)
+        if self._model_metrics is not None:
+            self._model_metrics.remove(model_uid)
+
+    @log_async(logger=logger)
+    async def terminate_model(self, model_uid: str):
+        recover_task = self._model_uid_to_recover_task.pop(model_uid, None)
+        if recover_task is not None:
+            # 模型正在恢复, 取消恢复并等待其清理子进程后再清除记录
+            recover_task.cancel()
+            await asyncio.wait([recover_task])
+            self._cpuset.release(model_uid)
+            self._forget_model(model_uid)
+            return
+
+        load_task = self._model_uid_to_load_task.get(model_uid)
+        if load_task is not None:
+            # 等待正在进行的重新加载结束后再终止
+            await asyncio.wait([load_task])
+        if model_uid not in self._model_uid_to_model and model_uid in self._residency:
+            # 已卸载的模型没有子进程, 清除记录即可
+            self._forget_model(model_uid)
+            return
+
+        model_ref = self._model_uid_to_model.get(model_uid, None)
+        if model_ref is None:
+            raise ValueError(f"Model not found in the model list, uid: {model_uid}")
+
+        try:
+            await xo.destroy_actor(model_ref)
+        except Exception as e:
+            logger.debug(
+                "Destroy model actor failed, model uid: %s, error: %s", model_uid, e
+            )
+        try:
+            subpool_address = self._model_uid_to_addr[model_uid]
+            await self._main_pool.remove_sub_pool(subpool_address)
+        finally:
+            del self._model_uid_to_model[model_uid]
+            del self._model_uid_to_addr[model_uid]
+            self._cpuset.release(model_uid)
+            self._forget_model(model_uid)
+
+    async def recover_sub_pool(self, address: str):
+        '''
+        MainActorPool 发现子进程退出时调用 (auto_recover="process")
+        按记录的启动参数在新的子进程中重新启动模型, 恢复在后台进行, 不阻塞对其他子进程的监控
+        '''
+        logger.warning("Process %s is down.", address)
+        # xoscar 不会移除已退出的子进程, 不移除的话每次检查都会再次触发恢复
+        try:
+            await self._main_pool.remove_sub_pool(address, force=True)
+        except Exception:
+            self._main_pool.sub_processes.pop(address, None)
+
+        if address in self._idle_sub_pools:
+            self._idle_sub_pools.remove(address)
+            self._schedule_refill()
+            return
+
+        for model_uid, addr in list(self._model_uid_to_addr.items()):
+            if addr != address:
+                continue
+            self._model_uid_to_model.pop(model_uid, None)
+            self._model_uid_to_addr.pop(model_uid, None)
+            self._residency.remove(model_uid)
+            self._cpuset.release(model_uid)
+            launch_args = self._model_uid_to_launch_args.get(model_uid)
+            if launch_args is None:
+                logger.warning(
+                    "Not recreate model %s because it is down during launch.", model_uid
+                )
+                continue
+            self._model_uid_to_recover_task[model_uid] = asyncio.create_task(
+                self._recover_model(model_uid, launch_args)
+            )
+
+    async def _recover_model(self, model_uid: str, launch_args: Dict[str, Any]):
+        '''
+        重新启动模型, 失败时指数退避重试, 累计恢复次数达到上限后放弃
+        模型权重以 mmap 方式加载, 重启时直接复用页缓存中的权重文件
+        '''
+        try:
+            while True:
+                recover_count = self._model_uid_to_recover_count.get(model_uid, 0)
+                if recover_count >= XINFERENCE_MODEL_ACTOR_AUTO_RECOVER_LIMIT:
+                    logger.error(
+                        "Model %s has been recovered %d times, stop recovering it.",
+                        model_uid,
+                        recover_count,
+                    )
+                    self._model_uid_to_launch_args.pop(model_uid, None)
+                    return
+                self._model_uid_to_recover_count[model_uid] = recover_count + 1
+                delay = (
+                    0.0
+                    if recover_count == 0
+                    else min(
+                        DEFAULT_RECOVER_BACKOFF * 2 ** (recover_count - 1),
+                        DEFAULT_MAX_RECOVER_BACKOFF,
+                    )
+                )
+                logger.warning(
+                    "Recreating model actor %s in %.1f s, attempt %d of %d ...",
+                    model_uid,
+                    delay,
+                    recover_count + 1,
+                    XINFERENCE_MODEL_ACTOR_AUTO_RECOVER_LIMIT,
+                )
+                await asyncio.sleep(delay)
+                try:
+                    await self.launch_builtin_model(**launch_args)
+                except Exception:
+                    logger.exception("Recreating model actor %s failed.", model_uid)
+                else:
+                    logger.info("Model actor %s has been recreated.", model_uid)
+                    return
+        finally:
+            self._model_uid_to_recover_task.pop(model_uid, None)
+
+    @log_async(logger=logger)
+    async def get_model(self, model_uid: str) -> xo.ActorRefType["ModelActor"]:
+        '''
+        返回模型的引用, 模型已被卸载时先重新加载
+        '''
+        await self._ensure_loaded(model_uid)
+        return self._model_uid_to_model[model_uid]
+
+    def _describe(self, model_uid: str) -> Dict[str, Any]:
+        return dict(
+            self._model_uid_to_description[model_uid],
+            resident=self._residency.is_loaded(model_uid),
+            cpu_cores=self._cpuset.get_cores(model_uid),
+        )
+
+    @log_async(logger=logger)
+    async def list_models(self) -> Dict[str, Dict[str, Any]]:
+        # 包括已卸载的模型, 不包括正在恢复的模型
+        return {
+            model_uid: self._describe(model_uid)
+            for model_uid in self._model_uid_to_description
+            if model_uid in self._residency
+        }
+
+    @log_async(logger=logger)
+    async def describe_model(self, model_uid: str) -> Dict[str, Any]:
+        if (
+            model_uid not in self._residency
+            or model_uid not in self._model_uid_to_description
+        ):
+            raise ValueError(f"Model not found in the model list, uid: {model_uid}")
+        return self._describe(model_uid)
     
-    async def report_status(self):
+    async def report_status(self) -> float:
         '''
-        向 SupervisorAcotr 汇报节点 CPU 和内存的状态信息
+        向 SupervisorAcotr 汇报节点 CPU 和内存的状态信息, 以及运行中的模型数量, 返回距下一次心跳的间隔
         '''
-        status = await asyncio.to_thread(gather_node_info)
-        await self._supervisor_ref.report_worker_status(self.address, status)
+        # 采样器持有打开的文件, 一次采样只有几次 pread, 直接在事件循环中执行
+        sample = self._node_sampler.sample()
+        if self._node_metrics is not None:
+            self._node_metrics.update(self.address, sample)
+        # 空闲模型随时可以卸载, 其内存计为可用, Supervisor 仍可向本节点放置新模型
+        # 在副本上修改, NodeSampler 在之后的采样中复用原对象
+        status = dict(sample.resources)
+        cpu = status["cpu"]
+        status["cpu"] = dataclasses.replace(
+            cpu,
+            memory_available=cpu.memory_available
+            + self._residency.reclaimable_memory(),
+        )
+        model_count = self.get_model_count()
+        message = self._heartbeat.encode(status, model_count)
+        if await self._supervisor_ref.report_worker_heartbeat(self.address, message):
+            # Supervisor 没有本 Worker 的状态或丢失了增量心跳, 立即重发全量心跳
+            self._heartbeat.reset()
+            message = self._heartbeat.encode(status, model_count)
+            await self._supervisor_ref.report_worker_heartbeat(self.address, message)
+        return message[1]
+
+    async def check_residency(self):
+        '''
+        拉取各模型的空闲时间与未完成请求数, 卸载空闲超过 idle_ttl 的模型
+        启用了指标导出时, 同时拉取调度器统计 (前缀缓存命中率等) 更新 Worker 的 /metrics
+        '''
+        for model_uid in self._residency.loaded_model_uids():
+            model_ref = self._model_uid_to_model.get(model_uid)
+            if model_ref is None:
+                # 正在加载
+                continue
+            try:
+                activity = await model_ref.get_activity()
+                if self._model_metrics is not None:
+                    stats = await model_ref.get_scheduler_stats()
+                    # 等待期间模型可能已被终止, 不再恢复其指标
+                    if model_uid in self._model_uid_to_model:
+                        self._model_metrics.update(model_uid, stats)
+            except Exception as e:
+                logger.debug("Failed to get activity of model %s: %s", model_uid, e)
+                continue
+            self._residency.update_activity(
+                model_uid, activity["idle_time"], activity["inflight"]
+            )
+        async with self._lock:
+            for model_uid in self._residency.expired():
+                if model_uid in self._model_uid_to_model:
+                    logger.info("Unload idle model %s", model_uid)
+                    await self._unload_model(model_uid)
+
+    async def _periodical_check_residency(self):
+        while True:
+            try:
+                await asyncio.sleep(DEFAULT_RESIDENCY_CHECK_INTERVAL)
+                await self.check_residency()
+            except asyncio.CancelledError:  # pragma: no cover
+                break
+            except Exception as ex:  # pragma: no cover
+                logger.error(f"Failed to check model residency: {ex}")
 
     async def _periodical_report_status(self):
         '''
         周期性调用 report_status 向 SupervisorAcotr 汇报
         '''
         while True:
+            interval = DEFAULT_NODE_HEARTBEAT_INTERVAL
             try:
-                await self.report_status()
+                interval = await self.report_status()
             except asyncio.CancelledError:  # pragma: no cover
                 break
             except RuntimeError as ex:  # pragma: no cover
@@ -131,6 +608,6 @@ class WorkerActor(xo.StatelessActor):
             ) as ex:  # pragma: no cover  # noqa: E722  # nosec  # pylint: disable=bare-except
                 logger.error(f"Failed to upload node info: {ex}")
             try:
-                await asyncio.sleep(DEFAULT_NODE_HEARTBEAT_INTERVAL)
+                await asyncio.sleep(interval)
             except asyncio.CancelledError:  # pragma: no cover
                 break
\ No newline at end of file
@@ -1,5 +1,8 @@
 import click
+import json
 import logging
+import time
+import urllib.request
 from typing import Optional
 
 from .utils import get_config_dict, get_log_file, get_timestamp_ms
@@ -23,6 +26,7 @@ def start_local_cluster(
     metrics_exporter_host: Optional[str] = None,
     metrics_exporter_port: Optional[int] = None,
     auth_config_file: Optional[str] = None,
+    api_workers: int = 1,
 ):
     from .local import main
 
@@ -41,6 +45,88 @@ def start_local_cluster(
         metrics_exporter_port=metrics_exporter_port,
         logging_conf=dict_config,
         auth_config_file=auth_config_file,
+        api_workers=api_workers,
+    )
+
+
+def start_supervisor(
+    log_level: str,
+    host: str,
+    port: int,
+    supervisor_port: Optional[int] = None,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    auth_config_file: Optional[str] = None,
+    api_workers: int = 1,
+):
+    from .supervisor import main
+
+    dict_config = get_config_dict(
+        log_level,
+        get_log_file(f"supervisor_{get_timestamp_ms()}"),
+        XINFERENCE_LOG_BACKUP_COUNT,
+        XINFERENCE_LOG_MAX_BYTES,
+    )
+    logging.config.dictConfig(dict_config)  # type: ignore
+
+    main(
+        host=host,
+        port=port,
+        supervisor_port=supervisor_port,
+        metrics_exporter_host=metrics_exporter_host,
+        metrics_exporter_port=metrics_exporter_port,
+        logging_conf=dict_config,
+        auth_config_file=auth_config_file,
+        api_workers=api_workers,
+    )
+
+
+def get_supervisor_address(endpoint: str, timeout: float) -> str:
+    '''
+    通过 RESTful API 的 /v1/address 查询 Supervisor 地址, API 尚未启动时在 timeout 秒内重试
+    '''
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(
+                endpoint.rstrip("/") + "/v1/address",
+                timeout=max(deadline - time.monotonic(), 1.0),
+            ) as resp:
+                return json.loads(resp.read())
+        except OSError as e:
+            if time.monotonic() >= deadline:
+                raise click.ClickException(
+                    f"Cannot get the supervisor address from {endpoint}: {e}"
+                )
+            time.sleep(1)
+
+
+def start_worker(
+    log_level: str,
+    host: str,
+    worker_port: Optional[int],
+    supervisor_address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+):
+    from xoscar.utils import get_next_port
+
+    from .worker import main
+
+    dict_config = get_config_dict(
+        log_level,
+        get_log_file(f"worker_{get_timestamp_ms()}"),
+        XINFERENCE_LOG_BACKUP_COUNT,
+        XINFERENCE_LOG_MAX_BYTES,
+    )
+    logging.config.dictConfig(dict_config)  # type: ignore
+
+    main(
+        address=f"{host}:{worker_port or get_next_port()}",
+        supervisor_address=supervisor_address,
+        metrics_exporter_host=metrics_exporter_host,
+        metrics_exporter_port=metrics_exporter_port,
+        logging_conf=dict_config,
     )
 
 
@@ -77,13 +163,20 @@ def start_local_cluster(
     "--metrics-exporter-port",
     "-mp",
     type=int,
-    help="Specify the port number for the Xinference metrics exporter server.",
+    help="Specify the port number for the Xinference metrics exporter server. "
+    "The exporter and call instrumentation are enabled only when this is set.",
 )
 @click.option(
     "--auth-config",
     type=str,
     help="Specify the auth config json file.",
 )
+@click.option(
+    "--api-workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Specify the number of RESTful API processes serving the same port.",
+)
 def local(
     log_level: str,
     host: str,
@@ -91,6 +184,7 @@ def local(
     metrics_exporter_host: Optional[str],
     metrics_exporter_port: Optional[int],
     auth_config: Optional[str],
+    api_workers: int,
 ):
     if metrics_exporter_host is None:
         metrics_exporter_host = host
@@ -101,4 +195,159 @@ def local(
         metrics_exporter_host=metrics_exporter_host,
         metrics_exporter_port=metrics_exporter_port,
         auth_config_file=auth_config,
-    )
\ No newline at end of file
+        api_workers=api_workers,
+    )
+
+@click.command(
+    help="Starts an Xinference supervisor and the RESTful API. "
+    "Workers are started separately with the worker command."
+)
+@click.option(
+    "--log-level",
+    default="INFO",
+    type=str,
+    help="""Set the logger level. Options listed from most log to least log are:
+              DEBUG > INFO > WARNING > ERROR > CRITICAL (Default level is INFO)""",
+)
+@click.option(
+    "--host",
+    "-H",
+    default=XINFERENCE_DEFAULT_LOCAL_HOST,
+    type=str,
+    help="Specify the host address for the supervisor and the RESTful API. "
+    "Use an address reachable from the workers in a multi-node cluster.",
+)
+@click.option(
+    "--port",
+    "-p",
+    default=XINFERENCE_DEFAULT_ENDPOINT_PORT,
+    type=int,
+    help="Specify the port number for the Xinference server.",
+)
+@click.option(
+    "--supervisor-port",
+    type=int,
+    help="Specify the port number for the supervisor, a free port is used by default.",
+)
+@click.option(
+    "--metrics-exporter-host",
+    "-MH",
+    default=None,
+    type=str,
+    help="Specify the host address for the Xinference metrics exporter server, default is the same as --host.",
+)
+@click.option(
+    "--metrics-exporter-port",
+    "-mp",
+    type=int,
+    help="Specify the port number for the Xinference metrics exporter server. "
+    "The exporter and call instrumentation are enabled only when this is set.",
+)
+@click.option(
+    "--auth-config",
+    type=str,
+    help="Specify the auth config json file.",
+)
+@click.option(
+    "--api-workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Specify the number of RESTful API processes serving the same port.",
+)
+def supervisor(
+    log_level: str,
+    host: str,
+    port: int,
+    supervisor_port: Optional[int],
+    metrics_exporter_host: Optional[str],
+    metrics_exporter_port: Optional[int],
+    auth_config: Optional[str],
+    api_workers: int,
+):
+    if metrics_exporter_host is None:
+        metrics_exporter_host = host
+    start_supervisor(
+        log_level=log_level,
+        host=host,
+        port=port,
+        supervisor_port=supervisor_port,
+        metrics_exporter_host=metrics_exporter_host,
+        metrics_exporter_port=metrics_exporter_port,
+        auth_config_file=auth_config,
+        api_workers=api_workers,
+    )
+
+
+@click.command(help="Starts an Xinference worker and registers it to a supervisor.")
+@click.option(
+    "--log-level",
+    default="INFO",
+    type=str,
+    help="""Set the logger level. Options listed from most log to least log are:
+              DEBUG > INFO > WARNING > ERROR > CRITICAL (Default level is INFO)""",
+)
+@click.option(
+    "--endpoint",
+    "-e",
+    default=f"http://{XINFERENCE_DEFAULT_LOCAL_HOST}:{XINFERENCE_DEFAULT_ENDPOINT_PORT}",
+    type=str,
+    help="Specify the RESTful API endpoint, used to look up the supervisor address.",
+)
+@click.option(
+    "--supervisor-address",
+    "-s",
+    default=None,
+    type=str,
+    help="Specify the supervisor address (host:port) directly instead of --endpoint.",
+)
+@click.option(
+    "--host",
+    "-H",
+    default=XINFERENCE_DEFAULT_LOCAL_HOST,
+    type=str,
+    help="Specify the host address for the worker, it must be reachable from the supervisor.",
+)
+@click.option(
+    "--worker-port",
+    type=int,
+    help="Specify the port number for the worker, a free port is used by default.",
+)
+@click.option(
+    "--metrics-exporter-host",
+    "-MH",
+    default=None,
+    type=str,
+    help="Specify the host address for the Xinference metrics exporter server, default is the same as --host.",
+)
+@click.option(
+    "--metrics-exporter-port",
+    "-mp",
+    type=int,
+    help="Specify the port number for the Xinference metrics exporter server. "
+    "The exporter and call instrumentation are enabled only when this is set.",
+)
+def worker(
+    log_level: str,
+    endpoint: str,
+    supervisor_address: Optional[str],
+    host: str,
+    worker_port: Optional[int],
+    metrics_exporter_host: Optional[str],
+    metrics_exporter_port: Optional[int],
+):
+    if supervisor_address is None:
+        from .worker import DEFAULT_SUPERVISOR_WAIT_TIMEOUT
+
+        supervisor_address = get_supervisor_address(
+            endpoint, DEFAULT_SUPERVISOR_WAIT_TIMEOUT
+        )
+    if metrics_exporter_host is None:
+        metrics_exporter_host = host
+    start_worker(
+        log_level=log_level,
+        host=host,
+        worker_port=worker_port,
+        supervisor_address=supervisor_address,
+        metrics_exporter_host=metrics_exporter_host,
+        metrics_exporter_port=metrics_exporter_port,
+    )
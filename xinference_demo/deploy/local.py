@@ -85,6 +85,7 @@ def main(
     metrics_exporter_port: Optional[int] = None,
     logging_conf: Optional[Dict] = None,
     auth_config_file: Optional[str] = None,
+    api_workers: int = 1,
 ):
     '''
         开启 Worker 进程并启动 FastAPI Server
@@ -105,6 +106,7 @@ def main(
             port=port,
             logging_conf=logging_conf,
             auth_config_file=auth_config_file,
+            api_workers=api_workers,
         )
     finally:
         local_cluster.terminate()
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import sys
+from typing import Dict, Optional
+
+import xoscar as xo
+from xoscar.utils import get_next_port
+
+from ..core.metrics import start_metrics_export_server
+from ..core.supervisor import SupervisorActor
+
+logger = logging.getLogger(__name__)
+
+
+async def _start_supervisor(
+    address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+):
+    '''
+    创建只运行 SupervisorActor 的 actor pool, Worker 由各节点上的 worker 命令启动后自行注册
+    指定了 metrics_exporter_port 时启动导出服务, 导出 Supervisor 的调用埋点
+    '''
+    logging.config.dictConfig(logging_conf)  # type: ignore
+
+    if metrics_exporter_port is not None:
+        start_metrics_export_server(metrics_exporter_host, metrics_exporter_port)
+
+    pool = None
+    try:
+        pool = await xo.create_actor_pool(
+            address=address, n_process=0, logging_conf={"dict": logging_conf}
+        )
+        await xo.create_actor(
+            SupervisorActor, address=address, uid=SupervisorActor.uid()
+        )
+        logger.info("Xinference supervisor %s started", address)
+        await pool.join()
+    except asyncio.CancelledError:
+        if pool is not None:
+            await pool.stop()
+
+
+def run(
+    address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+):
+    def sigterm_handler(signum, frame):
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, sigterm_handler)
+
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(
+        _start_supervisor(
+            address=address,
+            metrics_exporter_host=metrics_exporter_host,
+            metrics_exporter_port=metrics_exporter_port,
+            logging_conf=logging_conf,
+        )
+    )
+    loop.run_until_complete(task)
+
+
+def run_in_subprocess(
+    address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+) -> multiprocessing.Process:
+    p = multiprocessing.Process(
+        target=run,
+        args=(address, metrics_exporter_host, metrics_exporter_port, logging_conf),
+    )
+    p.start()
+    return p
+
+
+def main(
+    host: str,
+    port: int,
+    supervisor_port: Optional[int] = None,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+    auth_config_file: Optional[str] = None,
+    api_workers: int = 1,
+):
+    '''
+        开启 Supervisor 进程并启动 FastAPI Server
+    '''
+    supervisor_address = f"{host}:{supervisor_port or get_next_port()}"
+    print(f"=== supervisor_address: {supervisor_address}")
+    supervisor = run_in_subprocess(
+        supervisor_address, metrics_exporter_host, metrics_exporter_port, logging_conf
+    )
+
+    try:
+        from ..api import restful_api
+
+        print(f"=== host:port: {host}:{port}")
+        restful_api.run(
+            supervisor_address=supervisor_address,
+            host=host,
+            port=port,
+            logging_conf=logging_conf,
+            auth_config_file=auth_config_file,
+            api_workers=api_workers,
+        )
+    finally:
+        supervisor.terminate()
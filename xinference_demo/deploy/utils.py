@@ -27,8 +27,10 @@ async def create_worker_actor_pool(
 def get_log_file(sub_dir: str):
     """
     sub_dir should contain a timestamp.
+    The pid is appended, several processes started on one host in the same
+    millisecond (e.g. multiple workers) get their own directories.
     """
-    log_dir = os.path.join(XINFERENCE_LOG_DIR, sub_dir)
+    log_dir = os.path.join(XINFERENCE_LOG_DIR, f"{sub_dir}_{os.getpid()}")
     # Here should be creating a new directory each time, so `exist_ok=False`
     os.makedirs(log_dir, exist_ok=False)
     return os.path.join(log_dir, XINFERENCE_DEFAULT_LOG_FILE_NAME)
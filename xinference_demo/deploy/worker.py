@@ -1,7 +1,10 @@
 import asyncio
 import logging
 import os
-from typing import Any, Optional
+import signal
+import sys
+import time
+from typing import Any, Dict, Optional
 
 import xoscar as xo
 from xoscar import MainActorPoolType
@@ -11,6 +14,9 @@ from ..utils import cuda_count
 
 logger = logging.getLogger(__name__)
 
+# Worker 启动时等待 Supervisor 可连接的最长时间 (秒)
+DEFAULT_SUPERVISOR_WAIT_TIMEOUT = 60.0
+
 
 async def start_worker_components(
     address: str,
@@ -35,4 +41,83 @@ async def start_worker_components(
         cuda_devices=cuda_device_indices,
         metrics_exporter_host=metrics_exporter_host,
         metrics_exporter_port=metrics_exporter_port,
-    )
\ No newline at end of file
+    )
+
+async def _wait_for_supervisor(supervisor_address: str, timeout: float):
+    '''
+    Worker 与 Supervisor 分别启动, 等待 Supervisor 可以连接后再注册
+    '''
+    from ..core.supervisor import SupervisorActor
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await xo.actor_ref(
+                address=supervisor_address, uid=SupervisorActor.uid()
+            )
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"Cannot connect to supervisor {supervisor_address}: {e}"
+                ) from e
+            logger.info("Waiting for supervisor %s ...", supervisor_address)
+            await asyncio.sleep(1)
+
+
+async def _start_worker(
+    address: str,
+    supervisor_address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+):
+    from .utils import create_worker_actor_pool
+
+    logging.config.dictConfig(logging_conf)  # type: ignore
+
+    await _wait_for_supervisor(supervisor_address, DEFAULT_SUPERVISOR_WAIT_TIMEOUT)
+    pool = None
+    try:
+        pool = await create_worker_actor_pool(
+            address=address, logging_conf=logging_conf
+        )
+        await start_worker_components(
+            address=address,
+            supervisor_address=supervisor_address,
+            main_pool=pool,
+            metrics_exporter_host=metrics_exporter_host,
+            metrics_exporter_port=metrics_exporter_port,
+        )
+        await pool.join()
+    except asyncio.CancelledError:
+        if pool is not None:
+            await pool.stop()
+
+
+def main(
+    address: str,
+    supervisor_address: str,
+    metrics_exporter_host: Optional[str] = None,
+    metrics_exporter_port: Optional[int] = None,
+    logging_conf: Optional[Dict] = None,
+):
+    '''
+        在当前进程中启动 Worker, 向 supervisor_address 上的 Supervisor 注册并周期性汇报心跳
+    '''
+    def sigterm_handler(signum, frame):
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, sigterm_handler)
+
+    print(f"=== worker_address: {address}, supervisor_address: {supervisor_address}")
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(
+        _start_worker(
+            address=address,
+            supervisor_address=supervisor_address,
+            metrics_exporter_host=metrics_exporter_host,
+            metrics_exporter_port=metrics_exporter_port,
+            logging_conf=logging_conf,
+        )
+    )
+    loop.run_until_complete(task)
@@ -0,0 +1,73 @@
+import functools
+import logging
+import os
+import shutil
+import subprocess
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+NVIDIA_PROC_GPUS_DIR = "/proc/driver/nvidia/gpus"
+
+
+def _parse_cuda_visible_devices() -> Optional[int]:
+    '''
+    返回 CUDA_VISIBLE_DEVICES 中声明的设备数量, 未设置时返回 None
+    与 CUDA 运行时一致, 遇到第一个非法条目 (例如 -1) 即停止计数
+    '''
+    visible = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if visible is None:
+        return None
+    count = 0
+    for item in visible.split(","):
+        item = item.strip()
+        if not item or item.startswith("-"):
+            break
+        count += 1
+    return count
+
+
+def _count_proc_gpus() -> Optional[int]:
+    '''
+    NVIDIA 驱动为每张卡在 /proc/driver/nvidia/gpus 下创建一个目录
+    '''
+    try:
+        return len(os.listdir(NVIDIA_PROC_GPUS_DIR))
+    except OSError:
+        return None
+
+
+def _count_nvidia_smi() -> Optional[int]:
+    nvidia_smi = shutil.which("nvidia-smi")
+    if nvidia_smi is None:
+        return None
+    try:
+        output = subprocess.run(
+            [nvidia_smi, "-L"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("Failed to run nvidia-smi: %s", e)
+        return None
+    return sum(1 for line in output.splitlines() if line.startswith("GPU "))
+
+
+@functools.lru_cache(maxsize=None)
+def cuda_count() -> int:
+    '''
+    不导入 torch 统计可用 CUDA 设备数量
+    物理设备数依次从 /proc/driver/nvidia/gpus 与 nvidia-smi 获取, 都不可用时视为没有 GPU
+    设置了 CUDA_VISIBLE_DEVICES 时不超过其中声明的数量
+    '''
+    physical = _count_proc_gpus()
+    if physical is None:
+        physical = _count_nvidia_smi()
+    if physical is None:
+        return 0
+    visible = _parse_cuda_visible_devices()
+    if visible is None:
+        return physical
+    return min(visible, physical)
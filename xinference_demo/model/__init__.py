@@ -0,0 +1,9 @@
+def _install():
+    from .embedding import _install as embedding_install
+    from .llm import _install as llm_install
+
+    llm_install()
+    embedding_install()
+
+
+_install()
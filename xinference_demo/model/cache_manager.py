@@ -0,0 +1,208 @@
+import hashlib
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..constants import XINFERENCE_CACHE_DIR, XINFERENCE_CACHE_QUOTA
+
+logger = getLogger(__name__)
+
+# 计算内容摘要时的分块大小, 块摘要参与最终摘要的计算, 修改后已有 blob 不再被复用
+DEFAULT_HASH_CHUNK_SIZE = 8 * 2**20
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+_BLOB_DIR_NAME = "blobs"
+_TMP_DIR_NAME = "tmp"
+# 超过该时间 (秒) 仍未移入 blob 目录的临时文件视为写入进程已崩溃
+_STALE_TMP_FILE_AGE = 3600
+
+
+class CacheManager:
+    '''
+    XINFERENCE_CACHE_DIR 的内容寻址缓存:
+        blobs/<摘要前两位>/<摘要> 保存文件内容, 不同模型中内容相同的文件只保存一份
+        <cache_name>/<name> 是指向 blob 的符号链接
+    文件以 mmap 方式加载, 同一节点上的多个模型进程共享页缓存
+    blob 的 mtime 记录最近一次使用时间, 总大小超过配额时按 LRU 淘汰
+    '''
+
+    def __init__(
+        self,
+        cache_dir: str = XINFERENCE_CACHE_DIR,
+        quota: int = XINFERENCE_CACHE_QUOTA,
+        hash_workers: int = DEFAULT_HASH_WORKERS,
+        chunk_size: int = DEFAULT_HASH_CHUNK_SIZE,
+    ):
+        self._cache_dir = cache_dir
+        self._blob_dir = os.path.join(cache_dir, _BLOB_DIR_NAME)
+        self._quota = quota
+        self._hash_workers = hash_workers
+        self._chunk_size = chunk_size
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def mkstemp(self, suffix: str = "") -> str:
+        '''
+        返回缓存目录下的临时文件路径, 与 blob 位于同一文件系统, 写完后可原子地移入
+        '''
+        tmp_dir = os.path.join(self._cache_dir, _TMP_DIR_NAME)
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, f"{uuid.uuid4().hex}{suffix}")
+
+    def _hash_chunk(self, path: str, offset: int) -> bytes:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return hashlib.sha256(os.pread(fd, self._chunk_size, offset)).digest()
+        finally:
+            os.close(fd)
+
+    def hash_files(self, paths: Sequence[str]) -> List[str]:
+        '''
+        计算文件的内容摘要
+        文件按 chunk_size 分块读取, 所有文件的块在线程池中并行计算 sha256 (读取与哈希均释放 GIL),
+        文件摘要为 sha256(文件大小 + 各块摘要)
+        '''
+        sizes = [os.path.getsize(path) for path in paths]
+        num_chunks = [max(1, math.ceil(size / self._chunk_size)) for size in sizes]
+        tasks = [
+            (path, i * self._chunk_size)
+            for path, n in zip(paths, num_chunks)
+            for i in range(n)
+        ]
+        with ThreadPoolExecutor(min(self._hash_workers, len(tasks)) or 1) as executor:
+            chunk_digests = list(executor.map(lambda t: self._hash_chunk(*t), tasks))
+
+        digests = []
+        start = 0
+        for size, n in zip(sizes, num_chunks):
+            h = hashlib.sha256(size.to_bytes(8, "little"))
+            for chunk_digest in chunk_digests[start : start + n]:
+                h.update(chunk_digest)
+            digests.append(h.hexdigest())
+            start += n
+        return digests
+
+    def add_files(self, paths: Sequence[str]) -> List[str]:
+        '''
+        将文件移入 blob 目录并返回摘要, 内容已存在时删除该文件 (去重)
+        '''
+        digests = self.hash_files(paths)
+        for path, digest in zip(paths, digests):
+            blob = self.blob_path(digest)
+            if os.path.exists(blob):
+                os.remove(path)
+                os.utime(blob)
+                logger.debug("Deduplicated %s to blob %s", path, digest)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(path, blob)
+        return digests
+
+    def link(self, cache_name: str, name: str, digest: str) -> str:
+        '''
+        在 cache_name 目录下创建指向 blob 的符号链接, 已存在时原子替换
+        '''
+        cache_dir = os.path.join(self._cache_dir, cache_name)
+        os.makedirs(cache_dir, exist_ok=True)
+        link_path = os.path.join(cache_dir, name)
+        tmp_path = os.path.join(cache_dir, f".{name}.{uuid.uuid4().hex}.tmp")
+        os.symlink(os.path.relpath(self.blob_path(digest), cache_dir), tmp_path)
+        os.replace(tmp_path, link_path)
+        return link_path
+
+    def resolve(
+        self, cache_name: str, names: Sequence[str]
+    ) -> Optional[Dict[str, str]]:
+        '''
+        返回 cache_name 下各文件对应的 blob 路径, 任一文件缺失 (或其 blob 已被淘汰) 时返回 None
+        '''
+        paths = {}
+        for name in names:
+            path = os.path.realpath(os.path.join(self._cache_dir, cache_name, name))
+            if not os.path.isfile(path):
+                return None
+            paths[name] = path
+        return paths
+
+    @staticmethod
+    def load_array(path: str) -> np.ndarray:
+        '''
+        以只读 mmap 加载 .npy 文件, 并更新 mtime 作为 LRU 的使用时间
+        blob 已被其他进程淘汰时抛出 FileNotFoundError; 缓存目录只读等原因无法更新 mtime 时照常加载
+        '''
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            logger.debug("Failed to update the mtime of %s: %s", path, e)
+        return np.load(path, mmap_mode="r")
+
+    def enforce_quota(self, keep: Iterable[str] = ()) -> int:
+        '''
+        blob 总大小超过配额时按最近使用时间从旧到新删除, keep 中的 blob 不删除, 返回释放的字节数
+        已被 mmap 的文件删除后映射仍然有效, 正在运行的模型不受影响
+        '''
+        if self._quota <= 0 or not os.path.isdir(self._blob_dir):
+            return 0
+        keep = set(keep)
+        blobs = []
+        for root, _, files in os.walk(self._blob_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+        freed = 0
+        for _, size, path in sorted(blobs):
+            if total - freed <= self._quota:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            logger.info("Evict cached blob %s (%d bytes)", path, size)
+        if freed:
+            self._remove_dangling_links()
+        return freed
+
+    def purge(self) -> int:
+        '''
+        Worker 启动时调用: 删除残留的临时文件并执行配额
+        '''
+        tmp_dir = os.path.join(self._cache_dir, _TMP_DIR_NAME)
+        if os.path.isdir(tmp_dir):
+            now = time.time()
+            for entry in os.scandir(tmp_dir):
+                try:
+                    if now - entry.stat().st_mtime > _STALE_TMP_FILE_AGE:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        return self.enforce_quota()
+
+    def _remove_dangling_links(self):
+        for name in os.listdir(self._cache_dir):
+            if name in (_BLOB_DIR_NAME, _TMP_DIR_NAME):
+                continue
+            cache_dir = os.path.join(self._cache_dir, name)
+            if not os.path.isdir(cache_dir) or os.path.islink(cache_dir):
+                continue
+            for entry in os.scandir(cache_dir):
+                if entry.is_symlink() and not os.path.exists(entry.path):
+                    os.remove(entry.path)
+            if not os.listdir(cache_dir):
+                os.rmdir(cache_dir)
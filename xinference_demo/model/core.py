@@ -0,0 +1,48 @@
+from typing import Any, Optional, Tuple
+
+
+def create_model_instance(
+    model_uid: str, model_type: str, model_name: str, **kwargs
+) -> Any:
+    '''
+    WorkerActor 调用, 按模型类型创建模型实例
+    '''
+    if model_type == "LLM":
+        from .llm.core import create_llm_model_instance
+
+        return create_llm_model_instance(model_uid, model_name, **kwargs)
+    elif model_type == "embedding":
+        from .embedding.core import create_embedding_model_instance
+
+        return create_embedding_model_instance(model_uid, model_name, **kwargs)
+    else:
+        raise ValueError(f"Unsupported model type: {model_type}.")
+
+
+def estimate_model_resource(
+    model_type: str, model_name: str, prefix_cache_size: Optional[float] = None
+) -> Tuple[int, float]:
+    '''
+    SupervisorActor 与 WorkerActor 调用, 返回模型预计占用的 (内存字节数, CPU 核数), 用于资源感知的放置
+    LLM 的内存包含前缀 K/V 缓存的上限 prefix_cache_size (MiB), None 表示使用 XINFERENCE_PREFIX_CACHE_SIZE
+    '''
+    if model_type == "LLM":
+        from ..constants import XINFERENCE_PREFIX_CACHE_SIZE
+        from .llm import BUILTIN_LLM_FAMILIES
+
+        family = BUILTIN_LLM_FAMILIES.get(model_name)
+        if family is None:
+            raise ValueError(f"Model {model_name} not found")
+        if prefix_cache_size is None:
+            prefix_cache_size = XINFERENCE_PREFIX_CACHE_SIZE
+        memory = family.model_memory_bytes + int(max(prefix_cache_size, 0) * 2**20)
+        return memory, family.model_cpu_cores
+    elif model_type == "embedding":
+        from .embedding import BUILTIN_EMBEDDING_MODELS
+
+        spec = BUILTIN_EMBEDDING_MODELS.get(model_name)
+        if spec is None:
+            raise ValueError(f"Embedding model {model_name} not found")
+        return spec.model_memory_bytes, spec.model_cpu_cores
+    else:
+        raise ValueError(f"Unsupported model type: {model_type}.")
@@ -0,0 +1,18 @@
+from .core import BUILTIN_EMBEDDING_MODELS, EmbeddingModelSpec
+
+
+def _install():
+    '''
+    注册内置 embedding 模型
+    只登记元信息, 模型实现 (及 NumPy 等依赖) 在创建模型实例时才导入
+    '''
+    spec = EmbeddingModelSpec(
+        model_name="tiny-embedding",
+        dimensions=256,
+        max_tokens=512,
+        model_description="Feature-hashing random-projection embedding model for CPU benchmarks.",
+        # 子进程解释器 + NumPy + 16 MiB 投影矩阵
+        model_memory_bytes=96 * 1024**2,
+        model_cpu_cores=1.0,
+    )
+    BUILTIN_EMBEDDING_MODELS[spec.model_name] = spec
@@ -0,0 +1,33 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+BUILTIN_EMBEDDING_MODELS: Dict[str, "EmbeddingModelSpec"] = {}
+
+
+class EmbeddingModelSpec(BaseModel):
+    model_name: str
+    dimensions: int
+    max_tokens: int
+    model_description: Optional[str] = None
+    # 池化方式: mean 或 max
+    pooling: str = "mean"
+    normalize: bool = True
+    # 放置模型时使用的资源估计: 常驻内存 (字节) 与占用的 CPU 核数
+    model_memory_bytes: int = 0
+    model_cpu_cores: float = 1.0
+
+
+def create_embedding_model_instance(model_uid: str, model_name: str, **kwargs) -> Any:
+    '''
+    根据模型名称查找内置 embedding 模型并创建模型实例 (此时尚未加载权重)
+    '''
+    from .hashing import HashingEmbeddingModel
+
+    spec = BUILTIN_EMBEDDING_MODELS.get(model_name)
+    if spec is None:
+        raise ValueError(f"Embedding model {model_name} not found")
+    for cls in (HashingEmbeddingModel,):
+        if cls.match(model_name):
+            return cls(model_uid, spec, **kwargs)
+    raise ValueError(f"Embedding model {model_name} has no available implementation")
@@ -0,0 +1,101 @@
+import logging
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .core import EmbeddingModelSpec
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddingModel:
+    '''
+    纯 CPU 的参考 embedding 模型, 用于在无 GPU 的机器上测量 batch 大小与延迟的取舍
+    单词与相邻词对经 crc32 哈希到固定数量的特征桶, 每个特征桶对应随机投影矩阵中的一行
+    一个 batch 的全部 token 一次查表, 池化与归一化对整个 batch 向量化计算
+    '''
+
+    def __init__(
+        self,
+        model_uid: str,
+        model_spec: EmbeddingModelSpec,
+        num_features: int = 2**14,
+        seed: int = 0,
+    ):
+        self.model_uid = model_uid
+        self.model_spec = model_spec
+        self._num_features = num_features
+        self._seed = seed
+        self._projection: Optional[np.ndarray] = None
+
+    @classmethod
+    def match(cls, model_name: str) -> bool:
+        return model_name == "tiny-embedding"
+
+    def load(self):
+        '''
+        以 mmap 方式加载缓存的投影矩阵, 首次加载时以固定随机种子生成
+        不同副本对相同输入输出相同的向量
+        '''
+        from ..utils import load_cached_weights
+
+        dim = self.model_spec.dimensions
+        cache_name = (
+            f"{self.model_spec.model_name}-f{self._num_features}-d{dim}-s{self._seed}"
+        )
+        self._projection = load_cached_weights(
+            cache_name, ("projection",), self._create_weights
+        )["projection"]
+        logger.debug("Hashing embedding model %s loaded", self.model_uid)
+
+    def _create_weights(self) -> Dict[str, np.ndarray]:
+        rng = np.random.default_rng(self._seed)
+        dim = self.model_spec.dimensions
+        projection = rng.standard_normal((self._num_features, dim)) / np.sqrt(dim)
+        return {"projection": projection.astype(np.float32)}
+
+    def tokenize(self, text: str) -> List[int]:
+        '''
+        返回特征桶编号: 单词及相邻词对, 单词数不超过 max_tokens
+        crc32 在进程间稳定, 不受 PYTHONHASHSEED 影响
+        '''
+        words = _WORD_RE.findall(text.lower())[: self.model_spec.max_tokens]
+        n = self._num_features
+        features = [zlib.crc32(w.encode()) % n for w in words]
+        features.extend(
+            zlib.crc32(f"{a} {b}".encode()) % n for a, b in zip(words, words[1:])
+        )
+        return features
+
+    def encode(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        返回 (batch 的向量矩阵 [batch, dimensions], 各输入的 token 数)
+        '''
+        features: List[int] = []
+        lengths = np.empty(len(texts), dtype=np.int64)
+        token_counts = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            f = self.tokenize(text)
+            features.extend(f)
+            lengths[i] = len(f)
+            # 特征数 = 单词数 + 词对数
+            token_counts[i] = (len(f) + 1) // 2
+
+        pooled = np.zeros((len(texts), self.model_spec.dimensions), dtype=np.float32)
+        nonempty = lengths > 0
+        if features:
+            vectors = self._projection[np.asarray(features)]
+            starts = (np.cumsum(lengths) - lengths)[nonempty]
+            if self.model_spec.pooling == "max":
+                pooled[nonempty] = np.maximum.reduceat(vectors, starts, axis=0)
+            else:
+                pooled[nonempty] = np.add.reduceat(vectors, starts, axis=0)
+                pooled /= np.maximum(lengths, 1)[:, None]
+        if self.model_spec.normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled /= np.maximum(norms, 1e-12)
+        return pooled, token_counts
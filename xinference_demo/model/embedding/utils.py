@@ -0,0 +1,20 @@
+from typing import Dict
+
+import numpy as np
+
+
+def to_embedding(model_uid: str, vectors: np.ndarray, token_counts: np.ndarray) -> Dict:
+    '''
+    构造 OpenAI 兼容的 embedding 返回结构
+    每条 embedding 保持为 NumPy 数组, 由 RESTful API 按协商的格式编码
+    '''
+    num_tokens = int(token_counts.sum())
+    return {
+        "object": "list",
+        "model": model_uid,
+        "data": [
+            {"index": i, "object": "embedding", "embedding": vectors[i]}
+            for i in range(vectors.shape[0])
+        ],
+        "usage": {"prompt_tokens": num_tokens, "total_tokens": num_tokens},
+    }
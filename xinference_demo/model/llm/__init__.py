@@ -0,0 +1,38 @@
+from .llm_family import (
+    BUILTIN_LLM_FAMILIES,
+    BUILTIN_LLM_MODEL_CHAT_FAMILIES,
+    BUILTIN_LLM_MODEL_GENERATE_FAMILIES,
+    BUILTIN_LLM_PROMPT_STYLE,
+    LLMFamilyV1,
+    PromptStyleV1,
+)
+
+
+def _install():
+    '''
+    注册内置模型家族
+    只登记元信息, 模型实现 (及 NumPy 等依赖) 在创建模型实例时才导入
+    '''
+    tiny_chat_style = PromptStyleV1(
+        style_name="ADD_COLON_SINGLE",
+        system_prompt="A chat between a curious user and a tiny assistant.",
+        roles=["user", "assistant"],
+        intra_message_sep="\n",
+        inter_message_sep="\n",
+        stop=["\nuser:"],
+        stop_token_ids=[256],
+    )
+    family = LLMFamilyV1(
+        model_name="tiny-chat",
+        model_ability=["generate", "chat"],
+        model_description="Pure NumPy byte-level reference model for CPU benchmarks.",
+        context_length=2048,
+        prompt_style=tiny_chat_style,
+        # 子进程解释器 + NumPy + 权重与 K/V 缓存
+        model_memory_bytes=128 * 1024**2,
+        model_cpu_cores=1.0,
+    )
+    BUILTIN_LLM_FAMILIES[family.model_name] = family
+    BUILTIN_LLM_PROMPT_STYLE[family.model_name] = tiny_chat_style
+    BUILTIN_LLM_MODEL_CHAT_FAMILIES.add(family.model_name)
+    BUILTIN_LLM_MODEL_GENERATE_FAMILIES.add(family.model_name)
@@ -0,0 +1,18 @@
+from typing import Any
+
+from .llm_family import BUILTIN_LLM_FAMILIES
+
+
+def create_llm_model_instance(model_uid: str, model_name: str, **kwargs) -> Any:
+    '''
+    根据模型名称查找内置模型家族并创建模型实例 (此时尚未加载权重)
+    '''
+    from .tiny import TinyLM
+
+    family = BUILTIN_LLM_FAMILIES.get(model_name)
+    if family is None:
+        raise ValueError(f"Model {model_name} not found")
+    for cls in (TinyLM,):
+        if cls.match(model_name):
+            return cls(model_uid, family, **kwargs)
+    raise ValueError(f"Model {model_name} has no available implementation")
@@ -2,6 +2,7 @@ from typing import Dict, List, Optional, Set
 
 from pydantic import BaseModel
 
+BUILTIN_LLM_FAMILIES: Dict[str, "LLMFamilyV1"] = {}
 BUILTIN_LLM_PROMPT_STYLE: Dict[str, "PromptStyleV1"] = {}
 BUILTIN_LLM_MODEL_CHAT_FAMILIES: Set[str] = set()
 BUILTIN_LLM_MODEL_GENERATE_FAMILIES: Set[str] = set()
@@ -15,4 +16,14 @@ class PromptStyleV1(BaseModel):
     intra_message_sep: str = ""
     inter_message_sep: str = ""
     stop: Optional[List[str]]
-    stop_token_ids: Optional[List[int]]
\ No newline at end of file
+    stop_token_ids: Optional[List[int]]
+
+class LLMFamilyV1(BaseModel):
+    model_name: str
+    model_ability: List[str]
+    model_description: Optional[str] = None
+    context_length: int = 2048
+    prompt_style: Optional[PromptStyleV1] = None
+    # 放置模型时使用的资源估计: 常驻内存 (字节) 与占用的 CPU 核数
+    model_memory_bytes: int = 0
+    model_cpu_cores: float = 1.0
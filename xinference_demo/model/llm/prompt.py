@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .llm_family import PromptStyleV1
+
+# 每个渲染器缓存的对话前缀数量与总字符数上限
+DEFAULT_PREFIX_CACHE_SIZE = 256
+DEFAULT_PREFIX_CACHE_CHARS = 16 * 2**20
+
+
+class PromptRenderer:
+    '''
+    由 PromptStyleV1 编译得到的提示词渲染器
+    分隔符、角色映射等在编译时确定; 渲染时查找同一对话上一轮已渲染的前缀, 只渲染新增的消息,
+    Python 层的渲染开销与本轮新增的消息数成正比, 而不是与全部历史成正比
+    '''
+
+    def __init__(
+        self,
+        system_prompt: str,
+        roles: Sequence[str],
+        seps: Tuple[str, str],
+        cache_size: int = DEFAULT_PREFIX_CACHE_SIZE,
+        cache_chars: int = DEFAULT_PREFIX_CACHE_CHARS,
+    ):
+        self._header = system_prompt + seps[0]
+        self._user_role = roles[0]
+        self._roles = {"user": roles[0], "assistant": roles[1]}
+        self._seps = seps
+        # 提示词以空内容的 assistant 消息结尾, 等待模型续写
+        self._tail = roles[1] + ":"
+        self._cache_size = cache_size
+        self._cache_chars = cache_chars
+        # (前缀长度, 最后一条消息的 role, content) -> (前缀中的消息, 提示词)
+        self._cache: "OrderedDict[Tuple, Tuple[List[Dict], str]]" = OrderedDict()
+        self._cached_chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _render_message(self, index: int, message: Dict) -> str:
+        role = self._roles.get(message["role"], message["role"])
+        content = message["content"]
+        if content:
+            return role + ": " + content + self._seps[index % 2]
+        return role + ":"
+
+    @staticmethod
+    def _key(messages: List[Dict], length: int) -> Tuple:
+        last = messages[length - 1]
+        return length, last["role"], last["content"]
+
+    def _put(self, messages: List[Dict], full_prompt: str):
+        if self._cache_size <= 0 or len(full_prompt) > self._cache_chars:
+            return
+        key = self._key(messages, len(messages))
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cached_chars -= len(old[1])
+        self._cache[key] = (messages, full_prompt)
+        self._cached_chars += len(full_prompt)
+        while (
+            len(self._cache) > self._cache_size
+            or self._cached_chars > self._cache_chars
+        ):
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._cached_chars -= len(evicted)
+
+    def _lookup(self, messages: List[Dict]) -> Tuple[int, Optional[str]]:
+        '''
+        返回已缓存的最长前缀的 (消息数, 提示词)
+        从最长的前缀开始查找, 通常在第二次查找时命中上一轮的 (历史 + 用户输入)
+        以 (前缀长度, 最后一条消息) 为键查找, 命中后再逐条比较前缀中的消息
+        '''
+        if self._cache:
+            for length in range(len(messages) - 1, 0, -1):
+                key = self._key(messages, length)
+                entry = self._cache.get(key)
+                if entry is None:
+                    continue
+                cached_messages, prompt = entry
+                if cached_messages == messages[:length]:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return length, prompt
+        self.misses += 1
+        return 0, None
+
+    def render(self, prompt: str, chat_history: Optional[List[Dict]] = None) -> str:
+        messages = list(chat_history or [])
+        messages.append({"role": self._user_role, "content": prompt})
+        start, cached = self._lookup(messages)
+        if cached is None:
+            pieces = [self._header]
+        else:
+            # 缓存的是上一轮完整的提示词, 以 "assistant:" 结尾
+            # 本轮历史中紧随其后的通常是模型的回复, 直接在其后追加回复内容, 避免再复制一次前缀
+            message = messages[start]
+            role = self._roles.get(message["role"], message["role"])
+            if message["content"] and role + ":" == self._tail:
+                pieces = [cached, " " + message["content"] + self._seps[start % 2]]
+                start += 1
+            else:
+                pieces = [cached[: -len(self._tail)]]
+        for index in range(start, len(messages)):
+            pieces.append(self._render_message(index, messages[index]))
+        pieces.append(self._tail)
+        full_prompt = "".join(pieces)
+        self._put(messages, full_prompt)
+        return full_prompt
+
+
+@lru_cache(maxsize=64)
+def _compile(
+    style_name: str, system_prompt: str, roles: Tuple[str, ...], intra: str, inter: str
+) -> PromptRenderer:
+    if style_name == "ADD_COLON_SINGLE":
+        seps = (intra, intra)
+    elif style_name == "ADD_COLON_TWO":
+        seps = (intra, inter)
+    else:
+        raise ValueError(f"Invalid prompt style: {style_name}")
+    return PromptRenderer(system_prompt, roles, seps)
+
+
+def compile_prompt_style(prompt_style: PromptStyleV1) -> PromptRenderer:
+    '''
+    返回提示词模板编译后的渲染器, 相同的模板只编译一次, 并共享前缀缓存
+    '''
+    return _compile(
+        prompt_style.style_name,
+        prompt_style.system_prompt,
+        tuple(prompt_style.roles),
+        prompt_style.intra_message_sep,
+        prompt_style.inter_message_sep,
+    )
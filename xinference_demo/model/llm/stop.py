@@ -0,0 +1,86 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class StopSequenceMatcher:
+    '''
+    由停止词编译得到的 Aho-Corasick 自动机, 在流式输出上逐字符查找停止词
+    状态只依赖已读入的文本, 跨 token 边界的停止词同样能被找到; 每个字符摊还 O(1)
+    状态的深度即当前文本最长的、同时是某个停止词前缀的后缀长度, 这部分文本需要暂缓输出
+    自动机不可变, 相同的停止词集合共享同一个实例, 每个请求只保存当前状态 (整数)
+    '''
+
+    def __init__(self, stop: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # 以该状态结尾的最长停止词的长度, 0 表示没有停止词在此结束
+        self._match: List[int] = [0]
+        for s in stop:
+            if s:
+                self._insert(s)
+        self._build()
+
+    def _insert(self, s: str):
+        node = 0
+        for ch in s:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._match.append(0)
+            node = nxt
+        self._match[node] = len(s)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            if not self._match[node]:
+                # 自身不是停止词时, 继承失配链上最长的停止词
+                self._match[node] = self._match[self._fail[node]]
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                queue.append(child)
+
+    def depth(self, state: int) -> int:
+        return self._depth[state]
+
+    def feed(self, state: int, text: str) -> Tuple[int, int, int]:
+        '''
+        从状态 state 开始读入 text, 遇到第一个完整的停止词即停止
+        返回 (新状态, 停止词在 text 中结束的下标 (不含), 停止词长度), 未匹配时后两项为 -1 与 0
+        停止词可能从之前读入的文本开始, 其长度可以大于结束下标
+        '''
+        goto, fail, match = self._goto, self._fail, self._match
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if match[state]:
+                return state, i + 1, match[state]
+        return state, -1, 0
+
+
+@lru_cache(maxsize=128)
+def _compile(stop: Tuple[str, ...]) -> StopSequenceMatcher:
+    return StopSequenceMatcher(stop)
+
+
+def compile_stop_matcher(
+    stop: Optional[Sequence[str]],
+) -> Optional[StopSequenceMatcher]:
+    '''
+    返回停止词 (例如合并了 PromptStyleV1.stop 的请求停止词) 对应的自动机, 没有停止词时返回 None
+    '''
+    stop = tuple(sorted({s for s in stop or () if s}))
+    if not stop:
+        return None
+    return _compile(stop)
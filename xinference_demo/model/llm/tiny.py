@@ -0,0 +1,250 @@
+import codecs
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .llm_family import LLMFamilyV1
+
+logger = logging.getLogger(__name__)
+
+# 字节级词表: 0-255 为字节, 256 为 EOS
+VOCAB_SIZE = 257
+EOS_TOKEN_ID = 256
+
+_WEIGHT_NAMES = ("bigram", "embedding", "wq", "wk", "wv", "wo")
+
+# 构建二元语法表使用的内置语料, 每一行视为一个以 EOS 结尾的文档
+_CORPUS = """\
+Xinference serves large language models on a cluster of workers.
+The supervisor keeps track of every worker and every running model.
+A worker launches each model in its own sub pool process.
+Requests are batched together so one process can serve many users.
+Each decode step produces one new token for every running sequence.
+Finished sequences leave the batch and new requests join at the next step.
+Time to first token is what users feel when they chat with a model.
+Throughput is the number of tokens generated per second by the whole batch.
+A tiny model is enough to measure the scheduler on a machine without a GPU.
+user: hello
+assistant: Hello! I am a tiny model running on the CPU.
+user: what can you do?
+assistant: I can generate short sentences about serving models.
+"""
+
+
+class ByteDetokenizer:
+    '''
+    流式解码器, 保证被切分在多个 token 中的 UTF-8 字符被正确拼接
+    '''
+
+    __slots__ = ("_decoder",)
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def decode(self, token_id: int) -> str:
+        if token_id >= 256:
+            return self._decoder.decode(b"", final=True)
+        return self._decoder.decode(bytes((token_id,)))
+
+
+class TinyLMState:
+    '''
+    单条序列的推理状态：
+        已处理 token 的 K/V 缓存 (按容量倍增的预分配数组)
+        最后一个 token 及其对应的下一 token logits
+    '''
+
+    __slots__ = ("keys", "values", "length", "last_token", "logits")
+
+    def __init__(self, dim: int, capacity: int):
+        self.keys = np.empty((capacity, dim), dtype=np.float32)
+        self.values = np.empty((capacity, dim), dtype=np.float32)
+        self.length = 0
+        self.last_token = EOS_TOKEN_ID
+        self.logits: Optional[np.ndarray] = None
+
+    def append(self, keys: np.ndarray, values: np.ndarray):
+        n = keys.shape[0]
+        if self.length + n > self.keys.shape[0]:
+            capacity = max(self.keys.shape[0] * 2, self.length + n)
+            self.keys = np.resize(self.keys, (capacity, self.keys.shape[1]))
+            self.values = np.resize(self.values, (capacity, self.values.shape[1]))
+        self.keys[self.length : self.length + n] = keys
+        self.values[self.length : self.length + n] = values
+        self.length += n
+
+
+class TinyLM:
+    '''
+    纯 CPU 的参考模型, 用于在无 GPU 的机器上测量吞吐与延迟
+    字节级二元语法 logits 叠加一层单头注意力:
+        prefill 计算 prompt 全部位置的 K/V, 复杂度与 prompt 长度成正比
+        decode 对整个 batch 向量化计算新 token 的 Q/K/V, 再对各自的 K/V 缓存做注意力
+    '''
+
+    def __init__(
+        self,
+        model_uid: str,
+        model_family: LLMFamilyV1,
+        dim: int = 64,
+        attention_scale: float = 0.5,
+        seed: int = 0,
+    ):
+        self.model_uid = model_uid
+        self.model_family = model_family
+        self._dim = dim
+        self._attention_scale = attention_scale
+        self._seed = seed
+        self._bigram: Optional[np.ndarray] = None
+        self._embedding: Optional[np.ndarray] = None
+        self._wq: Optional[np.ndarray] = None
+        self._wk: Optional[np.ndarray] = None
+        self._wv: Optional[np.ndarray] = None
+        self._wo: Optional[np.ndarray] = None
+
+    @classmethod
+    def match(cls, model_name: str) -> bool:
+        return model_name == "tiny-chat"
+
+    @property
+    def eos_token_id(self) -> int:
+        return EOS_TOKEN_ID
+
+    @property
+    def context_length(self) -> int:
+        return self.model_family.context_length
+
+    def load(self):
+        '''
+        以 mmap 方式加载缓存的权重, 首次加载时根据内置语料与随机种子生成
+        '''
+        from ..utils import load_cached_weights
+
+        cache_name = (
+            f"{self.model_family.model_name}-{zlib.crc32(_CORPUS.encode()):08x}"
+            f"-d{self._dim}-a{self._attention_scale:g}-s{self._seed}"
+        )
+        weights = load_cached_weights(cache_name, _WEIGHT_NAMES, self._create_weights)
+        self._bigram = weights["bigram"]
+        self._embedding = weights["embedding"]
+        self._wq = weights["wq"]
+        self._wk = weights["wk"]
+        self._wv = weights["wv"]
+        self._wo = weights["wo"]
+        logger.debug("Tiny model %s loaded", self.model_uid)
+
+    def _create_weights(self) -> Dict[str, np.ndarray]:
+        '''
+        根据内置语料统计二元语法, 并以固定随机种子初始化注意力权重
+        '''
+        counts = np.zeros((VOCAB_SIZE, VOCAB_SIZE), dtype=np.float64)
+        for line in _CORPUS.splitlines():
+            tokens = [EOS_TOKEN_ID] + self.tokenize(line) + [EOS_TOKEN_ID]
+            np.add.at(counts, (tokens[:-1], tokens[1:]), 1.0)
+        # 只在语料中出现过的 token 上做平滑, 保证输出为可见 ASCII
+        seen = counts.sum(axis=0) > 0
+        smoothed = np.where(seen[None, :], counts + 0.01, 0.0)
+        probs = smoothed / smoothed.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore"):
+            bigram = np.log(probs)
+
+        rng = np.random.default_rng(self._seed)
+        scale = 1.0 / np.sqrt(self._dim)
+        embedding = rng.standard_normal((VOCAB_SIZE, self._dim)).astype(np.float32)
+        wq, wk, wv = (
+            (rng.standard_normal((self._dim, self._dim)) * scale).astype(np.float32)
+            for _ in range(3)
+        )
+        wo = (
+            rng.standard_normal((self._dim, VOCAB_SIZE)) * scale * self._attention_scale
+        ).astype(np.float32)
+        # 注意力输出不应让模型生成语料中未出现的 token
+        wo[:, ~seen] = 0.0
+        return {
+            "bigram": np.maximum(bigram, -1e9).astype(np.float32),
+            "embedding": embedding,
+            "wq": wq,
+            "wk": wk,
+            "wv": wv,
+            "wo": wo,
+        }
+
+    def tokenize(self, text: str) -> List[int]:
+        return list(text.encode("utf-8"))
+
+    @staticmethod
+    def detokenizer() -> ByteDetokenizer:
+        return ByteDetokenizer()
+
+    def detokenize(self, tokens: Sequence[int]) -> str:
+        return bytes(t for t in tokens if t < 256).decode("utf-8", errors="replace")
+
+    def new_state(self, capacity: int = 64) -> TinyLMState:
+        return TinyLMState(self._dim, capacity)
+
+    def prefill(
+        self,
+        token_ids: Sequence[int],
+        prefix: Optional[Sequence[Tuple[np.ndarray, np.ndarray]]] = None,
+    ) -> TinyLMState:
+        '''
+        处理 prompt, 返回包含 K/V 缓存与下一 token logits 的状态
+        prefix 为前缀缓存命中的 prompt 开头若干 token 的 (keys, values) 片段, 只对其余 token 计算 K/V
+        '''
+        state = self.new_state(capacity=max(64, 2 * len(token_ids)))
+        for keys, values in prefix or ():
+            state.append(keys, values)
+        if state.length:
+            state.last_token = token_ids[state.length - 1]
+        self.extend(state, token_ids[state.length :])
+        return state
+
+    @staticmethod
+    def export_kv(
+        state: TinyLMState, start: int, end: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        复制状态中 [start, end) 位置的 K/V, 供前缀缓存保存
+        '''
+        return state.keys[start:end].copy(), state.values[start:end].copy()
+
+    def extend(self, state: TinyLMState, token_ids: Sequence[int]):
+        '''
+        将一段 token 追加到已有状态中
+        '''
+        if not token_ids:
+            if state.logits is None:
+                state.logits = self._bigram[state.last_token].copy()
+            return
+        x = self._embedding[np.asarray(token_ids)]
+        state.append(x @ self._wk, x @ self._wv)
+        state.last_token = token_ids[-1]
+        q = x[-1] @ self._wq
+        state.logits = self._bigram[state.last_token] + self._attend(state, q)
+
+    def decode(self, states: List[TinyLMState], token_ids: Sequence[int]):
+        '''
+        一次 decode 迭代: 对整个 batch 向量化计算新 token 的 Q/K/V, 更新各状态的 logits
+        '''
+        tokens = np.asarray(token_ids)
+        x = self._embedding[tokens]
+        q = x @ self._wq
+        k = x @ self._wk
+        v = x @ self._wv
+        for i, state in enumerate(states):
+            state.append(k[i : i + 1], v[i : i + 1])
+            state.last_token = int(tokens[i])
+        attended = np.stack([self._attend(s, q[i]) for i, s in enumerate(states)])
+        logits = self._bigram[tokens] + attended
+        for i, state in enumerate(states):
+            state.logits = logits[i]
+
+    def _attend(self, state: TinyLMState, q: np.ndarray) -> np.ndarray:
+        keys = state.keys[: state.length]
+        values = state.values[: state.length]
+        scores = keys @ q / np.sqrt(self._dim)
+        scores = np.exp(scores - scores.max())
+        h = (scores / scores.sum()) @ values
+        return h @ self._wo
@@ -0,0 +1,118 @@
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .llm_family import PromptStyleV1
+from .prompt import compile_prompt_style
+
+
+class ChatModelMixin:
+    '''
+    chat 相关的公共逻辑: 拼接对话提示词, 以及构造 OpenAI 兼容的返回结构
+    '''
+
+    @staticmethod
+    def get_prompt(
+        prompt: str,
+        chat_history: List[Dict],
+        prompt_style: PromptStyleV1,
+    ) -> str:
+        '''
+        按提示词模板将对话历史与本轮输入拼接为完整提示词
+        模板编译后缓存, 同一对话的后续轮次复用上一轮已渲染的前缀
+        '''
+        return compile_prompt_style(prompt_style).render(prompt, chat_history)
+
+    @staticmethod
+    def to_completion(
+        model_uid: str,
+        text: str,
+        finish_reason: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+    ) -> Dict:
+        return {
+            "id": f"cmpl-{uuid.uuid4()}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": model_uid,
+            "choices": [
+                {
+                    "text": text,
+                    "index": 0,
+                    "logprobs": None,
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def to_completion_chunk(
+        completion_id: str,
+        model_uid: str,
+        created: int,
+        text: str,
+        finish_reason: Optional[str],
+    ) -> Dict:
+        return {
+            "id": completion_id,
+            "object": "text_completion",
+            "created": created,
+            "model": model_uid,
+            "choices": [
+                {
+                    "text": text,
+                    "index": 0,
+                    "logprobs": None,
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+
+    @staticmethod
+    def to_chat_completion_chunk(
+        completion_id: str,
+        model_uid: str,
+        created: int,
+        delta: Dict,
+        finish_reason: Optional[str],
+    ) -> Dict:
+        return {
+            "id": "chat" + completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model_uid,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": delta,
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+
+    @staticmethod
+    def to_chat_completion(completion: Dict) -> Dict:
+        return {
+            "id": "chat" + completion["id"],
+            "object": "chat.completion",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [
+                {
+                    "index": i,
+                    "message": {
+                        "role": "assistant",
+                        "content": choice["text"],
+                    },
+                    "finish_reason": choice["finish_reason"],
+                }
+                for i, choice in enumerate(completion["choices"])
+            ],
+            "usage": completion["usage"],
+        }
@@ -0,0 +1,65 @@
+import logging
+from typing import Callable, Dict, Sequence
+
+import numpy as np
+
+from .cache_manager import CacheManager
+
+logger = logging.getLogger(__name__)
+
+# blob 在 resolve 与加载之间被淘汰时重新解析或生成的次数上限
+_LOAD_ATTEMPTS = 3
+
+
+def load_cached_weights(
+    cache_name: str,
+    names: Sequence[str],
+    create: Callable[[], Dict[str, np.ndarray]],
+) -> Dict[str, np.ndarray]:
+    '''
+    以 mmap 只读方式加载缓存目录中的模型权重, 缓存不存在时调用 create 生成并写入
+    同一节点上的多个副本以及崩溃后重启的模型进程共享页缓存中的权重, 无需重新计算或读盘
+    '''
+    cache_manager = CacheManager()
+    file_names = [f"{name}.npy" for name in names]
+    for attempt in range(_LOAD_ATTEMPTS):
+        paths = cache_manager.resolve(cache_name, file_names)
+        if paths is None:
+            paths = _create_cached_weights(
+                cache_manager, cache_name, names, file_names, create
+            )
+        try:
+            return {
+                name: cache_manager.load_array(paths[file_name])
+                for name, file_name in zip(names, file_names)
+            }
+        except FileNotFoundError:
+            # resolve 之后 blob 被其他进程的 enforce_quota 淘汰, 重新解析或生成
+            if attempt == _LOAD_ATTEMPTS - 1:
+                raise
+            logger.debug("Cached weights of %s were evicted, reload", cache_name)
+
+
+def _create_cached_weights(
+    cache_manager: CacheManager,
+    cache_name: str,
+    names: Sequence[str],
+    file_names: Sequence[str],
+    create: Callable[[], Dict[str, np.ndarray]],
+) -> Dict[str, str]:
+    weights = create()
+    tmp_paths = []
+    for name in names:
+        # 先写临时文件再移入 blob 目录, 并发启动的副本不会读到写了一半的文件
+        tmp_path = cache_manager.mkstemp(".npy")
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(weights[name]))
+        tmp_paths.append(tmp_path)
+    digests = cache_manager.add_files(tmp_paths)
+    for file_name, digest in zip(file_names, digests):
+        cache_manager.link(cache_name, file_name, digest)
+    cache_manager.enforce_quota(
+        keep=[cache_manager.blob_path(digest) for digest in digests]
+    )
+    logger.debug("Weights of %s are cached", cache_name)
+    return dict(zip(file_names, map(cache_manager.blob_path, digests)))
@@ -1,6 +1,5 @@
-import torch
-
-
 def cuda_count():
-    # even if install torch cpu, this interface would return 0.
-    return torch.cuda.device_count()
\ No newline at end of file
+    # 不导入 torch, 避免启动时及每个 forkserver 子进程都付出导入开销
+    from .device_utils import cuda_count as _cuda_count
+
+    return _cuda_count()